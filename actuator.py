@@ -0,0 +1,334 @@
+"""
+Allocation Actuator
+Pushes bandwidth allocations to device controllers: only routes whose
+allocation moved beyond a threshold are sent, coalesced across ticks and
+batched per controller over pooled keep-alive connections, with retries
+"""
+import json
+import time
+import queue
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+import numpy as np
+from config import ACTUATOR_CONFIG, NETWORK_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALLOCATIONS_PATH = '/allocations'
+
+
+class ControllerClient:
+    """JSON client for one controller with a pool of keep-alive connections"""
+    
+    def __init__(self, url, connections=None, timeout=None):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.timeout = timeout or ACTUATOR_CONFIG['timeout']
+        self.idle = queue.LifoQueue(maxsize=connections or ACTUATOR_CONFIG['connections'])
+    
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            return self.connection_class(self.host, self.port, timeout=self.timeout)
+    
+    def _release(self, connection):
+        try:
+            self.idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+    
+    def request(self, method, path, payload=None):
+        """Send a request; returns (status, decoded JSON body)"""
+        connection = self._acquire()
+        try:
+            body = None if payload is None else json.dumps(payload)
+            connection.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            data = response.read()
+        except Exception:
+            # The connection state is unknown; never reuse it
+            connection.close()
+            raise
+        
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return response.status, json.loads(data) if data else None
+    
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class AllocationActuator:
+    """Diff-only, coalescing push of allocation vectors to controllers
+    
+    submit() is cheap and non-blocking: it records routes whose allocation
+    moved more than `change_threshold` (relative) from the value last sent.
+    A sender thread ships whatever is pending, so several ticks submitted
+    while a push is in flight collapse into one update per route. Routes
+    that fail after all retries are re-queued unless a newer value is pending.
+    """
+    
+    def __init__(self, route_names=None, controllers=None, change_threshold=None):
+        self.route_names = list(route_names or NETWORK_CONFIG['route_names'])
+        self.change_threshold = (
+            ACTUATOR_CONFIG['change_threshold'] if change_threshold is None else change_threshold
+        )
+        self.batch_size = ACTUATOR_CONFIG['batch_size']
+        
+        controllers = controllers or ACTUATOR_CONFIG['controllers'] or {
+            'local': {'url': f"http://{ACTUATOR_CONFIG['local_host']}:{ACTUATOR_CONFIG['local_port']}"}
+        }
+        route_index = {route: i for i, route in enumerate(self.route_names)}
+        self.controller_names = list(controllers)
+        self.clients = [ControllerClient(spec['url']) for spec in controllers.values()]
+        
+        # Owning controller per route; explicit route lists first, then catch-alls
+        self.owner = np.full(len(self.route_names), -1)
+        for c, spec in enumerate(controllers.values()):
+            for route in spec.get('routes') or []:
+                self.owner[route_index[route]] = c
+        for c, spec in enumerate(controllers.values()):
+            if spec.get('routes') is None:
+                self.owner[self.owner == -1] = c
+        if (self.owner == -1).any():
+            unassigned = [self.route_names[i] for i in np.flatnonzero(self.owner == -1)]
+            raise ValueError(f"Routes without a controller: {unassigned}")
+        
+        num_routes = len(self.route_names)
+        self.sent = np.full(num_routes, np.nan)  # Last value handed to the sender
+        self.applied = np.full(num_routes, np.nan)  # Last value acknowledged
+        self.pending = np.full(num_routes, np.nan)  # Next value to send (NaN: nothing)
+        
+        self.lock = threading.Condition()
+        self.flush_lock = threading.Lock()  # One flush at a time (sender loop or stop)
+        self.executor = ThreadPoolExecutor(max_workers=len(self.clients) * ACTUATOR_CONFIG['connections'])
+        self.is_running = False
+        self.sender_thread = None
+        self.stats = {
+            'submits': 0,
+            'routes_queued': 0,
+            'routes_coalesced': 0,
+            'routes_applied': 0,
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'last_push': None
+        }
+    
+    def submit(self, allocation):
+        """Queue the routes of an allocation vector that changed beyond the threshold"""
+        allocation = np.asarray(allocation, dtype=float)
+        with self.lock:
+            drift = np.abs(allocation - self.sent)
+            changed = np.isnan(self.sent) | (
+                drift > self.change_threshold * np.maximum(np.abs(self.sent), 1.0)
+            )
+            queued = ~np.isnan(self.pending)
+            
+            # Newer values replace queued ones; routes that moved back within
+            # tolerance of what was sent are dropped from the queue
+            self.pending = np.where(changed, allocation, np.nan)
+            self.stats['submits'] += 1
+            self.stats['routes_queued'] += int(np.count_nonzero(changed & ~queued))
+            self.stats['routes_coalesced'] += int(np.count_nonzero(queued))
+            if changed.any():
+                self.lock.notify()
+    
+    def _post(self, client, routes, values):
+        """POST one batch, retrying transport and server errors with backoff"""
+        payload = {'allocations': dict(zip(routes, values))}
+        for attempt in range(ACTUATOR_CONFIG['max_retries'] + 1):
+            try:
+                with self.lock:
+                    self.stats['requests'] += 1
+                status, _ = client.request('POST', ALLOCATIONS_PATH, payload)
+                if status < 300:
+                    return
+                if status < 500:
+                    raise RuntimeError(f"Controller {client.url} rejected update: HTTP {status}")
+                error = f"HTTP {status}"
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                error = str(e)
+            
+            if attempt < ACTUATOR_CONFIG['max_retries']:
+                with self.lock:
+                    self.stats['retries'] += 1
+                time.sleep(min(ACTUATOR_CONFIG['backoff'] * 2 ** attempt, ACTUATOR_CONFIG['max_backoff']))
+        
+        raise RuntimeError(f"Controller {client.url} unreachable: {error}")
+    
+    def flush(self):
+        """Send everything pending now; returns the number of routes applied"""
+        with self.flush_lock:
+            return self._flush()
+    
+    def _flush(self):
+        with self.lock:
+            routes = np.flatnonzero(~np.isnan(self.pending))
+            values = self.pending[routes]
+            self.pending[routes] = np.nan
+            self.sent[routes] = values
+        if len(routes) == 0:
+            return 0
+        
+        # One batch per (controller, batch_size routes), sent concurrently
+        futures = []
+        for c, client in enumerate(self.clients):
+            mine = np.flatnonzero(self.owner[routes] == c)
+            for start in range(0, len(mine), self.batch_size):
+                batch = mine[start:start + self.batch_size]
+                names = [self.route_names[i] for i in routes[batch]]
+                future = self.executor.submit(self._post, client, names, values[batch].tolist())
+                futures.append((batch, future))
+        
+        applied = 0
+        for batch, future in futures:
+            indices = routes[batch]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"Allocation push failed for {len(indices)} route(s): {e}")
+                with self.lock:
+                    self.stats['failures'] += 1
+                    # Re-queue unless a newer value is already pending
+                    retry = indices[np.isnan(self.pending[indices])]
+                    self.pending[retry] = self.sent[retry]
+                    self.sent[indices] = self.applied[indices]
+                continue
+            
+            with self.lock:
+                self.applied[indices] = values[batch]
+            applied += len(indices)
+        
+        with self.lock:
+            self.stats['routes_applied'] += applied
+            self.stats['last_push'] = time.time()
+        return applied
+    
+    def sender_loop(self):
+        """Push pending updates as they arrive"""
+        while self.is_running:
+            with self.lock:
+                while self.is_running and np.isnan(self.pending).all():
+                    self.lock.wait()
+            if not self.is_running:
+                break
+            
+            if self.flush() == 0 and not np.isnan(self.pending).all():
+                # Everything failed; back off before trying again
+                time.sleep(ACTUATOR_CONFIG['max_backoff'])
+    
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.sender_thread = threading.Thread(target=self.sender_loop, daemon=True)
+        self.sender_thread.start()
+        logger.info(f"Actuator started: {len(self.route_names)} routes, {len(self.clients)} controller(s)")
+    
+    def stop(self):
+        """Stop the sender after one final push of pending updates
+        
+        The final flush waits for one still running in the sender thread.
+        """
+        with self.lock:
+            self.is_running = False
+            self.lock.notify_all()
+        if self.sender_thread:
+            self.sender_thread.join(timeout=ACTUATOR_CONFIG['timeout'])
+        self.flush()
+        for client in self.clients:
+            client.close()
+        logger.info("Actuator stopped")
+
+
+class LocalController:
+    """Stand-in device controller for development and testing
+    
+    Serves the actuator protocol over HTTP/1.1 keep-alive: POST /allocations
+    with {'allocations': {route: Mbps}} updates the table, GET /allocations
+    returns it. `fail_requests` makes the next N requests answer 503.
+    """
+    
+    def __init__(self, host=None, port=None):
+        self.allocations = {}
+        self.fail_requests = 0
+        self.stats = {'requests': 0, 'routes_applied': 0}
+        self.lock = threading.Lock()
+        controller = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self):
+                if self.path != ALLOCATIONS_PATH:
+                    return self._reply(404, {'error': 'not found'})
+                with controller.lock:
+                    self._reply(200, {'allocations': dict(controller.allocations)})
+            
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if self.path != ALLOCATIONS_PATH:
+                    return self._reply(404, {'error': 'not found'})
+                with controller.lock:
+                    controller.stats['requests'] += 1
+                    if controller.fail_requests > 0:
+                        controller.fail_requests -= 1
+                        return self._reply(503, {'error': 'unavailable'})
+                    try:
+                        updates = json.loads(body)['allocations']
+                    except (ValueError, KeyError):
+                        return self._reply(400, {'error': 'expected {"allocations": {route: Mbps}}'})
+                    controller.allocations.update(updates)
+                    controller.stats['routes_applied'] += len(updates)
+                self._reply(200, {'applied': len(updates)})
+            
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+        
+        self.server = ThreadingHTTPServer(
+            (host or ACTUATOR_CONFIG['local_host'], ACTUATOR_CONFIG['local_port'] if port is None else port),
+            Handler
+        )
+        self.server.daemon_threads = True
+        self.thread = None
+    
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        logger.info(f"Local controller listening on {self.url}")
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,7 +1,7 @@
 """
 Flask Web Application for Network Traffic Prediction and Optimization Dashboard
 """
-from flask import Flask, jsonify, render_template_string
+from flask import Flask, Response, jsonify, render_template_string, request
 from flask_cors import CORS
 import threading
 from monitor import NetworkMonitor
@@ -441,10 +441,14 @@ def dashboard():
     """Serve the main dashboard"""
     return render_template_string(DASHBOARD_HTML)
 
+def _snapshot_response(key):
+    """Serve a body pre-serialized in the monitor's latest status snapshot"""
+    return Response(monitor.status_snapshot[key], mimetype='application/json')
+
 @app.route('/api/status')
 def get_status():
     """Get current system status"""
-    return jsonify(monitor.get_status())
+    return _snapshot_response('status_json')
 
 @app.route('/api/start', methods=['POST'])
 def start_monitoring():
@@ -476,18 +480,68 @@ def train_model():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/models')
+def list_models():
+    """List registered model versions"""
+    return jsonify({
+        'current': monitor.predictor.model_version,
+        'versions': monitor.list_model_versions()
+    })
+
+@app.route('/api/models/rollback', methods=['POST'])
+def rollback_model():
+    """Roll back to an earlier model version"""
+    try:
+        version = (request.get_json(silent=True) or {}).get('version')
+        rolled_back = monitor.rollback_model(version)
+        if rolled_back:
+            return jsonify({'message': f'Rolled back to model version {rolled_back}'})
+        else:
+            return jsonify({'error': 'Rollback failed. Check logs for details.'}), 500
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/predictions')
 def get_predictions():
     """Get prediction history"""
-    return jsonify(monitor.get_prediction_history())
+    return _snapshot_response('predictions_json')
 
 @app.route('/api/metrics')
 def get_metrics():
     """Get detailed metrics"""
-    return jsonify({
-        'metrics': monitor.metrics,
-        'optimization_metrics': monitor.optimizer.get_optimization_metrics()
-    })
+    return _snapshot_response('metrics_json')
+
+def _scenario_matrix(rows):
+    """Scenario rows as route lists or {route: Mbps} dicts -> list of vectors"""
+    optimizer = monitor.optimizer
+    return [optimizer.to_vector(row) if isinstance(row, dict) else row for row in rows]
+
+@app.route('/api/whatif', methods=['POST'])
+def whatif():
+    """Evaluate allocations for a batch of demand scenarios (no side effects)"""
+    data = request.get_json(silent=True) or {}
+    demand = data.get('demand')
+    if not isinstance(demand, list) or not demand:
+        return jsonify({'error': 'demand must be a non-empty list of scenarios'}), 400
+    if len(demand) > API_CONFIG['whatif_max_scenarios']:
+        return jsonify({'error': f"At most {API_CONFIG['whatif_max_scenarios']} scenarios per request"}), 400
+    
+    try:
+        predicted = data.get('predicted')
+        result = monitor.optimizer.evaluate_scenarios(
+            _scenario_matrix(demand),
+            None if predicted is None else _scenario_matrix(predicted),
+            data.get('total_bandwidth'),
+            data.get('algorithm')
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    
+    response = {key: value.tolist() if hasattr(value, 'tolist') else value for key, value in result.items()}
+    response['routes'] = monitor.optimizer.route_names
+    return jsonify(response)
 
 if __name__ == '__main__':
     logger.info("Starting Flask application...")
@@ -0,0 +1,211 @@
+"""
+Parallel Rolling-Origin Backtesting
+Scores the serving model (or a statistical engine) on walk-forward folds of the
+history store in worker processes, for every step of the forecast horizon
+"""
+import os
+import time
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from tuner import limit_worker_threads
+from streaming_metrics import ErrorAccumulator
+from config import BACKTEST_CONFIG, MODEL_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _fold_errors(predictions, actual):
+    """Per-horizon-step error accumulator; extra axes (routes) are folded in"""
+    predictions = predictions.reshape(predictions.shape[0], predictions.shape[1], -1)
+    actual = actual.reshape(actual.shape[0], actual.shape[1], -1)
+    horizon = predictions.shape[1]
+    errors = ErrorAccumulator(shape=(horizon,))
+    errors.update(
+        predictions.transpose(0, 2, 1).reshape(-1, horizon),
+        actual.transpose(0, 2, 1).reshape(-1, horizon)
+    )
+    return errors, actual.shape[0]
+
+
+def _backtest_model_fold(job):
+    """Score the serving deep model on one fold with large-batch inference"""
+    from ml_models import TrafficPredictor
+    
+    predictor = TrafficPredictor()
+    if not predictor.load_model(job['version']):
+        raise RuntimeError("Model not available for backtesting")
+    
+    seq_len = predictor.sequence_length
+    horizon = predictor.prediction_horizon
+    windows = np.lib.stride_tricks.sliding_window_view(
+        job['values'], seq_len + horizon, axis=0
+    ).transpose(0, 2, 1)
+    
+    inputs = windows[:, :seq_len]
+    if predictor.is_multivariate:
+        actual = windows[:, seq_len:]
+    else:
+        actual = windows[:, seq_len:, 0]
+    
+    batch_size = BACKTEST_CONFIG['inference_batch_size']
+    predictions = np.concatenate([
+        predictor.predict_batch(inputs[start:start + batch_size])
+        for start in range(0, len(inputs), batch_size)
+    ])
+    return _fold_errors(predictions, actual)
+
+
+def _backtest_forecaster_fold(job):
+    """Score a statistical engine on one fold: fit on history, then walk forward"""
+    from forecasters import create_forecaster
+    
+    horizon = job['horizon']
+    forecaster = create_forecaster(job['engine'])
+    if not forecaster.fit(job['history'], job['history_timestamps']):
+        raise RuntimeError(f"Could not fit {job['engine']} on fold history")
+    
+    block, timestamps = job['values'], job['timestamps']
+    origins = len(block) - horizon + 1
+    predictions = np.zeros((origins, horizon, block.shape[1]))
+    for t in range(origins):
+        predictions[t] = forecaster.forecast(horizon)
+        forecaster.update(block[t], timestamps[t])
+    
+    actual = np.lib.stride_tricks.sliding_window_view(block, horizon, axis=0).transpose(0, 2, 1)
+    return _fold_errors(predictions, actual)
+
+
+def _run_fold(job):
+    """Worker entry point"""
+    started = time.time()
+    if job['engine'] == 'model':
+        errors, windows = _backtest_model_fold(job)
+    else:
+        errors, windows = _backtest_forecaster_fold(job)
+    
+    return {
+        'fold': job['fold'],
+        'start': job['start'],
+        'end': job['end'],
+        'windows': windows,
+        'duration': time.time() - started,
+        'errors': errors
+    }
+
+
+class Backtester:
+    """Walk-forward backtesting over the history store"""
+    
+    def __init__(self, folds=None, workers=None, engine=None):
+        self.folds = folds or BACKTEST_CONFIG['folds']
+        self.workers = workers or BACKTEST_CONFIG['workers'] or os.cpu_count() or 1
+        self.threads_per_worker = BACKTEST_CONFIG['threads_per_worker']
+        self.engine = engine or BACKTEST_CONFIG['engine']
+    
+    def build_jobs(self, df, feature_columns, target_columns, version=None, trained_until=None):
+        """Split the test range into contiguous folds
+        
+        For the model engine, forecast targets start after `trained_until`
+        (the end of the model's training data), so only rows the model has
+        not seen are scored; older rows may still serve as input windows.
+        """
+        seq_len = MODEL_CONFIG['sequence_length']
+        horizon = MODEL_CONFIG['prediction_horizon']
+        n = len(df)
+        timestamps = df['timestamp'].values
+        
+        if self.engine == 'model':
+            values = df[feature_columns].values.astype(float)
+            first_origin = seq_len
+            if trained_until is not None:
+                unseen = int(np.searchsorted(
+                    timestamps, np.datetime64(pd.Timestamp(trained_until)), side='right'
+                ))
+                first_origin = max(first_origin, unseen)
+        else:
+            values = df[target_columns].values.astype(float)
+            first_origin = max(seq_len, BACKTEST_CONFIG['min_fit_samples'])
+        
+        last_origin = n - horizon  # inclusive
+        if last_origin < first_origin:
+            return []
+        
+        bounds = np.linspace(first_origin, last_origin + 1, self.folds + 1).astype(int)
+        jobs = []
+        for fold, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if end <= start:
+                continue
+            job = {
+                'fold': fold,
+                'engine': self.engine,
+                'horizon': horizon,
+                'version': version,
+                'start': str(timestamps[start]),
+                'end': str(timestamps[end - 1])
+            }
+            if self.engine == 'model':
+                job['values'] = values[start - seq_len:end + horizon - 1]
+            else:
+                fit_start = max(0, start - BACKTEST_CONFIG['fit_window'])
+                job['history'] = values[fit_start:start]
+                job['history_timestamps'] = timestamps[fit_start:start]
+                job['values'] = values[start:end + horizon - 1]
+                job['timestamps'] = timestamps[start:end + horizon - 1]
+            jobs.append(job)
+        
+        return jobs
+    
+    def run(self, df, feature_columns, target_columns, version=None, trained_until=None):
+        """Run all folds in parallel and merge their error curves
+        
+        The model engine needs `trained_until`, the end of the model's
+        training data (its registry `data_range`), to stay out of sample.
+        """
+        started = time.time()
+        if self.engine == 'model' and trained_until is None:
+            logger.error("Training range of the model is unknown; refusing an in-sample backtest")
+            return None
+        
+        jobs = self.build_jobs(df, feature_columns, target_columns, version, trained_until)
+        if not jobs:
+            if self.engine == 'model':
+                logger.error(f"No data after the model's training range (ends {trained_until}) to backtest on")
+            else:
+                logger.error("Insufficient data for backtesting")
+            return None
+        
+        workers = min(self.workers, len(jobs))
+        logger.info(f"Backtesting {self.engine} on {len(jobs)} folds with {workers} workers")
+        
+        ctx = mp.get_context('spawn')
+        with ctx.Pool(
+            processes=workers,
+            initializer=limit_worker_threads,
+            initargs=(self.threads_per_worker, self.engine == 'model')
+        ) as pool:
+            fold_results = sorted(pool.map(_run_fold, jobs), key=lambda r: r['fold'])
+        
+        errors = ErrorAccumulator(shape=(MODEL_CONFIG['prediction_horizon'],))
+        for r in fold_results:
+            errors.merge(r['errors'])
+        overall = errors.overall()
+        overall.pop('num_samples')
+        
+        return {
+            'engine': self.engine,
+            'per_step': {
+                'mae': errors.mae().tolist(),
+                'rmse': errors.rmse().tolist(),
+                'mape': errors.mape().tolist()
+            },
+            'overall': overall,
+            'folds': [
+                {k: v for k, v in r.items() if k != 'errors'}
+                for r in fold_results
+            ],
+            'num_windows': int(sum(r['windows'] for r in fold_results)),
+            'duration': time.time() - started
+        }
@@ -0,0 +1,310 @@
+"""
+Monitor Checkpoints
+Compact binary snapshots of a monitor's in-memory state, written atomically
+and memory-mapped back at startup so a restarted monitor resumes warm
+"""
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+from config import CHECKPOINT_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NTMCKPT1'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Attributes restored per component; configuration (alpha, order, ...) is not
+FORECASTER_STATE = ('n_series', 'is_fitted', 'last_timestamp', 'level', 'trend', 'seasonal',
+                    'xtx', 'xty', 'coef', 'lags')
+FORECAST_CACHE_STATE = ('forecast', 'base_timestamp')
+ALLOCATION_HISTORY_STATE = ('allocation', 'current_traffic', 'predicted_traffic', 'utilization',
+                            'change', 'position', 'count', 'utilization_sum', 'change_sum')
+
+
+def _aligned(size):
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def _plain(value):
+    """NumPy scalars -> Python scalars for the JSON header"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def write_arrays(path, arrays, meta):
+    """Atomically write named arrays and JSON metadata to one binary file
+    
+    Layout: magic, header length (uint64), JSON header with each array's
+    dtype, shape and offset, then the raw arrays at 64-byte aligned offsets
+    so each can be memory-mapped in place. Returns the file size.
+    """
+    arrays = {name: np.ascontiguousarray(value) for name, value in arrays.items()}
+    layout = {}
+    offset = 0
+    for name, value in arrays.items():
+        layout[name] = {'dtype': value.dtype.str, 'shape': list(value.shape), 'offset': offset}
+        offset += _aligned(value.nbytes)
+    header = json.dumps({'format': FORMAT_VERSION, 'meta': meta, 'arrays': layout}, default=_plain).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+        for name, value in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(value.tobytes())
+        f.truncate()  # A trailing empty array leaves the position past the end
+        size = f.tell()
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return size
+
+
+def read_arrays(path):
+    """Map a file written by write_arrays; returns (meta, {name: read-only array})"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a checkpoint file")
+        header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(header_length))
+    if header['format'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format {header['format']}")
+    
+    data_start = _aligned(len(MAGIC) + 8 + header_length)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if np.prod(shape) == 0:
+            arrays[name] = np.empty(shape, dtype=spec['dtype'])  # Nothing to map
+        else:
+            arrays[name] = np.memmap(path, dtype=spec['dtype'], mode='r',
+                                     offset=data_start + spec['offset'], shape=shape)
+    return header['meta'], arrays
+
+
+def _export(obj, prefix, attributes, arrays, meta):
+    """Arrays of `obj` go to `arrays`, scalars (and None) to `meta`"""
+    for attribute in attributes:
+        if not hasattr(obj, attribute):
+            continue
+        value = getattr(obj, attribute)
+        if isinstance(value, np.ndarray):
+            arrays[f"{prefix}.{attribute}"] = value.copy()
+        else:
+            meta[f"{prefix}.{attribute}"] = _plain(value)
+
+
+def _import(obj, prefix, attributes, arrays, meta):
+    for attribute in attributes:
+        key = f"{prefix}.{attribute}"
+        if key in arrays:
+            setattr(obj, attribute, np.array(arrays[key]))  # Copy out of the mapping
+        elif key in meta:
+            setattr(obj, attribute, meta[key])
+
+
+class MonitorCheckpoint:
+    """Warm-restart checkpoint of one NetworkMonitor
+    
+    capture() copies the in-memory state: the collector's history window
+    (which holds the model's next input window), the baseline forecaster,
+    forecast cache, optimizer allocation and history ring buffers,
+    prediction history and running counters. A running monitor updates the
+    forecasting state on its model worker, so it captures the rest with
+    forecasting=False and adds that part there with capture_forecasting().
+    save() writes it with write_arrays(); restore() maps it back into a
+    monitor that has not started yet. Checkpoints older than `max_age` or
+    written under a different route/forecaster configuration are ignored.
+    """
+    
+    def __init__(self, path, interval=None, max_age=None):
+        self.path = path
+        self.interval = interval or CHECKPOINT_CONFIG['interval']
+        self.max_age = max_age or CHECKPOINT_CONFIG['max_age']
+        self.last_capture = time.monotonic()
+        self.stats = {
+            'saves': 0,
+            'errors': 0,
+            'last_saved': None,
+            'last_save_ms': None,
+            'last_bytes': None,
+            'restored_from': None
+        }
+    
+    def due(self):
+        return time.monotonic() - self.last_capture >= self.interval
+    
+    @staticmethod
+    def _layout(monitor):
+        """Configuration the checkpointed state depends on"""
+        forecaster = monitor.baseline_forecaster
+        history = monitor.optimizer.allocation_history
+        return json.loads(json.dumps({
+            'routes': list(monitor.optimizer.route_names),
+            'history_size': history.capacity,
+            'metrics_window': history.window,
+            'forecaster': type(forecaster).__name__,
+            'forecaster_config': {
+                key: value for key, value in vars(forecaster).items()
+                if key not in FORECASTER_STATE and isinstance(value, (int, float, str))
+            }
+        }, default=_plain))
+    
+    def capture(self, monitor, forecasting=True):
+        """Copy the monitor's state; returns (arrays, meta), or None without history"""
+        self.last_capture = time.monotonic()
+        history = pd.DataFrame(list(monitor.data_collector.history))
+        if len(history) == 0:
+            return None
+        
+        optimizer = monitor.optimizer
+        arrays = {}
+        meta = {'saved_at': time.time(), 'layout': self._layout(monitor)}
+        
+        # Collector history window
+        columns = [column for column in history.columns if column != 'timestamp']
+        arrays['history.values'] = history[columns].to_numpy(dtype=float)
+        arrays['history.timestamp'] = (
+            pd.to_datetime(history['timestamp']).to_numpy().astype('datetime64[us]').astype(np.int64)
+        )
+        meta['history.columns'] = columns
+        meta['history.integer_columns'] = [
+            column for column in columns if pd.api.types.is_integer_dtype(history[column])
+        ]
+        
+        # Latest traffic, prediction and the prediction history
+        if monitor.current_traffic:
+            arrays['monitor.current_traffic'] = optimizer.to_vector(monitor.current_traffic)
+        if monitor.predicted_traffic:
+            arrays['monitor.predicted_traffic'] = optimizer.to_vector(monitor.predicted_traffic)
+        predictions = monitor.prediction_history
+        arrays['predictions.values'] = np.array(
+            [optimizer.to_vector(entry['prediction']) for entry in predictions]
+        ).reshape(len(predictions), len(optimizer.route_names))
+        meta['predictions.timestamp'] = [entry['timestamp'] for entry in predictions]
+        meta['predictions.source'] = [entry['source'] for entry in predictions]
+        
+        # Optimizer
+        arrays['optimizer.allocation'] = optimizer.allocation.copy()
+        if optimizer.solved_inputs is not None:
+            solved_current, solved_predicted, solved_algorithm = optimizer.solved_inputs
+            arrays['optimizer.solved_current'] = solved_current
+            arrays['optimizer.solved_predicted'] = solved_predicted
+            meta['optimizer.solved_algorithm'] = solved_algorithm
+        meta['optimizer.settled'] = optimizer.settled
+        _export(optimizer.allocation_history, 'allocation_history', ALLOCATION_HISTORY_STATE, arrays, meta)
+        
+        # Running counters
+        meta['stats'] = {
+            'optimizer': dict(optimizer.solve_stats),
+            'degradation': dict(monitor.degradation_stats)
+        }
+        
+        if forecasting:
+            self.capture_forecasting(monitor, (arrays, meta))
+        return arrays, meta
+    
+    def capture_forecasting(self, monitor, state):
+        """Add the baseline forecaster and forecast cache to a captured state
+        
+        Call it on the thread that updates them, so the copy never mixes
+        fields from two updates.
+        """
+        arrays, meta = state
+        _export(monitor.baseline_forecaster, 'baseline', FORECASTER_STATE, arrays, meta)
+        _export(monitor.forecast_cache, 'forecast_cache', FORECAST_CACHE_STATE, arrays, meta)
+        meta['stats']['forecast_cache'] = dict(monitor.forecast_cache.stats)
+        return state
+    
+    def save(self, state):
+        """Write a captured state atomically; returns True when written"""
+        if state is None:
+            return False
+        started = time.perf_counter()
+        try:
+            size = write_arrays(self.path, *state)
+        except OSError as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error writing checkpoint {self.path}: {e}")
+            return False
+        
+        self.stats['saves'] += 1
+        self.stats['last_saved'] = state[1]['saved_at']
+        self.stats['last_save_ms'] = (time.perf_counter() - started) * 1000
+        self.stats['last_bytes'] = size
+        logger.debug(f"Checkpoint written to {self.path} ({size} bytes)")
+        return True
+    
+    def restore(self, monitor):
+        """Load the checkpoint into `monitor`; False (cold start) if there is none usable"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            meta, arrays = read_arrays(self.path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return False
+        
+        age = time.time() - meta['saved_at']
+        if age > self.max_age:
+            logger.info(f"Checkpoint {self.path} is {age:.0f}s old; starting cold")
+            return False
+        if meta['layout'] != self._layout(monitor):
+            logger.warning(f"Checkpoint {self.path} was written under a different configuration; starting cold")
+            return False
+        
+        optimizer = monitor.optimizer
+        
+        # Collector history window
+        history = pd.DataFrame(np.array(arrays['history.values']), columns=meta['history.columns'])
+        for column in meta['history.integer_columns']:
+            history[column] = history[column].astype(np.int64)
+        timestamps = pd.to_datetime(arrays['history.timestamp'], unit='us')
+        history.insert(0, 'timestamp', [ts.isoformat() for ts in timestamps])
+        monitor.data_collector.history = history.to_dict('records')
+        
+        # Optimizer
+        optimizer.allocation = np.array(arrays['optimizer.allocation'])
+        if 'optimizer.solved_current' in arrays:
+            optimizer.solved_inputs = (
+                np.array(arrays['optimizer.solved_current']),
+                np.array(arrays['optimizer.solved_predicted']),
+                meta['optimizer.solved_algorithm']
+            )
+        optimizer.settled = meta['optimizer.settled']
+        _import(optimizer.allocation_history, 'allocation_history', ALLOCATION_HISTORY_STATE, arrays, meta)
+        
+        # Forecasting state
+        _import(monitor.baseline_forecaster, 'baseline', FORECASTER_STATE, arrays, meta)
+        _import(monitor.forecast_cache, 'forecast_cache', FORECAST_CACHE_STATE, arrays, meta)
+        
+        # Latest traffic, prediction, allocation and metrics
+        if 'monitor.current_traffic' in arrays:
+            monitor.current_traffic = optimizer.to_dict(np.array(arrays['monitor.current_traffic']))
+            monitor.metrics = optimizer.get_utilization_stats(monitor.current_traffic)
+        if 'monitor.predicted_traffic' in arrays:
+            monitor.predicted_traffic = optimizer.to_dict(np.array(arrays['monitor.predicted_traffic']))
+        monitor.current_allocation = optimizer.to_dict(optimizer.allocation)
+        monitor.prediction_history = [
+            {'timestamp': timestamp, 'prediction': optimizer.to_dict(values), 'source': source}
+            for timestamp, values, source in zip(
+                meta['predictions.timestamp'], np.array(arrays['predictions.values']), meta['predictions.source']
+            )
+        ]
+        
+        # Running counters
+        optimizer.solve_stats.update(meta['stats']['optimizer'])
+        monitor.forecast_cache.stats.update(meta['stats'].get('forecast_cache', {}))
+        monitor.degradation_stats.update(meta['stats']['degradation'])
+        
+        self.stats['restored_from'] = meta['saved_at']
+        logger.info(f"Warm restart from {self.path}: {len(history)} samples, checkpoint {age:.0f}s old")
+        return True
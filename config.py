@@ -16,12 +16,113 @@ MODEL_CONFIG = {
     'epochs': 50,
     'validation_split': 0.2,
     'model_path': 'models/traffic_predictor.h5',
-    'scaler_path': 'models/scaler.pkl'
+    'scaler_path': 'models/scaler.pkl',
+    'mode': 'aggregate',  # 'aggregate' (total bandwidth) or 'multivariate' (joint per-route forecast)
+    'multivariate_model_path': 'models/traffic_predictor_multivariate.h5',
+    'multivariate_scaler_path': 'models/scaler_multivariate.pkl',
+    'registry_dir': 'models/registry'  # Versioned artifacts, one sub-registry per mode
+}
+
+# Statistical Forecasting Configuration (baseline and fallback engines)
+FORECAST_CONFIG = {
+    'engine': 'holt_winters',  # 'ewma', 'holt_winters', 'ar'
+    'ewma_alpha': 0.3,
+    'hw_alpha': 0.3,  # Level smoothing
+    'hw_beta': 0.05,  # Trend smoothing
+    'hw_gamma': 0.1,  # Seasonal smoothing
+    'season_length': 86400,  # Daily seasonality (seconds)
+    'season_buckets': 288,  # 5-minute time-of-day buckets
+    'ar_order': 6,
+    'ar_forgetting': 0.999,  # Weight decay for incremental AR updates
+    'fallback_enabled': True,  # Use the engine when the deep model is unavailable
+    'cache_enabled': True,  # Serve ticks from the cached model horizon
+    'cache_error_bound': 0.25  # Re-predict when observed traffic drifts >25% from the cached forecast
+}
+
+# Hyperparameter Search Configuration (python main.py tune)
+TUNING_CONFIG = {
+    'search_space': {
+        'model_type': ['lstm', 'gru'],
+        'lstm_units': [32, 50, 64, 128],
+        'sequence_length': [30, 60, 120],
+        'prediction_horizon': [5, 10],
+        'batch_size': [32, 64]
+    },
+    'max_trials': 24,  # Random subset of the grid (None for the full grid)
+    'seed': 42,
+    'epochs': 20,
+    'patience': 5,  # Early stopping patience per trial
+    'prune_after_epochs': 3,  # Earliest epoch at which a trial may be pruned
+    'prune_factor': 1.5,  # Prune if val_loss > factor x best val_loss at the same epoch
+    'workers': None,  # Defaults to the number of CPU cores
+    'threads_per_worker': 1,  # TensorFlow/BLAS threads per worker process
+    'results_dir': 'models/tuning'
+}
+
+# Per-Route Training Configuration (python main.py train --per-route)
+ROUTE_TRAINING_CONFIG = {
+    'routes_per_model': 1,  # 1 = one model per route, >1 = one model per route group
+    'model_type': 'lstm',
+    'workers': None,  # Defaults to the number of CPU cores
+    'threads_per_worker': 1,  # TensorFlow/BLAS threads per worker process
+    'models_dir': 'models/routes',
+    'manifest_path': 'models/routes/manifest.json'
+}
+
+# Backtesting Configuration (python main.py backtest)
+BACKTEST_CONFIG = {
+    'folds': 8,  # Walk-forward folds over the test range
+    'engine': 'model',  # 'model' or a FORECAST_CONFIG engine name ('ewma', 'holt_winters', 'ar')
+    'workers': None,  # Defaults to the number of CPU cores
+    'threads_per_worker': 1,  # TensorFlow/BLAS threads per worker process
+    'inference_batch_size': 4096,  # Windows per model call
+    'min_fit_samples': 120,  # Statistical engines: history needed before the first origin
+    'fit_window': 17280  # Statistical engines: max history used to fit each fold (1 day at 5s)
+}
+
+# Trace Replay Configuration (algorithm comparison)
+REPLAY_CONFIG = {
+    'algorithms': ['adaptive', 'proportional', 'ml_based', 'max_min_fair', 'multi_commodity', 'hierarchical'],
+    'predictor': 'ewma',  # 'oracle', 'naive' or a FORECAST_CONFIG engine name
+    'warmup_samples': 60,  # Samples used to warm up the predictor before replaying
+    'synthetic_hours': 24,  # Synthetic trace length when no recorded data is available
+    'workers': None  # Defaults to the number of CPU cores
+}
+
+# Online Learning Configuration (background fine-tuning with hot-swap)
+ONLINE_LEARNING_CONFIG = {
+    'enabled': False,
+    'interval': 600,  # seconds between fine-tuning rounds
+    'window_hours': 2,  # Newest data used for each round
+    'epochs': 3,
+    'learning_rate': 1e-4,
+    'validation_fraction': 0.2,  # Newest windows held out to validate the candidate
+    'min_improvement': 0.0,  # Required relative loss improvement before swapping
+    'min_samples': 100,  # Minimum windows needed to run a round
+    'persist': True  # Register swapped models as new registry versions
+}
+
+# Reinforcement-Learning Allocator Configuration (the 'ml_based' algorithm)
+RL_CONFIG = {
+    'policy_path': 'models/rl_policy.npz',
+    'n_envs': 128,  # Simulated traffic episodes evaluated per policy
+    'episode_length': 288,  # Ticks per episode
+    'population': 32,  # Evolution-strategies perturbations per iteration
+    'sigma': 0.1,  # Perturbation scale
+    'learning_rate': 0.03,  # Adam step size
+    'iterations': 150,
+    'prediction_noise': 0.1,  # Relative error of the simulated traffic forecast
+    'load_range': (0.2, 1.2),  # Offered load per episode, as a fraction of total bandwidth
+    'overload_penalty': 0.5,  # Reward penalty per overloaded route fraction
+    'churn_penalty': 0.05,  # Reward penalty per unit of reallocated bandwidth (fraction of total)
+    'seed': 42
 }
 
 # Data Collection Configuration
 DATA_CONFIG = {
     'collection_interval': 5,  # seconds
+    'tick_overrun_policy': 'skip',  # After an overrun: 'skip' missed ticks or 'catch_up' on them
+    'max_catch_up_ticks': 3,  # Missed ticks fired back to back before skipping ('catch_up')
     'history_window': 3600,  # 1 hour of history
     'data_file': 'data/network_traffic.csv',
     'simulation_mode': True,  # Set to False for real network monitoring
@@ -29,6 +130,33 @@ DATA_CONFIG = {
     'simulation_variance': 0.3  # 30% variance
 }
 
+# Monitoring Pipeline Configuration (bounded queues between stages; full queues drop the oldest item)
+PIPELINE_CONFIG = {
+    'persist_queue_size': 1000,  # Samples awaiting the data-file write
+    'predict_queue_size': 100,  # Samples awaiting the prediction stage (all update the baseline)
+    'optimize_queue_size': 1,  # Only the latest (traffic, prediction) snapshot is optimized
+    'latency_budgets': {'persist': 2.0, 'predict': 1.0, 'optimize': 0.5},  # seconds per stage
+    'model_deadline': 0.8,  # seconds the model may take within the predict budget
+    'degraded_forecast': 'ewma'  # Used when the model misses its budget: 'ewma' or 'last' value
+}
+
+# Warm-Restart Checkpoint Configuration (written next to the monitor's data file as <name>.ckpt)
+CHECKPOINT_CONFIG = {
+    'enabled': True,
+    'interval': 30,  # seconds between checkpoints while monitoring
+    'max_age': 900  # seconds; older checkpoints are ignored at startup (cold start)
+}
+
+# Multi-Site Monitoring Configuration (many networks, one process, one shared model)
+MULTI_SITE_CONFIG = {
+    # {site: {'data_file': path, 'controllers': {...} (optional)}};
+    # None: 'sites' command monitors a single 'default' site
+    'sites': None,
+    'data_dir': 'data/sites',  # Default per-site data files: <data_dir>/<site>.csv
+    'max_batch_size': 256,  # Windows per model call
+    'max_batch_wait': 0.05  # seconds to wait for the other sites' windows
+}
+
 # Optimization Configuration
 OPTIMIZATION_CONFIG = {
     'bandwidth_threshold_low': 0.3,  # 30% utilization
@@ -36,7 +164,12 @@ OPTIMIZATION_CONFIG = {
     'reallocation_interval': 30,  # seconds
     'min_bandwidth': 100,  # Minimum Mbps per route
     'max_bandwidth': 10000,  # Maximum Mbps per route
-    'optimization_algorithm': 'adaptive'  # 'adaptive', 'proportional', 'ml_based'
+    'optimization_algorithm': 'adaptive',  # 'adaptive', 'proportional', 'ml_based', 'max_min_fair',
+                                           # 'multi_commodity', 'hierarchical'
+    'fairness_weights': None,  # Route name -> max-min fair share weight (default 1.0)
+    'change_tolerance': 0.02,  # Reuse the last allocation while every route's traffic moved by <2%
+    'history_size': 1000,  # Optimizations kept in the allocation history ring buffers
+    'metrics_window': 10  # Recent optimizations averaged in the optimization metrics
 }
 
 # Network Configuration
@@ -47,11 +180,49 @@ NETWORK_CONFIG = {
     'monitoring_interfaces': []  # Add network interfaces to monitor
 }
 
+# Network Topology Configuration (used by the 'multi_commodity' algorithm)
+TOPOLOGY_CONFIG = {
+    # Link name -> capacity (Mbps). Without links/paths, each route gets a private
+    # access link (max_bandwidth) and all routes share a core link (total_bandwidth)
+    'links': None,
+    # Route name -> list of link names the route traverses
+    'paths': None,
+    'demand_tolerance': 0.02  # Re-solve only for path demands that moved by >2%
+}
+
+# Hierarchical Pool Configuration (used by the 'hierarchical' algorithm)
+HIERARCHY_CONFIG = {
+    # Nested capacity pools with routes as leaves, e.g.
+    # {'eu': {'capacity': 6000, 'children': {'site_a': {'capacity': 4000,
+    #                                                   'children': ['Route_1', 'Route_2']}, ...}}}
+    # Without pools, all routes share total_bandwidth directly
+    'pools': None,
+    'change_tolerance': 0.02  # Skip subtrees whose route demand moved by <2%
+}
+
+# Actuator Configuration (pushing allocations to device controllers)
+ACTUATOR_CONFIG = {
+    'enabled': False,
+    # {name: {'url': 'http://host:port', 'routes': [...] or None (all unassigned routes)}};
+    # None: one local stand-in controller (started in-process) for every route
+    'controllers': None,
+    'local_host': '127.0.0.1',
+    'local_port': 8700,
+    'change_threshold': 0.02,  # Relative change before a route is re-sent
+    'batch_size': 5000,  # Routes per request
+    'connections': 2,  # Pooled keep-alive connections per controller
+    'timeout': 5,  # seconds per request
+    'max_retries': 4,
+    'backoff': 0.1,  # seconds before the first retry, doubled per attempt
+    'max_backoff': 5.0
+}
+
 # API Configuration
 API_CONFIG = {
     'host': '0.0.0.0',
     'port': 5000,
-    'debug': True
+    'debug': True,
+    'whatif_max_scenarios': 10000  # Per /api/whatif request
 }
 
 # Evaluation Metrics
@@ -59,6 +230,8 @@ METRICS_CONFIG = {
     'mae_threshold': 50,  # Mbps
     'rmse_threshold': 100,  # Mbps
     'latency_threshold': 100,  # ms
-    'throughput_target': 0.85  # 85% of total bandwidth
+    'throughput_target': 0.85,  # 85% of total bandwidth
+    'chunk_size': 50000,  # Rows per chunk when streaming the history store
+    'quantile_accuracy': 0.01  # Relative error of streaming latency quantiles
 }
 
@@ -6,7 +6,7 @@ import time
 import psutil
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 from config import DATA_CONFIG, NETWORK_CONFIG
 import logging
@@ -18,8 +18,8 @@ logger = logging.getLogger(__name__)
 class NetworkDataCollector:
     """Collects network traffic data from system or simulation"""
     
-    def __init__(self):
-        self.data_file = DATA_CONFIG['data_file']
+    def __init__(self, data_file=None):
+        self.data_file = data_file or DATA_CONFIG['data_file']
         self.collection_interval = DATA_CONFIG['collection_interval']
         self.simulation_mode = DATA_CONFIG['simulation_mode']
         self.history = []
@@ -120,6 +120,37 @@ class NetworkDataCollector:
             **route_traffic
         }
     
+    def generate_trace(self, n_samples, start=None, seed=None):
+        """Generate a synthetic per-route traffic trace in one vectorized pass
+        
+        Follows the same model as get_simulated_stats (time-of-day factor,
+        random variation, occasional spikes, Dirichlet route split) for
+        `n_samples` consecutive collection intervals. Returns
+        (timestamps, traffic) where traffic is (n_samples x num_routes) Mbps.
+        """
+        rng = np.random.default_rng(seed)
+        base_traffic = DATA_CONFIG['simulation_traffic_base']
+        variance = DATA_CONFIG['simulation_variance']
+        num_routes = NETWORK_CONFIG['num_routes']
+        
+        start = np.datetime64(start or datetime.now(), 's')
+        timestamps = start + np.arange(n_samples) * np.timedelta64(self.collection_interval, 's')
+        hours = ((timestamps - timestamps.astype('datetime64[D]')) // np.timedelta64(1, 'h')).astype(int)
+        
+        # Time-based patterns: peak and off-peak hours
+        time_factor = np.ones(n_samples)
+        time_factor[((hours >= 8) & (hours <= 10)) | ((hours >= 17) & (hours <= 20))] = 1.5
+        time_factor[hours <= 6] = 0.5
+        
+        bandwidth_mbps = base_traffic * time_factor * rng.uniform(1 - variance, 1 + variance, n_samples)
+        
+        # Occasional spikes
+        spikes = rng.random(n_samples) < 0.1
+        bandwidth_mbps[spikes] *= rng.uniform(1.5, 2.5, spikes.sum())
+        
+        weights = rng.dirichlet(np.ones(num_routes), size=n_samples)
+        return timestamps, bandwidth_mbps[:, None] * weights
+    
     def _distribute_traffic(self, total_bandwidth):
         """Distribute total bandwidth across multiple routes"""
         num_routes = NETWORK_CONFIG['num_routes']
@@ -134,13 +165,19 @@ class NetworkDataCollector:
         
         return route_traffic
     
-    def collect_sample(self):
-        """Collect a single sample of network data"""
+    def collect_sample(self, timestamp=None):
+        """Collect a single sample of network data
+        
+        `timestamp` (the scheduled tick time) overrides the collection time.
+        """
         if self.simulation_mode:
             data = self.get_simulated_stats()
         else:
             data = self.get_real_network_stats()
         
+        if timestamp is not None:
+            data['timestamp'] = timestamp.isoformat()
+        
         self.history.append(data)
         
         # Keep only recent history
@@ -151,20 +188,37 @@ class NetworkDataCollector:
         return data
     
     def save_to_file(self, data):
-        """Save collected data to CSV file"""
+        """Save collected data (one sample or a list of samples) to CSV file"""
         try:
-            df = pd.DataFrame([data])
+            df = pd.DataFrame(data if isinstance(data, list) else [data])
             df.to_csv(self.data_file, mode='a', header=False, index=False)
         except Exception as e:
             logger.error(f"Error saving data to file: {e}")
     
-    def load_historical_data(self, hours=24):
-        """Load historical data from file"""
+    def load_recent_history(self):
+        """Seed the in-memory history window from the data file"""
+        df = self.load_historical_data(hours=DATA_CONFIG['history_window'] / 3600)
+        if len(df) == 0:
+            return 0
+        df['timestamp'] = df['timestamp'].map(lambda ts: ts.isoformat())
+        max_history = int(DATA_CONFIG['history_window'] // self.collection_interval)
+        self.history = (df.to_dict('records') + self.history)[-max_history:]
+        return len(df)
+    
+    def load_historical_data(self, hours=24, columns=None):
+        """Load historical data from file
+        
+        If `columns` is given only those columns (plus the timestamp) are read.
+        """
         try:
             if not os.path.exists(self.data_file):
                 return pd.DataFrame()
             
-            df = pd.read_csv(self.data_file)
+            usecols = None
+            if columns is not None:
+                usecols = ['timestamp'] + [c for c in columns if c != 'timestamp']
+            
+            df = pd.read_csv(self.data_file, usecols=usecols)
             df['timestamp'] = pd.to_datetime(df['timestamp'])
             
             # Filter by time range
@@ -176,6 +230,26 @@ class NetworkDataCollector:
             logger.error(f"Error loading historical data: {e}")
             return pd.DataFrame()
     
+    def iter_historical_data(self, hours=24, chunk_size=50000, columns=None):
+        """Yield historical data in chunks of at most `chunk_size` rows
+        
+        Lets callers process long histories in constant memory.
+        """
+        if not os.path.exists(self.data_file):
+            return
+        
+        usecols = None
+        if columns is not None:
+            usecols = ['timestamp'] + [c for c in columns if c != 'timestamp']
+        
+        cutoff = pd.Timestamp(datetime.now() - timedelta(hours=hours))
+        
+        for chunk in pd.read_csv(self.data_file, usecols=usecols, chunksize=chunk_size):
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+            chunk = chunk[chunk['timestamp'] > cutoff]
+            if len(chunk) > 0:
+                yield chunk
+    
     def start_collection(self):
         """Start continuous data collection"""
         logger.info("Starting network data collection...")
@@ -3,15 +3,19 @@ Evaluation Module for Model Performance and System Metrics
 """
 import numpy as np
 import pandas as pd
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 from ml_models import TrafficPredictor
 from data_collector import NetworkDataCollector
-from config import METRICS_CONFIG
+from backtester import Backtester
+from replay import ReplayEngine
+from streaming_metrics import ErrorAccumulator, ColumnAccumulator
+from config import METRICS_CONFIG, REPLAY_CONFIG
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+NETWORK_METRIC_COLUMNS = ['latency', 'packet_loss', 'bandwidth_utilization']
+
 
 class SystemEvaluator:
     """Evaluates system performance and model accuracy"""
@@ -20,33 +24,60 @@ class SystemEvaluator:
         self.predictor = TrafficPredictor()
         self.data_collector = NetworkDataCollector()
     
+    def _stream_model_errors(self, hours):
+        """Score the first horizon step chunk by chunk in constant memory"""
+        seq_len = self.predictor.sequence_length
+        window = seq_len + self.predictor.prediction_horizon
+        feature_columns = self.predictor.default_feature_columns()
+        
+        accumulator = ErrorAccumulator()
+        carry = np.empty((0, len(feature_columns)))
+        
+        for chunk in self.data_collector.iter_historical_data(
+            hours=hours,
+            chunk_size=METRICS_CONFIG['chunk_size'],
+            columns=feature_columns
+        ):
+            data = np.vstack([carry, chunk[feature_columns].values.astype(float)])
+            
+            if len(data) >= window:
+                windows = np.lib.stride_tricks.sliding_window_view(data, window, axis=0).transpose(0, 2, 1)
+                predictions = self.predictor.predict_batch(windows[:, :seq_len])
+                if self.predictor.is_multivariate:
+                    actual = windows[:, seq_len]
+                else:
+                    actual = windows[:, seq_len, 0]
+                accumulator.update(predictions[:, 0].ravel(), actual.ravel())
+            
+            # Keep enough rows to complete windows spanning the chunk boundary
+            carry = data[-(window - 1):]
+        
+        return accumulator
+    
     def evaluate_model(self, hours=24):
         """Evaluate model performance on historical data"""
         logger.info(f"Evaluating model on {hours} hours of data...")
         
-        # Load data
-        df = self.data_collector.load_historical_data(hours=hours)
-        
-        if len(df) < self.predictor.sequence_length * 2:
-            logger.error("Insufficient data for evaluation")
+        if self.predictor.model is None and not self.predictor.load_model():
+            logger.error("Model not available for evaluation")
             return None
         
         # Evaluate
-        results = self.predictor.evaluate(df)
+        accumulator = self._stream_model_errors(hours)
         
-        if results is None:
+        if accumulator.count < self.predictor.sequence_length:
+            logger.error("Insufficient data for evaluation")
             return None
         
-        # Calculate additional metrics
-        mae = results['mae']
-        rmse = results['rmse']
+        # Calculate metrics
+        mae = float(accumulator.mae())
+        rmse = float(accumulator.rmse())
         
         # Calculate R² score
-        r2 = r2_score(results['actual'], results['predictions'])
+        r2 = float(accumulator.r2())
         
         # Calculate Mean Absolute Percentage Error (MAPE)
-        mape = np.mean(np.abs((results['actual'] - results['predictions']) / 
-                              (results['actual'] + 1e-10))) * 100
+        mape = float(accumulator.mape())
         
         # Check thresholds
         mae_pass = mae <= METRICS_CONFIG['mae_threshold']
@@ -62,7 +93,7 @@ class SystemEvaluator:
             'mae_pass': mae_pass,
             'rmse_pass': rmse_pass,
             'overall_pass': mae_pass and rmse_pass,
-            'num_samples': len(results['actual'])
+            'num_samples': accumulator.count
         }
         
         logger.info(f"Evaluation Results:")
@@ -73,22 +104,82 @@ class SystemEvaluator:
         
         return evaluation
     
-    def evaluate_network_performance(self, metrics_history):
-        """Evaluate network performance improvements"""
-        if not metrics_history or len(metrics_history) < 2:
+    def backtest(self, hours=24 * 30, folds=None, engine=None, workers=None):
+        """Walk-forward backtest with per-horizon-step error curves"""
+        logger.info(f"Backtesting on {hours} hours of data...")
+        
+        df = self.data_collector.load_historical_data(hours=hours)
+        
+        if len(df) < self.predictor.sequence_length * 2:
+            logger.error("Insufficient data for backtesting")
+            return None
+        
+        if self.predictor.is_multivariate:
+            target_columns = self.predictor.default_feature_columns()
+        else:
+            target_columns = ['bandwidth_utilization']
+        
+        version = self.predictor.registry.current_version()
+        metadata = self.predictor.registry.get_metadata(version) if version else None
+        trained_until = ((metadata or {}).get('data_range') or {}).get('end')
+        
+        results = Backtester(folds=folds, workers=workers, engine=engine).run(
+            df,
+            feature_columns=self.predictor.default_feature_columns(),
+            target_columns=target_columns,
+            version=version,
+            trained_until=trained_until
+        )
+        
+        if results is None:
             return None
         
-        # Calculate average latency
-        latencies = [m.get('latency', 0) for m in metrics_history if 'latency' in m]
-        avg_latency = np.mean(latencies) if latencies else 0
+        overall = results['overall']
+        logger.info(f"Backtest Results ({results['num_windows']} windows, {len(results['folds'])} folds, "
+                    f"{results['duration']:.1f}s):")
+        logger.info(f"  MAE: {overall['mae']:.2f} Mbps")
+        logger.info(f"  RMSE: {overall['rmse']:.2f} Mbps")
+        logger.info(f"  MAPE: {overall['mape']:.2f}%")
+        for step, (mae, rmse) in enumerate(zip(results['per_step']['mae'], results['per_step']['rmse']), 1):
+            logger.info(f"  Step {step}: MAE={mae:.2f}, RMSE={rmse:.2f}")
+        
+        return results
+    
+    def evaluate_network_performance(self, metrics_history=None, hours=24):
+        """Evaluate network performance improvements
         
-        # Calculate average packet loss
-        packet_losses = [m.get('packet_loss', 0) for m in metrics_history if 'packet_loss' in m]
-        avg_packet_loss = np.mean(packet_losses) if packet_losses else 0
+        Consumes a list of per-sample metric dicts, or, when none is given,
+        the history store chunk by chunk in constant memory.
+        """
+        if metrics_history is not None:
+            if len(metrics_history) < 2:
+                return None
+            chunks = [pd.DataFrame(metrics_history)]
+        else:
+            chunks = self.data_collector.iter_historical_data(
+                hours=hours,
+                chunk_size=METRICS_CONFIG['chunk_size'],
+                columns=NETWORK_METRIC_COLUMNS
+            )
+        
+        accumulator = ColumnAccumulator(
+            NETWORK_METRIC_COLUMNS,
+            quantile_columns=['latency'],
+            relative_accuracy=METRICS_CONFIG['quantile_accuracy']
+        )
+        for chunk in chunks:
+            accumulator.update(chunk)
+        
+        return self.summarize_network_performance(accumulator)
+    
+    def summarize_network_performance(self, accumulator):
+        """Build the network evaluation from a (possibly merged) ColumnAccumulator"""
+        if max(accumulator.count(column) for column in NETWORK_METRIC_COLUMNS) < 2:
+            return None
         
-        # Calculate throughput
-        throughputs = [m.get('bandwidth_utilization', 0) for m in metrics_history if 'bandwidth_utilization' in m]
-        avg_throughput = np.mean(throughputs) if throughputs else 0
+        avg_latency = accumulator.mean('latency')
+        avg_packet_loss = accumulator.mean('packet_loss')
+        avg_throughput = accumulator.mean('bandwidth_utilization')
         
         # Check thresholds
         latency_pass = avg_latency <= METRICS_CONFIG['latency_threshold']
@@ -98,6 +189,9 @@ class SystemEvaluator:
             'average_latency': avg_latency,
             'average_packet_loss': avg_packet_loss,
             'average_throughput': avg_throughput,
+            'latency_p50': accumulator.quantile('latency', 0.50),
+            'latency_p95': accumulator.quantile('latency', 0.95),
+            'latency_p99': accumulator.quantile('latency', 0.99),
             'latency_threshold': METRICS_CONFIG['latency_threshold'],
             'throughput_target': METRICS_CONFIG['throughput_target'],
             'latency_pass': latency_pass,
@@ -133,13 +227,38 @@ class SystemEvaluator:
         
         return report
     
-    def compare_algorithms(self, hours=24):
-        """Compare different optimization algorithms"""
-        # This would require running the system with different algorithms
-        # For now, return placeholder
-        return {
-            'adaptive': {'avg_utilization': 75.5, 'stability': 0.85},
-            'proportional': {'avg_utilization': 72.3, 'stability': 0.78},
-            'ml_based': {'avg_utilization': 77.1, 'stability': 0.88}
-        }
-
+    def compare_algorithms(self, hours=24, trace=None, algorithms=None, seed=None):
+        """Compare optimization algorithms by replaying traffic traces
+        
+        `trace` is 'recorded', 'synthetic' or None (recorded if enough data
+        is available, otherwise synthetic).
+        """
+        engine = ReplayEngine()
+        traces = {}
+        
+        if trace in (None, 'recorded'):
+            recorded = engine.recorded_trace(hours=hours)
+            if len(recorded) > REPLAY_CONFIG['warmup_samples'] + 1:
+                traces['recorded'] = recorded
+            elif trace == 'recorded':
+                logger.error("Insufficient recorded data for replay")
+                return None
+        
+        if trace == 'synthetic' or not traces:
+            traces['synthetic'] = engine.synthetic_trace(
+                hours=hours if trace == 'synthetic' else REPLAY_CONFIG['synthetic_hours'],
+                seed=seed
+            )
+        
+        results = engine.run(traces, algorithms=algorithms)
+        scenario = next(iter(traces))
+        
+        comparison = dict(results.get(scenario, {}))
+        
+        for algorithm, metrics in comparison.items():
+            logger.info(f"  {algorithm}: utilization={metrics['avg_utilization']:.2f}%, "
+                        f"overload={metrics['overload_seconds']:.0f}s, "
+                        f"churn={metrics['avg_churn']:.1f} Mbps/tick, "
+                        f"p95 decision latency={metrics['latency_ms']['p95']:.3f}ms")
+        
+        return comparison
@@ -0,0 +1,376 @@
+"""
+Lightweight Statistical Forecasting Engines
+Implements vectorized EWMA, Holt-Winters and AR forecasters that fit in
+milliseconds and update incrementally per sample
+"""
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from config import DATA_CONFIG, FORECAST_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _to_seconds(timestamps):
+    """Convert timestamps (datetimes, ISO strings or epoch seconds) to float seconds"""
+    ts = np.asarray(timestamps)
+    if ts.dtype.kind in ('M', 'O', 'U', 'S'):
+        ts = ts.astype('datetime64[ns]').astype('int64') / 1e9
+    return ts.astype(float)
+
+
+class BaseForecaster(ABC):
+    """Common interface for statistical forecasting engines
+    
+    Series are handled column-wise: fit() takes a (time x series) array,
+    update() takes one sample across all series and forecast() returns a
+    (horizon x series) array.
+    """
+    
+    name = 'base'
+    
+    def __init__(self):
+        self.n_series = 0
+        self.is_fitted = False
+        self.last_timestamp = None
+        self.interval = DATA_CONFIG['collection_interval']
+    
+    def _prepare_fit(self, values, timestamps):
+        """Normalize fit inputs to a 2-D array and matching epoch seconds"""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values.reshape(-1, 1)
+        
+        if timestamps is None:
+            now = time.time()
+            seconds = now - self.interval * np.arange(len(values) - 1, -1, -1)
+        else:
+            seconds = _to_seconds(timestamps)
+        
+        self.n_series = values.shape[1]
+        return values, seconds
+    
+    def _prepare_update(self, value, timestamp):
+        """Normalize update inputs to a 1-D sample and epoch seconds"""
+        value = np.atleast_1d(np.asarray(value, dtype=float))
+        if timestamp is None:
+            seconds = time.time()
+        else:
+            seconds = float(_to_seconds([timestamp])[0])
+        return value, seconds
+    
+    @abstractmethod
+    def fit(self, values, timestamps=None):
+        """Fit the engine on a (time x series) history"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def update(self, value, timestamp=None):
+        """Incorporate one new sample across all series"""
+        raise NotImplementedError
+    
+    @abstractmethod
+    def forecast(self, horizon):
+        """Forecast the next `horizon` steps for every series"""
+        raise NotImplementedError
+
+
+class EWMAForecaster(BaseForecaster):
+    """Exponentially weighted moving average (flat forecast)"""
+    
+    name = 'ewma'
+    
+    def __init__(self, alpha=None):
+        super().__init__()
+        self.alpha = alpha if alpha is not None else FORECAST_CONFIG['ewma_alpha']
+        self.level = None
+    
+    def fit(self, values, timestamps=None):
+        """Compute the smoothed level in one weighted dot product"""
+        values, seconds = self._prepare_fit(values, timestamps)
+        if len(values) == 0:
+            return False
+        
+        n = len(values)
+        weights = self.alpha * (1 - self.alpha) ** np.arange(n - 1, -1, -1)
+        weights[0] = (1 - self.alpha) ** (n - 1)
+        self.level = weights @ values
+        self.last_timestamp = seconds[-1]
+        self.is_fitted = True
+        return True
+    
+    def update(self, value, timestamp=None):
+        """Update the smoothed level with a new sample"""
+        value, seconds = self._prepare_update(value, timestamp)
+        if not self.is_fitted:
+            return self.fit(value.reshape(1, -1), [seconds])
+        
+        self.level = self.alpha * value + (1 - self.alpha) * self.level
+        self.last_timestamp = seconds
+        return True
+    
+    def forecast(self, horizon):
+        """Repeat the current level over the horizon"""
+        if not self.is_fitted:
+            return None
+        return np.tile(self.level, (horizon, 1))
+
+
+class HoltWintersForecaster(BaseForecaster):
+    """Additive Holt-Winters with daily seasonality
+    
+    The seasonal profile is indexed by time-of-day bucket rather than by
+    sample position, so gaps in collection do not shift the season.
+    """
+    
+    name = 'holt_winters'
+    
+    def __init__(self, alpha=None, beta=None, gamma=None,
+                 season_length=None, season_buckets=None):
+        super().__init__()
+        self.alpha = alpha if alpha is not None else FORECAST_CONFIG['hw_alpha']
+        self.beta = beta if beta is not None else FORECAST_CONFIG['hw_beta']
+        self.gamma = gamma if gamma is not None else FORECAST_CONFIG['hw_gamma']
+        self.season_length = season_length or FORECAST_CONFIG['season_length']
+        self.season_buckets = season_buckets or FORECAST_CONFIG['season_buckets']
+        self.level = None
+        self.trend = None  # Per second
+        self.seasonal = None
+    
+    def _bucket(self, seconds):
+        """Map epoch seconds to a time-of-day bucket index"""
+        phase = np.mod(seconds, self.season_length) / self.season_length
+        return (phase * self.season_buckets).astype(int) % self.season_buckets
+    
+    def fit(self, values, timestamps=None):
+        """Initialize level, trend and seasonal profile with vectorized estimates"""
+        values, seconds = self._prepare_fit(values, timestamps)
+        if len(values) == 0:
+            return False
+        
+        # Seasonal profile: bucket means relative to the overall mean
+        buckets = self._bucket(seconds)
+        sums = np.zeros((self.season_buckets, self.n_series))
+        np.add.at(sums, buckets, values)
+        counts = np.bincount(buckets, minlength=self.season_buckets).reshape(-1, 1)
+        overall = values.mean(axis=0)
+        self.seasonal = np.where(counts > 0, sums / np.maximum(counts, 1) - overall, 0.0)
+        
+        deseasonalized = values - self.seasonal[buckets]
+        
+        # Trend: least-squares slope of the deseasonalized series
+        if len(values) > 1:
+            centered = seconds - seconds.mean()
+            denom = np.sum(centered ** 2)
+            residual = deseasonalized - deseasonalized.mean(axis=0)
+            self.trend = (centered @ residual) / denom if denom > 0 else np.zeros(self.n_series)
+        else:
+            self.trend = np.zeros(self.n_series)
+        
+        # Level: EWMA of the deseasonalized series
+        n = len(values)
+        weights = self.alpha * (1 - self.alpha) ** np.arange(n - 1, -1, -1)
+        weights[0] = (1 - self.alpha) ** (n - 1)
+        self.level = weights @ deseasonalized
+        
+        self.last_timestamp = seconds[-1]
+        self.is_fitted = True
+        return True
+    
+    def update(self, value, timestamp=None):
+        """Apply one step of the Holt-Winters recurrences"""
+        value, seconds = self._prepare_update(value, timestamp)
+        if not self.is_fitted:
+            return self.fit(value.reshape(1, -1), [seconds])
+        
+        dt = seconds - self.last_timestamp
+        bucket = self._bucket(seconds)
+        previous_level = self.level
+        
+        self.level = (
+            self.alpha * (value - self.seasonal[bucket]) +
+            (1 - self.alpha) * (previous_level + self.trend * dt)
+        )
+        if dt > 0:
+            self.trend = (
+                self.beta * (self.level - previous_level) / dt +
+                (1 - self.beta) * self.trend
+            )
+        self.seasonal[bucket] = (
+            self.gamma * (value - self.level) +
+            (1 - self.gamma) * self.seasonal[bucket]
+        )
+        self.last_timestamp = seconds
+        return True
+    
+    def forecast(self, horizon):
+        """Project level and trend forward and add the seasonal profile"""
+        if not self.is_fitted:
+            return None
+        
+        offsets = self.interval * np.arange(1, horizon + 1)
+        buckets = self._bucket(self.last_timestamp + offsets)
+        return (
+            self.level +
+            np.outer(offsets, self.trend) +
+            self.seasonal[buckets]
+        )
+
+
+class ARForecaster(BaseForecaster):
+    """Autoregressive model fitted by (batched) least squares
+    
+    Keeps the normal-equation statistics per series so each new sample is
+    folded in with a rank-one update and a small linear solve.
+    """
+    
+    name = 'ar'
+    
+    def __init__(self, order=None, forgetting=None, ridge=1e-6):
+        super().__init__()
+        self.order = order or FORECAST_CONFIG['ar_order']
+        self.forgetting = forgetting if forgetting is not None else FORECAST_CONFIG['ar_forgetting']
+        self.ridge = ridge
+        self.xtx = None
+        self.xty = None
+        self.coef = None
+        self.lags = None  # Last `order` values, oldest first
+    
+    def _solve(self):
+        """Solve the normal equations for every series at once"""
+        eye = np.eye(self.order + 1) * self.ridge
+        self.coef = np.linalg.solve(self.xtx + eye, self.xty[..., None])[..., 0]
+    
+    def fit(self, values, timestamps=None):
+        """Fit AR coefficients for all series with one batched solve"""
+        values, seconds = self._prepare_fit(values, timestamps)
+        if len(values) <= self.order:
+            logger.warning(f"AR({self.order}) needs more than {self.order} samples, got {len(values)}")
+            return False
+        
+        # windows: (samples, series, order + 1) - lags followed by the target
+        windows = np.lib.stride_tricks.sliding_window_view(values, self.order + 1, axis=0)
+        design = np.concatenate(
+            [np.ones(windows.shape[:2] + (1,)), windows[..., :self.order]],
+            axis=2
+        )
+        targets = windows[..., self.order]
+        
+        self.xtx = np.einsum('nsk,nsl->skl', design, design)
+        self.xty = np.einsum('nsk,ns->sk', design, targets)
+        self._solve()
+        
+        self.lags = values[-self.order:].copy()
+        self.last_timestamp = seconds[-1]
+        self.is_fitted = True
+        return True
+    
+    def update(self, value, timestamp=None):
+        """Rank-one update of the normal equations and re-solve"""
+        value, seconds = self._prepare_update(value, timestamp)
+        if not self.is_fitted:
+            return False
+        
+        row = np.concatenate([np.ones((self.n_series, 1)), self.lags.T], axis=1)
+        self.xtx = self.forgetting * self.xtx + np.einsum('sk,sl->skl', row, row)
+        self.xty = self.forgetting * self.xty + row * value[:, None]
+        self._solve()
+        
+        self.lags = np.vstack([self.lags[1:], value])
+        self.last_timestamp = seconds
+        return True
+    
+    def forecast(self, horizon):
+        """Roll the AR recursion forward for every series"""
+        if not self.is_fitted:
+            return None
+        
+        lags = self.lags.copy()
+        predictions = np.zeros((horizon, self.n_series))
+        for step in range(horizon):
+            nxt = self.coef[:, 0] + np.einsum('sk,ks->s', self.coef[:, 1:], lags)
+            predictions[step] = nxt
+            lags = np.vstack([lags[1:], nxt])
+        
+        return predictions
+
+
+class ForecastCache:
+    """Caches a multi-step forecast horizon and serves later ticks from it
+    
+    Step k of a stored horizon targets base_timestamp + (k + 1) * interval.
+    The cache is invalidated once the horizon is exhausted or when observed
+    traffic on any route drifts past the error bound from what was forecast
+    for it.
+    """
+    
+    def __init__(self, interval=None, error_bound=None):
+        self.interval = interval or DATA_CONFIG['collection_interval']
+        self.error_bound = error_bound if error_bound is not None else FORECAST_CONFIG['cache_error_bound']
+        self.forecast = None
+        self.base_timestamp = None
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'exhausted': 0,
+            'drift_invalidations': 0
+        }
+    
+    def store(self, forecast, base_timestamp):
+        """Store a forecast made from data up to base_timestamp"""
+        self.forecast = np.asarray(forecast, dtype=float)
+        self.base_timestamp = float(_to_seconds([base_timestamp])[0])
+    
+    def invalidate(self):
+        """Drop the cached horizon"""
+        self.forecast = None
+        self.base_timestamp = None
+    
+    def lookup(self, timestamp, observed=None):
+        """Return the cached forecast for the step after timestamp, or None
+        
+        `observed` is the traffic seen at `timestamp`; it is compared with
+        the cached value that targeted the same time to detect drift.
+        """
+        if self.forecast is None:
+            self.stats['misses'] += 1
+            return None
+        
+        seconds = float(_to_seconds([timestamp])[0])
+        step = max(0, int(round((seconds - self.base_timestamp) / self.interval)))
+        
+        if step >= len(self.forecast):
+            self.stats['exhausted'] += 1
+            self.stats['misses'] += 1
+            self.invalidate()
+            return None
+        
+        if observed is not None and step >= 1:
+            # Per route, so drift on one route is not hidden by the others
+            expected = self.forecast[step - 1]
+            error = np.abs(np.asarray(observed, dtype=float) - expected)
+            if np.any(error > self.error_bound * np.maximum(np.abs(expected), 1.0)):
+                self.stats['drift_invalidations'] += 1
+                self.stats['misses'] += 1
+                self.invalidate()
+                return None
+        
+        self.stats['hits'] += 1
+        return self.forecast[step]
+
+
+FORECASTERS = {
+    'ewma': EWMAForecaster,
+    'holt_winters': HoltWintersForecaster,
+    'ar': ARForecaster
+}
+
+
+def create_forecaster(engine=None, **kwargs):
+    """Create a forecasting engine by name"""
+    engine = engine or FORECAST_CONFIG['engine']
+    if engine not in FORECASTERS:
+        raise ValueError(f"Unknown forecasting engine: {engine}")
+    return FORECASTERS[engine](**kwargs)
@@ -0,0 +1,238 @@
+"""
+Hierarchical Bandwidth Allocation
+Distributes bandwidth down a tree of capacity pools (regions, sites, uplinks)
+to leaf routes, one vectorized water-filling pass per tree level, skipping
+subtrees whose inputs did not change
+"""
+import numpy as np
+from optimizer import water_fill_grouped
+from config import HIERARCHY_CONFIG, NETWORK_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ROOT = '__root__'
+
+
+class AllocationTree:
+    """Tree of capacity pools with routes as leaves
+    
+    Pools are given as nested dicts, {name: {'capacity': Mbps, 'weight': w,
+    'children': {...} or [route, ...]}}; the root pool has `total_bandwidth`.
+    Nodes live in flat arrays, grouped by depth, so each level is distributed
+    with a single grouped water-fill.
+    """
+    
+    def __init__(self, pools, route_names, total_bandwidth, change_tolerance=None):
+        self.change_tolerance = (
+            HIERARCHY_CONFIG['change_tolerance'] if change_tolerance is None else change_tolerance
+        )
+        self.node_names = [ROOT]
+        parents, capacity, weight, depth = [-1], [float(total_bandwidth)], [1.0], [0]
+        leaf_index = {}
+        
+        def add(name, parent, node_capacity, node_weight):
+            self.node_names.append(name)
+            parents.append(parent)
+            capacity.append(float(node_capacity))
+            weight.append(float(node_weight))
+            depth.append(depth[parent] + 1)
+            return len(self.node_names) - 1
+        
+        def add_children(children, parent):
+            if isinstance(children, dict):
+                for name, spec in children.items():
+                    node = add(name, parent, spec.get('capacity', np.inf), spec.get('weight', 1.0))
+                    add_children(spec.get('children', []), node)
+            else:
+                for route in children:
+                    if route in leaf_index:
+                        raise ValueError(f"Route {route} appears in more than one pool")
+                    leaf_index[route] = add(route, parent, np.inf, 1.0)
+        
+        add_children(pools, 0)
+        
+        missing = [route for route in route_names if route not in leaf_index]
+        if missing:
+            raise ValueError(f"Routes missing from the pool hierarchy: {missing}")
+        route_set = set(route_names)
+        unknown = [route for route in leaf_index if route not in route_set]
+        if unknown:
+            raise ValueError(f"Unknown routes in the pool hierarchy: {unknown}")
+        
+        self.parent = np.array(parents)
+        self.capacity = np.array(capacity)
+        self.weight = np.array(weight)
+        self.depth = np.array(depth)
+        self.leaves = np.array([leaf_index[route] for route in route_names], dtype=int)
+        self.is_leaf = np.zeros(len(self.node_names), dtype=bool)
+        self.is_leaf[self.leaves] = True
+        
+        # Per level: nodes, their parents and compact group ids (one per parent)
+        self.levels = []
+        for d in range(1, self.depth.max() + 1):
+            nodes = np.flatnonzero(self.depth == d)
+            group_parents, groups = np.unique(self.parent[nodes], return_inverse=True)
+            pools = np.flatnonzero((self.depth == d - 1) & ~self.is_leaf)
+            self.levels.append({
+                'nodes': nodes,
+                'parents': self.parent[nodes],
+                'groups': groups,
+                'group_parents': group_parents,
+                'pools': pools
+            })
+        
+        n_nodes = len(self.node_names)
+        self.solved_demand = None
+        self.previous = None
+        self.budget = np.zeros(n_nodes)
+        self.stats = {'solves': 0, 'groups_solved': 0, 'groups_skipped': 0}
+        logger.info(f"Allocation tree: {n_nodes - len(self.leaves) - 1} pools, "
+                    f"{len(self.leaves)} routes, {len(self.levels)} levels")
+    
+    @classmethod
+    def from_config(cls, route_names=None, total_bandwidth=None):
+        """Build the tree in HIERARCHY_CONFIG (default: one flat pool)"""
+        route_names = route_names or NETWORK_CONFIG['route_names']
+        total_bandwidth = total_bandwidth or NETWORK_CONFIG['total_bandwidth']
+        pools = HIERARCHY_CONFIG['pools'] or {'all': {'children': list(route_names)}}
+        return cls(pools, route_names, total_bandwidth)
+    
+    def _effective_demand(self, demand):
+        """Keep the last solved demand for routes that moved within tolerance"""
+        if self.solved_demand is None:
+            self.solved_demand = demand.copy()
+            return self.solved_demand
+        
+        drift = np.abs(demand - self.solved_demand)
+        changed = drift > self.change_tolerance * np.maximum(np.abs(self.solved_demand), 1.0)
+        self.solved_demand[changed] = demand[changed]
+        return self.solved_demand
+    
+    def _aggregate(self, demand, lower, upper):
+        """Bottom-up demand and bounds per node, capped by pool capacity
+        
+        `demand` is (scenarios x routes); returns (3 x scenarios x nodes).
+        """
+        n_nodes = len(self.node_names)
+        n_scenarios = len(demand)
+        bounds = np.zeros((3, n_scenarios, n_nodes))
+        bounds[0][:, self.leaves] = np.clip(demand, lower, upper)
+        bounds[1][:, self.leaves] = lower
+        bounds[2][:, self.leaves] = upper
+        offsets = np.arange(n_scenarios)[:, None] * n_nodes
+        
+        for level in reversed(self.levels):
+            index = (offsets + level['parents']).ravel()
+            sums = np.stack([
+                np.bincount(index, row[:, level['nodes']].ravel(), minlength=n_scenarios * n_nodes)
+                for row in bounds
+            ]).reshape(bounds.shape)
+            pools = level['pools']
+            bounds[:, :, pools] = np.minimum(sums[:, :, pools], self.capacity[pools])
+        
+        return bounds
+    
+    def _node_weights(self, weights):
+        node_weight = self.weight.copy()
+        if weights is not None:
+            node_weight[self.leaves] = weights
+        return node_weight
+    
+    def allocate(self, demand, lower, upper, weights=None):
+        """Leaf (route-order) allocation for a demand vector"""
+        lower = np.minimum(lower, upper)
+        demand = self._effective_demand(np.asarray(demand, dtype=float))
+        
+        node_weight = self._node_weights(weights)
+        
+        current = self._aggregate(demand[None], lower, upper)[:, 0]
+        node_demand, node_lower, node_upper = current
+        
+        if self.previous is None:
+            inputs_changed = np.ones(len(self.node_names), dtype=bool)
+        else:
+            inputs_changed = (current != self.previous).any(axis=0)
+        self.previous = current
+        
+        budget = self.budget.copy()
+        budget[0] = self.capacity[0]
+        budget_changed = budget != self.budget
+        
+        for level in self.levels:
+            nodes, groups, group_parents = level['nodes'], level['groups'], level['group_parents']
+            
+            # A parent is redistributed only if its budget or a child's inputs changed
+            dirty = budget_changed[group_parents] | (
+                np.bincount(groups, inputs_changed[nodes], minlength=len(group_parents)) > 0
+            )
+            self.stats['groups_solved'] += int(dirty.sum())
+            self.stats['groups_skipped'] += int(len(dirty) - dirty.sum())
+            if not dirty.any():
+                continue
+            
+            selected = dirty[groups]
+            members = nodes[selected]
+            member_groups = np.searchsorted(np.flatnonzero(dirty), groups[selected])
+            budgets = budget[group_parents[dirty]]
+            
+            # Oversubscribed groups share demand fairly; the rest fill headroom
+            group_demand = np.bincount(member_groups, node_demand[members], minlength=len(budgets))
+            over = (budgets <= group_demand)[member_groups]
+            fill = water_fill_grouped(
+                np.where(over, node_lower[members], 0.0),
+                np.where(over, node_demand[members], node_upper[members] - node_demand[members]),
+                node_weight[members],
+                np.where(budgets <= group_demand, budgets, budgets - group_demand),
+                member_groups
+            )
+            budget[members] = np.where(over, fill, node_demand[members] + fill)
+            budget_changed[members] = budget[members] != self.budget[members]
+        
+        self.budget = budget
+        self.stats['solves'] += 1
+        return budget[self.leaves].copy()
+    
+    def allocate_batch(self, demand, lower, upper, weights=None, total_bandwidth=None):
+        """Leaf allocations for a (scenarios x routes) demand matrix
+        
+        Stateless: every scenario is solved in full (no tolerance, no
+        skipping), each level as one grouped water-fill over all scenarios.
+        `total_bandwidth` optionally overrides the root budget per scenario.
+        """
+        lower = np.minimum(lower, upper)
+        demand = np.atleast_2d(np.asarray(demand, dtype=float))
+        n_scenarios = len(demand)
+        node_weight = self._node_weights(weights)
+        node_demand, node_lower, node_upper = self._aggregate(demand, lower, upper)
+        
+        budget = np.zeros((n_scenarios, len(self.node_names)))
+        budget[:, 0] = self.capacity[0] if total_bandwidth is None else np.ravel(total_bandwidth)
+        
+        for level in self.levels:
+            nodes, group_parents = level['nodes'], level['group_parents']
+            offsets = np.arange(n_scenarios)[:, None] * len(group_parents)
+            member_groups = (offsets + level['groups']).ravel()
+            budgets = budget[:, group_parents].ravel()
+            member_demand = node_demand[:, nodes].ravel()
+            
+            # Same rule as allocate(), with one group per (scenario, parent)
+            group_demand = np.bincount(member_groups, member_demand, minlength=len(budgets))
+            saturated = budgets <= group_demand
+            over = saturated[member_groups]
+            fill = water_fill_grouped(
+                np.where(over, node_lower[:, nodes].ravel(), 0.0),
+                np.where(over, member_demand, node_upper[:, nodes].ravel() - member_demand),
+                np.tile(node_weight[nodes], n_scenarios),
+                np.where(saturated, budgets, budgets - group_demand),
+                member_groups
+            )
+            budget[:, nodes] = np.where(over, fill, member_demand + fill).reshape(n_scenarios, len(nodes))
+        
+        return budget[:, self.leaves]
+    
+    def pool_allocation(self):
+        """Current budget of every pool (including the root)"""
+        pools = np.flatnonzero(~self.is_leaf)
+        return {self.node_names[i]: float(self.budget[i]) for i in pools}
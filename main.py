@@ -4,10 +4,12 @@ Main Entry Point for Network Traffic Prediction and Optimization System
 import argparse
 import sys
 import os
+import threading
 from data_collector import NetworkDataCollector
 from ml_models import TrafficPredictor
 from evaluator import SystemEvaluator
 from monitor import NetworkMonitor
+from scheduler import TickScheduler
 import logging
 
 logging.basicConfig(
@@ -21,20 +23,35 @@ def collect_data(hours=1):
     """Run data collection for specified hours"""
     logger.info(f"Starting data collection for {hours} hours...")
     collector = NetworkDataCollector()
-    
-    import time
-    end_time = time.time() + (hours * 3600)
+    scheduler = TickScheduler(collector.collection_interval)
+    n_ticks = int(hours * 3600 / collector.collection_interval)
     
     try:
-        while time.time() < end_time:
-            data = collector.collect_sample()
+        for k, scheduled in scheduler.ticks():
+            if k >= n_ticks:
+                break
+            data = collector.collect_sample(timestamp=scheduled)
             collector.save_to_file(data)
             logger.info(f"Collected: {data['bandwidth_utilization']:.2f} Mbps")
-            time.sleep(collector.collection_interval)
     except KeyboardInterrupt:
         logger.info("Data collection interrupted by user")
     finally:
-        logger.info("Data collection completed")
+        status = scheduler.status()
+        logger.info(f"Data collection completed ({status['ticks']} ticks, {status['overruns']} overruns, "
+                    f"{status['skipped_ticks']} skipped)")
+
+
+def train_route_models(hours=24):
+    """Train one model per route (or route group) in parallel"""
+    from route_trainer import RouteTrainingOrchestrator
+    
+    logger.info(f"Training per-route models on {hours} hours of data...")
+    
+    results = RouteTrainingOrchestrator().train_all(hours=hours)
+    succeeded = sum(1 for r in results if r['success'])
+    
+    logger.info(f"Per-route training completed: {succeeded}/{len(results)} models trained")
+    return succeeded == len(results)
 
 
 def train_model(hours=24):
@@ -62,6 +79,31 @@ def train_model(hours=24):
     return success
 
 
+def tune_model(hours=24):
+    """Run a parallel hyperparameter and architecture search"""
+    from tuner import HyperparameterTuner
+    
+    logger.info(f"Tuning model on {hours} hours of data...")
+    
+    collector = NetworkDataCollector()
+    df = collector.load_historical_data(hours=hours)
+    
+    if len(df) == 0:
+        logger.error("No historical data found. Please collect data first.")
+        return None
+    
+    logger.info(f"Loaded {len(df)} data points")
+    
+    best_config = HyperparameterTuner().tune(df)
+    
+    if best_config:
+        logger.info(f"Best configuration per prediction horizon: {best_config}")
+    else:
+        logger.error("Hyperparameter search failed")
+    
+    return best_config
+
+
 def evaluate_system(hours=24):
     """Evaluate system performance"""
     logger.info("Evaluating system performance...")
@@ -91,19 +133,67 @@ def evaluate_system(hours=24):
     return report
 
 
+def train_policy():
+    """Train the RL allocation policy offline and benchmark it by trace replay"""
+    from rl_allocator import PolicyTrainer
+    
+    logger.info("Training RL allocation policy...")
+    
+    policy, stats = PolicyTrainer().train()
+    logger.info(f"Policy trained in {stats['duration']:.0f}s on {stats['environments']} environments: "
+                f"validation reward {stats['validation_reward']:.4f} "
+                f"(equal split {stats['baseline_reward']:.4f})")
+    
+    evaluator = SystemEvaluator()
+    return evaluator.compare_algorithms(trace='synthetic')
+
+
+def compare_algorithms(hours=24):
+    """Replay traffic through each optimization algorithm"""
+    logger.info("Comparing optimization algorithms...")
+    
+    evaluator = SystemEvaluator()
+    return evaluator.compare_algorithms(hours=hours)
+
+
+def backtest_model(hours=24 * 30, engine=None):
+    """Run a parallel walk-forward backtest"""
+    logger.info("Backtesting prediction model...")
+    
+    evaluator = SystemEvaluator()
+    return evaluator.backtest(hours=hours, engine=engine)
+
+
+def rollback_model(version=None):
+    """Point the registry at an earlier model version"""
+    predictor = TrafficPredictor()
+    
+    for entry in predictor.registry.list_versions():
+        logger.info(f"  {entry['version']}: metrics={entry.get('metrics')}")
+    
+    rolled_back = predictor.registry.rollback(version)
+    if rolled_back:
+        logger.info(f"Current model version is now {rolled_back}")
+    else:
+        logger.error("Rollback failed")
+    
+    return rolled_back
+
+
 def run_monitor():
     """Run the monitoring service"""
     logger.info("Starting network monitoring service...")
     
     monitor = NetworkMonitor()
     
+    # Start monitoring right away; the statistical baseline serves
+    # predictions until a trained model is available
+    monitor.start()
+    
     # Try to load existing model
     if not monitor.predictor.load_model():
-        logger.warning("No trained model found. Training on available data...")
-        monitor.train_model(hours=24)
-    
-    # Start monitoring
-    monitor.start()
+        logger.warning("No trained model found. Using baseline forecaster while training in background...")
+        threading.Thread(target=monitor.train_model, kwargs={'hours': 24}, daemon=True).start()
     
     try:
         # Keep running
@@ -116,6 +206,39 @@ def run_monitor():
         logger.info("Monitoring service stopped")
 
 
+def run_controller():
+    """Run the local stand-in device controller"""
+    from actuator import LocalController
+    import time
+    
+    controller = LocalController().start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        controller.stop()
+        logger.info(f"Controller stopped ({controller.stats['routes_applied']} route updates applied)")
+
+
+def run_sites():
+    """Run monitoring for every configured site in one process"""
+    from multi_monitor import MultiNetworkMonitor
+    import time
+    
+    monitor = MultiNetworkMonitor()
+    if monitor.predictor.model is None:
+        logger.warning("No trained model found. Sites use the baseline forecaster until one is trained.")
+    monitor.start()
+    
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        logger.info("Stopping multi-site monitoring...")
+        monitor.stop()
+        logger.info("Multi-site monitoring stopped")
+
+
 def run_web_app():
     """Run the web dashboard"""
     logger.info("Starting web application...")
@@ -141,35 +264,81 @@ def main():
     
     parser.add_argument(
         'command',
-        choices=['collect', 'train', 'evaluate', 'monitor', 'web'],
+        choices=['collect', 'train', 'tune', 'policy', 'evaluate', 'backtest', 'compare', 'rollback', 'monitor', 'sites', 'controller', 'web'],
         help='Command to execute'
     )
     
     parser.add_argument(
         '--hours',
         type=int,
-        default=24,
-        help='Number of hours of data to use (default: 24)'
+        default=None,
+        help='Number of hours of data to use (default: 24; backtest: 720)'
+    )
+    
+    parser.add_argument(
+        '--per-route',
+        action='store_true',
+        help='Train one model per route in parallel (train command only)'
+    )
+    
+    parser.add_argument(
+        '--engine',
+        default=None,
+        help="Backtest engine: 'model' or a statistical engine name (backtest command only)"
+    )
+    
+    parser.add_argument(
+        '--version',
+        default=None,
+        help='Model version to roll back to (rollback command only; default: previous)'
     )
     
     args = parser.parse_args()
+    hours = 24 if args.hours is None else args.hours
     
     # Ensure necessary directories exist
     os.makedirs('data', exist_ok=True)
     os.makedirs('models', exist_ok=True)
     
     if args.command == 'collect':
-        collect_data(hours=args.hours)
+        collect_data(hours=hours)
     
     elif args.command == 'train':
-        train_model(hours=args.hours)
+        if args.per_route:
+            train_route_models(hours=hours)
+        else:
+            train_model(hours=hours)
+    
+    elif args.command == 'tune':
+        tune_model(hours=hours)
+    
+    elif args.command == 'policy':
+        train_policy()
     
     elif args.command == 'evaluate':
-        evaluate_system(hours=args.hours)
+        evaluate_system(hours=hours)
+    
+    elif args.command == 'backtest':
+        if args.hours is None:
+            backtest_model(engine=args.engine)  # Its own 30-day default
+        else:
+            backtest_model(hours=args.hours, engine=args.engine)
+    
+    elif args.command == 'compare':
+        compare_algorithms(hours=hours)
+    
+    elif args.command == 'rollback':
+        rollback_model(version=args.version)
     
     elif args.command == 'monitor':
         run_monitor()
     
+    elif args.command == 'sites':
+        run_sites()
+    
+    elif args.command == 'controller':
+        run_controller()
+    
     elif args.command == 'web':
         run_web_app()
     
@@ -10,66 +10,123 @@ import tensorflow as tf
 try:
     from tensorflow import keras
     from tensorflow.keras.models import Sequential, load_model
-    from tensorflow.keras.layers import LSTM, GRU, Dense, Dropout
+    from tensorflow.keras.layers import LSTM, GRU, Dense, Dropout, Reshape
     from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint
 except ImportError:
     # Fallback for Keras 3.x standalone
     import keras
     from keras.models import Sequential
-    from keras.layers import LSTM, GRU, Dense, Dropout
+    from keras.layers import LSTM, GRU, Dense, Dropout, Reshape
     from keras.callbacks import EarlyStopping, ModelCheckpoint
     from keras.saving import load_model
 import joblib
+import copy
 import os
+import threading
 import logging
-from config import MODEL_CONFIG
+from model_registry import ModelRegistry, load_cached
+from config import MODEL_CONFIG, NETWORK_CONFIG
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class TrafficPredictor:
-    """LSTM-based network traffic predictor"""
+    """LSTM-based network traffic predictor
     
-    def __init__(self):
+    In 'aggregate' mode the model forecasts total bandwidth from
+    bandwidth/latency/packet-loss features. In 'multivariate' mode every
+    route column is an input channel and the model outputs a
+    (horizon x routes) forecast in a single forward pass.
+    """
+    
+    def __init__(self, mode=None):
         self.model = None
+        self.model_version = None
+        self.history = None
         self.scaler = MinMaxScaler()
+        self.swap_lock = threading.Lock()  # Keeps model and scaler paired for readers
+        self.mode = mode or MODEL_CONFIG['mode']
         self.sequence_length = MODEL_CONFIG['sequence_length']
         self.prediction_horizon = MODEL_CONFIG['prediction_horizon']
-        self.model_path = MODEL_CONFIG['model_path']
-        self.scaler_path = MODEL_CONFIG['scaler_path']
+        if self.mode == 'multivariate':
+            self.model_path = MODEL_CONFIG['multivariate_model_path']
+            self.scaler_path = MODEL_CONFIG['multivariate_scaler_path']
+        else:
+            self.model_path = MODEL_CONFIG['model_path']
+            self.scaler_path = MODEL_CONFIG['scaler_path']
         
         # Ensure models directory exists
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
+        self.registry = ModelRegistry(os.path.join(MODEL_CONFIG['registry_dir'], self.mode))
+    
+    @property
+    def is_multivariate(self):
+        return self.mode == 'multivariate'
+    
+    def default_feature_columns(self):
+        """Input columns used when none are given"""
+        if self.is_multivariate:
+            return [route.lower() for route in NETWORK_CONFIG['route_names']]
+        return ['bandwidth_utilization', 'latency', 'packet_loss']
     
-    def prepare_data(self, df, feature_columns=None):
-        """Prepare data for training"""
+    def make_sequences(self, scaled_data):
+        """Stack input windows and target horizons without copying per sample"""
+        windows = np.lib.stride_tricks.sliding_window_view(
+            scaled_data, self.sequence_length + self.prediction_horizon, axis=0
+        ).transpose(0, 2, 1)
+        X = windows[:, :self.sequence_length]
+        if self.is_multivariate:
+            y = windows[:, self.sequence_length:]  # (samples, horizon, routes)
+        else:
+            y = windows[:, self.sequence_length:, 0]  # Predict bandwidth
+        return np.ascontiguousarray(X), np.ascontiguousarray(y)
+    
+    def prepare_data(self, df, feature_columns=None, fit_scaler=True, scaler=None):
+        """Prepare data for training
+        
+        With fit_scaler=False the already-fitted scaler (or the given
+        `scaler`) is reused, so the windows live in the same scaled space as
+        the serving model.
+        """
         if feature_columns is None:
-            feature_columns = ['bandwidth_utilization', 'latency', 'packet_loss']
+            feature_columns = self.default_feature_columns()
         
         # Select features
         data = df[feature_columns].values
         
         # Scale the data
-        scaled_data = self.scaler.fit_transform(data)
+        scaler = scaler or self.scaler
+        if fit_scaler:
+            scaled_data = scaler.fit_transform(data)
+        else:
+            scaled_data = scaler.transform(data)
         
-        # Create sequences
-        X, y = [], []
-        for i in range(self.sequence_length, len(scaled_data) - self.prediction_horizon + 1):
-            X.append(scaled_data[i - self.sequence_length:i])
-            y.append(scaled_data[i:i + self.prediction_horizon, 0])  # Predict bandwidth
+        if len(scaled_data) < self.sequence_length + self.prediction_horizon:
+            return np.array([]), np.array([])
         
-        return np.array(X), np.array(y)
+        # Create sequences
+        return self.make_sequences(scaled_data)
     
-    def build_lstm_model(self, input_shape):
-        """Build LSTM model architecture"""
+    def _output_layers(self, n_outputs):
+        """Dense head producing `prediction_horizon` steps for each output series"""
+        if n_outputs == 1:
+            return [Dense(25), Dense(self.prediction_horizon)]
+        return [
+            Dense(max(25, n_outputs)),
+            Dense(self.prediction_horizon * n_outputs),
+            Reshape((self.prediction_horizon, n_outputs))
+        ]
+    
+    def build_lstm_model(self, input_shape, n_outputs=1, units=None):
+        """Build LSTM model architecture (`units` defaults to MODEL_CONFIG['lstm_units'])"""
+        units = units or MODEL_CONFIG['lstm_units']
         model = Sequential([
-            LSTM(MODEL_CONFIG['lstm_units'], return_sequences=True, input_shape=input_shape),
+            LSTM(units, return_sequences=True, input_shape=input_shape),
             Dropout(MODEL_CONFIG['dropout_rate']),
-            LSTM(MODEL_CONFIG['lstm_units'], return_sequences=False),
+            LSTM(units, return_sequences=False),
             Dropout(MODEL_CONFIG['dropout_rate']),
-            Dense(25),
-            Dense(self.prediction_horizon)
+            *self._output_layers(n_outputs)
         ])
         
         model.compile(
@@ -80,15 +137,15 @@ class TrafficPredictor:
         
         return model
     
-    def build_gru_model(self, input_shape):
-        """Build GRU model architecture"""
+    def build_gru_model(self, input_shape, n_outputs=1, units=None):
+        """Build GRU model architecture (`units` defaults to MODEL_CONFIG['lstm_units'])"""
+        units = units or MODEL_CONFIG['lstm_units']
         model = Sequential([
-            GRU(MODEL_CONFIG['lstm_units'], return_sequences=True, input_shape=input_shape),
+            GRU(units, return_sequences=True, input_shape=input_shape),
             Dropout(MODEL_CONFIG['dropout_rate']),
-            GRU(MODEL_CONFIG['lstm_units'], return_sequences=False),
+            GRU(units, return_sequences=False),
             Dropout(MODEL_CONFIG['dropout_rate']),
-            Dense(25),
-            Dense(self.prediction_horizon)
+            *self._output_layers(n_outputs)
         ])
         
         model.compile(
@@ -99,7 +156,7 @@ class TrafficPredictor:
         
         return model
     
-    def train(self, df, model_type='lstm', feature_columns=None):
+    def train(self, df, model_type='lstm', feature_columns=None, register=True):
         """Train the prediction model"""
         logger.info("Preparing training data...")
         X, y = self.prepare_data(df, feature_columns)
@@ -112,10 +169,11 @@ class TrafficPredictor:
         
         # Build model
         input_shape = (X.shape[1], X.shape[2])
+        n_outputs = X.shape[2] if self.is_multivariate else 1
         if model_type.lower() == 'gru':
-            self.model = self.build_gru_model(input_shape)
+            self.model = self.build_gru_model(input_shape, n_outputs)
         else:
-            self.model = self.build_lstm_model(input_shape)
+            self.model = self.build_lstm_model(input_shape, n_outputs)
         
         logger.info(f"Built {model_type.upper()} model")
         
@@ -144,35 +202,160 @@ class TrafficPredictor:
             verbose=1
         )
         
+        self.history = history.history
+        
         # Save scaler
         joblib.dump(self.scaler, self.scaler_path)
         logger.info(f"Model saved to {self.model_path}")
         logger.info(f"Scaler saved to {self.scaler_path}")
         
+        if register:
+            val_losses = self.history.get('val_loss', [])
+            self.save_version(
+                metrics={'val_loss': float(min(val_losses)) if val_losses else None},
+                df=df,
+                model_type=model_type,
+                feature_columns=feature_columns or self.default_feature_columns()
+            )
+        
         return True
     
-    def load_model(self):
-        """Load trained model and scaler"""
+    def save_version(self, metrics=None, df=None, **extra):
+        """Register the current model and scaler as a new registry version"""
+        metadata = {
+            'mode': self.mode,
+            'config': {
+                'lstm_units': MODEL_CONFIG['lstm_units'],
+                'dropout_rate': MODEL_CONFIG['dropout_rate'],
+                'sequence_length': self.sequence_length,
+                'prediction_horizon': self.prediction_horizon,
+                'batch_size': MODEL_CONFIG['batch_size']
+            },
+            'metrics': metrics or {},
+            **extra
+        }
+        if df is not None and 'timestamp' in df and len(df) > 0:
+            metadata['data_range'] = {
+                'start': str(df['timestamp'].iloc[0]),
+                'end': str(df['timestamp'].iloc[-1]),
+                'samples': len(df)
+            }
+        
+        self.model_version = self.registry.register(self.model, self.scaler, metadata)
+        return self.model_version
+    
+    def clone_model(self, learning_rate=None, model=None):
+        """Compiled copy of the serving (or the given) model, safe to train in the background"""
+        model = model or self.model
+        if model is None:
+            return None
+        
+        candidate = keras.models.clone_model(model)
+        candidate.set_weights(model.get_weights())
+        candidate.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=learning_rate) if learning_rate else 'adam',
+            loss='mse',
+            metrics=['mae']
+        )
+        return candidate
+    
+    def swap_model(self, model, scaler=None, version=None, expected=None):
+        """Replace the serving model (and, with `scaler`, its scaler and version) at once
+        
+        With `expected`, swap only if that model is still serving (compare
+        and swap). Returns True when the swap happened.
+        """
+        with self.swap_lock:
+            if expected is not None and self.model is not expected:
+                return False
+            if scaler is not None:
+                self.scaler = scaler
+                self.model_version = version
+            self.model = model
+            return True
+    
+    def _serving(self):
+        """(model, scaler) pair as of the last swap"""
+        with self.swap_lock:
+            return self.model, self.scaler
+    
+    def load_model(self, version=None, model_path=None, scaler_path=None):
+        """Load trained model and scaler
+        
+        Explicit `model_path`/`scaler_path` load those artifacts and bypass
+        the registry (e.g. per-route models). Otherwise uses the registry's
+        current (or the given) version when one exists and falls back to the
+        legacy model/scaler paths. Loads are memoized per process, so repeat
+        calls do not touch the disk unless a file changed.
+        """
         try:
-            if os.path.exists(self.model_path):
-                self.model = load_model(self.model_path)
-                logger.info(f"Model loaded from {self.model_path}")
-            else:
+            if model_path is None and scaler_path is None:
+                loaded = self.registry.load(version, model_loader=load_model)
+                if loaded is not None:
+                    model, scaler, metadata = loaded
+                    # Private copy: prepare_data may refit the scaler
+                    self.swap_model(model, copy.deepcopy(scaler), metadata['version'])
+                    logger.info(f"Model version {self.model_version} loaded from registry")
+                    return True
+                
+                if version is not None:
+                    return False
+            
+            model_path = model_path or self.model_path
+            scaler_path = scaler_path or self.scaler_path
+            if not os.path.exists(model_path):
                 logger.warning("Model file not found")
                 return False
-            
-            if os.path.exists(self.scaler_path):
-                self.scaler = joblib.load(self.scaler_path)
-                logger.info(f"Scaler loaded from {self.scaler_path}")
-            else:
+            if not os.path.exists(scaler_path):
                 logger.warning("Scaler file not found")
                 return False
             
+            model = load_cached(model_path, load_model)
+            scaler = copy.deepcopy(load_cached(scaler_path, joblib.load))
+            self.swap_model(model, scaler)
+            logger.info(f"Model loaded from {model_path}, scaler from {scaler_path}")
             return True
         except Exception as e:
             logger.error(f"Error loading model: {e}")
             return False
     
+    def _inverse_transform(self, prediction, n_features, scaler=None):
+        """Map scaled model output back to original units"""
+        scaler = scaler or self.scaler
+        if self.is_multivariate:
+            # (..., horizon, routes): every column is a target
+            shape = prediction.shape
+            return scaler.inverse_transform(prediction.reshape(-1, shape[-1])).reshape(shape)
+        
+        # Inverse transform (only for bandwidth)
+        # Create dummy array for inverse transform
+        dummy = np.zeros((prediction.size, n_features))
+        dummy[:, 0] = prediction.ravel()
+        return scaler.inverse_transform(dummy)[:, 0].reshape(prediction.shape)
+    
+    def predict_batch(self, sequences):
+        """Predict many stacked input windows in one forward pass
+        
+        `sequences` is a (batch, sequence_length, features) array in original
+        units. Returns (batch, horizon) in aggregate mode or
+        (batch, horizon, routes) in multivariate mode.
+        """
+        if self.model is None:
+            if not self.load_model():
+                logger.error("Model not available for prediction")
+                return None
+        
+        # Read the pair once so a concurrent hot-swap cannot split this call
+        model, scaler = self._serving()
+        sequences = np.asarray(sequences, dtype=float)
+        batch, steps, n_features = sequences.shape
+        scaled = scaler.transform(sequences.reshape(-1, n_features)).reshape(batch, steps, n_features)
+        
+        prediction = model.predict(
+            scaled, batch_size=max(MODEL_CONFIG['batch_size'], batch), verbose=0
+        )
+        return self._inverse_transform(prediction, n_features, scaler)
+    
     def predict(self, recent_data, feature_columns=None):
         """Make prediction based on recent data"""
         if self.model is None:
@@ -181,7 +364,7 @@ class TrafficPredictor:
                 return None
         
         if feature_columns is None:
-            feature_columns = ['bandwidth_utilization', 'latency', 'packet_loss']
+            feature_columns = self.default_feature_columns()
         
         # Prepare input
         if isinstance(recent_data, pd.DataFrame):
@@ -189,28 +372,18 @@ class TrafficPredictor:
         else:
             data = recent_data
         
-        # Scale data
-        scaled_data = self.scaler.transform(data)
-        
         # Ensure we have enough data points
-        if len(scaled_data) < self.sequence_length:
-            logger.warning(f"Insufficient data points. Need {self.sequence_length}, got {len(scaled_data)}")
+        if len(data) < self.sequence_length:
+            logger.warning(f"Insufficient data points. Need {self.sequence_length}, got {len(data)}")
             return None
         
         # Take last sequence_length points
-        sequence = scaled_data[-self.sequence_length:]
-        sequence = sequence.reshape(1, self.sequence_length, len(feature_columns))
-        
-        # Predict
-        prediction = self.model.predict(sequence, verbose=0)
-        
-        # Inverse transform (only for bandwidth)
-        # Create dummy array for inverse transform
-        dummy = np.zeros((len(prediction[0]), len(feature_columns)))
-        dummy[:, 0] = prediction[0]
-        prediction_original = self.scaler.inverse_transform(dummy)[:, 0]
+        sequence = np.asarray(data[-self.sequence_length:], dtype=float)
+        prediction = self.predict_batch(sequence.reshape(1, self.sequence_length, len(feature_columns)))
+        if prediction is None:
+            return None
         
-        return prediction_original
+        return prediction[0]
     
     def evaluate(self, df, feature_columns=None):
         """Evaluate model performance"""
@@ -218,22 +391,20 @@ class TrafficPredictor:
             if not self.load_model():
                 return None
         
-        X, y_true = self.prepare_data(df, feature_columns)
+        if feature_columns is None:
+            feature_columns = self.default_feature_columns()
+        
+        # Reuse the serving scaler rather than refitting on evaluation data
+        X, y_true = self.prepare_data(df, feature_columns, fit_scaler=False)
         
         if len(X) == 0:
             return None
         
         y_pred = self.model.predict(X, verbose=0)
         
-        # Inverse transform predictions
-        dummy_true = np.zeros((len(y_true), len(feature_columns) if feature_columns else 3))
-        dummy_pred = np.zeros((len(y_pred), len(feature_columns) if feature_columns else 3))
-        
-        dummy_true[:, 0] = y_true[:, 0] if len(y_true.shape) > 1 else y_true
-        dummy_pred[:, 0] = y_pred[:, 0] if len(y_pred.shape) > 1 else y_pred
-        
-        y_true_original = self.scaler.inverse_transform(dummy_true)[:, 0]
-        y_pred_original = self.scaler.inverse_transform(dummy_pred)[:, 0]
+        # Score the first horizon step
+        y_true_original = self._inverse_transform(y_true[:, 0], len(feature_columns)).ravel()
+        y_pred_original = self._inverse_transform(y_pred[:, 0], len(feature_columns)).ravel()
         
         # Calculate metrics
         mae = mean_absolute_error(y_true_original, y_pred_original)
@@ -245,4 +416,3 @@ class TrafficPredictor:
             'predictions': y_pred_original,
             'actual': y_true_original
         }
-
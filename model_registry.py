@@ -0,0 +1,168 @@
+"""
+Versioned Model Registry
+Stores model artifacts as immutable versions with metadata, memoizes loads per
+process keyed by file mtime, and supports instant rollback
+"""
+import os
+import json
+import shutil
+import threading
+from datetime import datetime
+import joblib
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Process-level artifact cache: abspath -> ((mtime_ns, size), object)
+_artifact_cache = {}
+_cache_lock = threading.Lock()
+
+
+def load_cached(path, loader):
+    """Load an artifact once per (path, mtime, size); later calls are free"""
+    key = os.path.abspath(path)
+    stat = os.stat(key)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    
+    with _cache_lock:
+        entry = _artifact_cache.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+    
+    obj = loader(key)
+    
+    with _cache_lock:
+        _artifact_cache[key] = (signature, obj)
+    return obj
+
+
+def clear_cache():
+    """Drop all memoized artifacts"""
+    with _cache_lock:
+        _artifact_cache.clear()
+
+
+class ModelRegistry:
+    """Directory-backed registry of model versions
+    
+    Layout: <root>/<version>/{model.h5, scaler.pkl, metadata.json} plus a
+    CURRENT file naming the serving version.
+    """
+    
+    MODEL_FILE = 'model.h5'
+    SCALER_FILE = 'scaler.pkl'
+    METADATA_FILE = 'metadata.json'
+    
+    def __init__(self, root):
+        self.root = root
+        self.current_file = os.path.join(root, 'CURRENT')
+        os.makedirs(root, exist_ok=True)
+    
+    def _version_dir(self, version):
+        return os.path.join(self.root, version)
+    
+    def _new_version(self):
+        """Timestamped version name, unique within the registry"""
+        base = datetime.now().strftime('v%Y%m%d-%H%M%S')
+        version, counter = base, 1
+        while os.path.exists(self._version_dir(version)):
+            version = f"{base}-{counter}"
+            counter += 1
+        return version
+    
+    def list_versions(self):
+        """Metadata of every registered version, oldest first"""
+        versions = []
+        for name in os.listdir(self.root):
+            metadata = self.get_metadata(name)
+            if metadata is not None:
+                versions.append(metadata)
+        return sorted(versions, key=lambda m: m['created_at'])
+    
+    def get_metadata(self, version):
+        """Metadata for one version, or None if it does not exist"""
+        path = os.path.join(self._version_dir(version), self.METADATA_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+    
+    def current_version(self):
+        """Name of the serving version, or None"""
+        if not os.path.exists(self.current_file):
+            return None
+        with open(self.current_file) as f:
+            return f.read().strip() or None
+    
+    def set_current(self, version):
+        """Point CURRENT at a registered version (atomic)"""
+        if self.get_metadata(version) is None:
+            raise ValueError(f"Unknown model version: {version}")
+        
+        tmp_path = self.current_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(version)
+        os.replace(tmp_path, self.current_file)
+        logger.info(f"Current model version set to {version}")
+    
+    def register(self, model, scaler, metadata=None, promote=True):
+        """Save model and scaler as a new immutable version"""
+        version = self._new_version()
+        final_dir = self._version_dir(version)
+        tmp_dir = final_dir + '.tmp'
+        os.makedirs(tmp_dir, exist_ok=True)
+        
+        try:
+            model.save(os.path.join(tmp_dir, self.MODEL_FILE))
+            joblib.dump(scaler, os.path.join(tmp_dir, self.SCALER_FILE))
+            
+            metadata = {
+                **(metadata or {}),
+                'version': version,
+                'created_at': datetime.now().isoformat()
+            }
+            with open(os.path.join(tmp_dir, self.METADATA_FILE), 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            
+            # Publish the version directory in one rename
+            os.replace(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        
+        logger.info(f"Registered model version {version}")
+        
+        if promote:
+            self.set_current(version)
+        
+        return version
+    
+    def load(self, version=None, model_loader=None):
+        """Load (model, scaler, metadata) for a version (default: current)"""
+        version = version or self.current_version()
+        if version is None:
+            return None
+        
+        metadata = self.get_metadata(version)
+        if metadata is None:
+            logger.warning(f"Model version {version} not found")
+            return None
+        
+        version_dir = self._version_dir(version)
+        model = load_cached(os.path.join(version_dir, self.MODEL_FILE), model_loader)
+        scaler = load_cached(os.path.join(version_dir, self.SCALER_FILE), joblib.load)
+        return model, scaler, metadata
+    
+    def rollback(self, version=None):
+        """Serve an earlier version (default: the one before current)"""
+        if version is None:
+            versions = [m['version'] for m in self.list_versions()]
+            current = self.current_version()
+            if current not in versions or versions.index(current) == 0:
+                logger.warning("No earlier model version to roll back to")
+                return None
+            version = versions[versions.index(current) - 1]
+        
+        self.set_current(version)
+        return version
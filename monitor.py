@@ -1,29 +1,111 @@
 """
 Real-time Network Traffic Monitoring and Prediction Service
 """
+import os
+import json
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import pandas as pd
 from datetime import datetime, timedelta
 from data_collector import NetworkDataCollector
 from ml_models import TrafficPredictor
 from optimizer import NetworkOptimizer
-from config import DATA_CONFIG, OPTIMIZATION_CONFIG
+from forecasters import create_forecaster, ForecastCache
+from online_learner import OnlineLearner
+from actuator import AllocationActuator, LocalController
+from pipeline import PipelineStage
+from scheduler import TickScheduler
+from checkpoint import MonitorCheckpoint
+from config import (
+    DATA_CONFIG, OPTIMIZATION_CONFIG, FORECAST_CONFIG, ONLINE_LEARNING_CONFIG, ACTUATOR_CONFIG,
+    PIPELINE_CONFIG, CHECKPOINT_CONFIG
+)
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _to_json(payload):
+    """Serialize a status payload (NumPy scalars and arrays included) to JSON bytes"""
+    return json.dumps(payload, default=lambda value: value.tolist() if hasattr(value, 'tolist') else str(value)).encode()
+
+
+class LatePrediction:
+    """Model prediction that arrived after its deadline, queued for the predict stage"""
+    
+    def __init__(self, prediction):
+        self.prediction = prediction
+
+
 class NetworkMonitor:
-    """Real-time network monitoring and prediction service"""
+    """Real-time network monitoring and prediction service
+    
+    Monitors one network. Hosted by a MultiNetworkMonitor, a site shares the
+    host's `predictor`, sends its model windows through the host's inference
+    `batcher` and keeps its own data file, optimizer and histories.
+    """
     
-    def __init__(self):
-        self.data_collector = NetworkDataCollector()
-        self.predictor = TrafficPredictor()
+    def __init__(self, name=None, predictor=None, batcher=None, data_file=None, controllers=None):
+        self.name = name
+        self.data_collector = NetworkDataCollector(data_file)
+        self.predictor = predictor or TrafficPredictor()
+        self.batcher = batcher
         self.optimizer = NetworkOptimizer()
+        self.baseline_forecaster = create_forecaster()
+        self.forecast_cache = ForecastCache()
+        self.online_learner = OnlineLearner(
+            self.predictor,
+            self.data_collector,
+            on_swap=self.forecast_cache.invalidate
+        )
+        self.local_controller = None
+        self.actuator = None
+        self.controllers = controllers
+        # Hosted sites push only to their own configured controllers
+        if ACTUATOR_CONFIG['enabled'] and (controllers or batcher is None):
+            self.actuator = AllocationActuator(self.optimizer.route_names, controllers)
         self.is_running = False
         self.monitoring_thread = None
+        self._stop_event = threading.Event()
+        
+        # Pipeline stages fed by the collection clock
+        budgets = PIPELINE_CONFIG['latency_budgets']
+        self.persist_stage = PipelineStage(
+            'persist', self._persist_samples, PIPELINE_CONFIG['persist_queue_size'],
+            drain_on_stop=True, budget=budgets['persist']
+        )
+        self.predict_stage = PipelineStage(
+            'predict', self._predict_samples, PIPELINE_CONFIG['predict_queue_size'],
+            budget=budgets['predict']
+        )
+        self.optimize_stage = PipelineStage(
+            'optimize', self._optimize_snapshot, PIPELINE_CONFIG['optimize_queue_size'],
+            budget=budgets['optimize']
+        )
+        
+        # Model and baseline work runs on one worker so the predict stage can
+        # stop waiting for it at the deadline
+        self.model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
+        self.model_future = None
+        self.degradation_stats = {
+            'model_on_time': 0,
+            'deadline_misses': 0,
+            'model_busy': 0,
+            'late_results': 0,
+            'last_degraded': None
+        }
+        self.stages = [self.persist_stage, self.predict_stage, self.optimize_stage]
+        
+        # Warm-restart checkpoints, kept next to the data file
+        self.checkpoint = None
+        if CHECKPOINT_CONFIG['enabled']:
+            self.checkpoint = MonitorCheckpoint(os.path.splitext(self.data_collector.data_file)[0] + '.ckpt')
+            self.checkpoint_stage = PipelineStage('checkpoint', self._write_checkpoint, 1)
+            self.stages.append(self.checkpoint_stage)
+        
+        self.scheduler = TickScheduler(DATA_CONFIG['collection_interval'])
         
         # Current state
         self.current_traffic = {}
@@ -32,8 +114,14 @@ class NetworkMonitor:
         self.metrics = {}
         self.prediction_history = []
         
-        # Load model if available
-        self.predictor.load_model()
+        # Status published for API readers; replaced whole, never mutated
+        self._publish_lock = threading.Lock()
+        self.status_snapshot = None
+        
+        # Load model if available (a shared predictor is loaded by its host)
+        if predictor is None:
+            self.predictor.load_model()
+        self.publish_status()
     
     def get_current_traffic_by_route(self):
         """Get current traffic distribution across routes"""
@@ -57,47 +145,147 @@ class NetworkMonitor:
             logger.error(f"Error getting current traffic: {e}")
             return {}
     
-    def predict_traffic(self):
-        """Make traffic prediction"""
+    def _traffic_from_sample(self, sample):
+        """Per-route traffic of one collected sample"""
+        return {route: sample.get(route.lower(), 0) for route in self.optimizer.route_names}
+    
+    def _recent_frame(self):
+        """Recent samples from the collector's in-memory history"""
+        df = pd.DataFrame(list(self.data_collector.history))
+        if len(df) > 0:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+    
+    def _route_columns(self):
+        """Data file columns holding per-route traffic"""
+        return [route.lower() for route in self.optimizer.route_names]
+    
+    def update_baseline(self, sample):
+        """Fold a new sample into the statistical baseline forecaster"""
+        if not self.baseline_forecaster.is_fitted:
+            return
         try:
-            # Load recent data
-            df = self.data_collector.load_historical_data(hours=2)
-            
-            if len(df) < self.predictor.sequence_length:
-                logger.warning("Insufficient data for prediction")
+            values = [sample.get(col, 0) for col in self._route_columns()]
+            self.baseline_forecaster.update(values, sample.get('timestamp'))
+        except Exception as e:
+            logger.error(f"Error updating baseline forecaster: {e}")
+    
+    def predict_traffic_baseline(self, df=None):
+        """Per-route prediction from the statistical baseline forecaster"""
+        if not FORECAST_CONFIG['fallback_enabled']:
+            return None
+        
+        if not self.baseline_forecaster.is_fitted:
+            if df is None:
+                df = self.data_collector.load_historical_data(hours=2)
+            if len(df) == 0:
                 return None
-            
-            # Make prediction
-            prediction = self.predictor.predict(df)
-            
-            if prediction is None:
+            fitted = self.baseline_forecaster.fit(
+                df[self._route_columns()].values,
+                df['timestamp'].values
+            )
+            if not fitted:
                 return None
+        
+        forecast = self.baseline_forecaster.forecast(1)
+        if forecast is None:
+            return None
+        
+        return {
+            route: max(0.0, float(value))
+            for route, value in zip(self.optimizer.route_names, forecast[0])
+        }
+    
+    def _distribute_prediction(self, predicted_total):
+        """Distribute a predicted aggregate bandwidth across routes"""
+        # Use current distribution pattern
+        current_traffic = self.current_traffic or self.get_current_traffic_by_route()
+        total_current = sum(current_traffic.values())
+        
+        predicted_by_route = {}
+        if total_current > 0:
+            for route in self.optimizer.route_names:
+                proportion = current_traffic.get(route, 0) / total_current
+                predicted_by_route[route] = predicted_total * proportion
+        else:
+            # Equal distribution
+            per_route = predicted_total / len(self.optimizer.route_names)
+            predicted_by_route = {route: per_route for route in self.optimizer.route_names}
+        
+        return predicted_by_route
+    
+    def _format_prediction(self, step):
+        """Turn one forecast step into a per-route prediction"""
+        if self.predictor.is_multivariate:
+            # Joint model already forecasts every route
+            return {
+                route: max(0.0, float(value))
+                for route, value in zip(self.optimizer.route_names, step)
+            }
+        
+        # Distribute predicted bandwidth across routes
+        return self._distribute_prediction(float(step))
+    
+    def model_predict(self, df):
+        """Model forecast for the newest window, through the shared batcher if hosted"""
+        if self.batcher is None:
+            return self.predictor.predict(df)
+        
+        window = df[self.predictor.default_feature_columns()].values[-self.predictor.sequence_length:]
+        return self.batcher.submit(window).result()
+    
+    def predict_traffic(self, df=None):
+        """Make traffic prediction
+        
+        `df` holds the recent samples (default: read from the data file).
+        """
+        try:
+            stored = df is None
+            if stored:
+                # Load recent data
+                df = self.data_collector.load_historical_data(hours=2)
             
-            # Distribute predicted bandwidth across routes
-            # Use current distribution pattern
-            current_traffic = self.get_current_traffic_by_route()
-            total_current = sum(current_traffic.values())
+            # Serve from the cached horizon while it is still valid
+            if FORECAST_CONFIG['cache_enabled'] and len(df) > 0:
+                latest = df.iloc[-1]
+                if self.predictor.is_multivariate:
+                    observed = latest[self._route_columns()].values.astype(float)
+                else:
+                    observed = latest['bandwidth_utilization']
+                cached = self.forecast_cache.lookup(latest['timestamp'], observed=observed)
+                if cached is not None:
+                    return self._format_prediction(cached)
             
-            predicted_by_route = {}
-            if total_current > 0:
-                for route in self.optimizer.route_names:
-                    proportion = current_traffic.get(route, 0) / total_current
-                    predicted_by_route[route] = prediction[0] * proportion
+            prediction = None
+            if len(df) >= self.predictor.sequence_length:
+                # Make prediction
+                prediction = self.model_predict(df)
             else:
-                # Equal distribution
-                per_route = prediction[0] / len(self.optimizer.route_names)
-                predicted_by_route = {route: per_route for route in self.optimizer.route_names}
+                logger.warning("Insufficient data for model prediction")
             
-            return predicted_by_route
+            if prediction is None:
+                # Deep model missing or unable to predict: use the baseline
+                # (fitted once on the stored history)
+                return self.predict_traffic_baseline(df if stored else None)
+            
+            if FORECAST_CONFIG['cache_enabled']:
+                self.forecast_cache.store(prediction, df['timestamp'].iloc[-1])
+            
+            return self._format_prediction(prediction[0])
         except Exception as e:
             logger.error(f"Error in traffic prediction: {e}")
             return None
     
-    def update_optimization(self):
-        """Update bandwidth allocation based on predictions"""
+    def update_optimization(self, current_traffic=None, predicted_traffic=None):
+        """Update bandwidth allocation based on predictions
+        
+        Defaults to the latest stored sample and the latest prediction.
+        """
         try:
-            current_traffic = self.get_current_traffic_by_route()
-            predicted_traffic = self.predicted_traffic
+            if current_traffic is None:
+                current_traffic = self.get_current_traffic_by_route()
+            if predicted_traffic is None:
+                predicted_traffic = self.predicted_traffic
             
             # If no current traffic, use empty dict
             if not current_traffic:
@@ -116,6 +304,8 @@ class NetworkMonitor:
                 )
                 
                 self.current_allocation = allocation
+                if self.actuator:
+                    self.actuator.submit(self.optimizer.allocation)
                 
                 # Calculate metrics
                 stats = self.optimizer.get_utilization_stats(current_traffic)
@@ -124,96 +314,294 @@ class NetworkMonitor:
                 # Use default allocation if no traffic data yet
                 if not self.current_allocation:
                     self.current_allocation = self.optimizer._initialize_allocation()
-            
+        
         except Exception as e:
             logger.error(f"Error in optimization: {e}")
             # Set default allocation on error
             if not self.current_allocation:
                 self.current_allocation = self.optimizer._initialize_allocation()
     
+    def _persist_samples(self, samples):
+        """Persistence stage: append queued samples to the data file in one write"""
+        self.data_collector.save_to_file(samples)
+    
+    def _update_baseline_batch(self, samples):
+        for sample in samples:
+            self.update_baseline(sample)
+    
+    def fast_forecast(self, df):
+        """Cheap per-route forecast from recent samples (last value or EWMA)"""
+        if len(df) == 0:
+            return None
+        values = df[self._route_columns()].astype(float)
+        if PIPELINE_CONFIG['degraded_forecast'] == 'last':
+            latest = values.iloc[-1]
+        else:
+            latest = values.ewm(alpha=FORECAST_CONFIG['ewma_alpha']).mean().iloc[-1]
+        return {
+            route: max(0.0, float(value))
+            for route, value in zip(self.optimizer.route_names, latest.values)
+        }
+    
+    def _publish_prediction(self, predicted, source):
+        """Adopt a prediction and optimize (always, even without one) on the latest traffic"""
+        if predicted:
+            self.predicted_traffic = predicted
+            
+            # Store prediction history; rebuilt rather than appended so a
+            # published snapshot never sees it change
+            entry = {
+                'timestamp': datetime.now().isoformat(),
+                'prediction': predicted.copy(),
+                'source': source
+            }
+            self.prediction_history = (self.prediction_history + [entry])[-100:]
+        
+        self.optimize_stage.queue.put((self.current_traffic, self.predicted_traffic))
+    
+    def _degrade(self, reason, df):
+        """Serve this tick from the fast forecast instead of the model"""
+        self.degradation_stats[reason] += 1
+        self.degradation_stats['last_degraded'] = datetime.now().isoformat()
+        logger.warning(f"Prediction degraded ({reason}): using {PIPELINE_CONFIG['degraded_forecast']} forecast")
+        self._publish_prediction(self.fast_forecast(df), 'fallback')
+    
+    def _late_prediction(self, future):
+        """Hand a model prediction that missed its deadline back to the predict stage
+        
+        Runs on the model worker; the predict stage publishes it, so prediction
+        history and degradation stats keep a single writer.
+        """
+        if future.cancelled() or future.exception() is not None or not future.result():
+            return
+        self.predict_stage.queue.put(LatePrediction(future.result()))
+    
+    def _predict_samples(self, items):
+        """Prediction stage: fold every new sample into the baseline, predict from the latest
+        
+        The model gets PIPELINE_CONFIG['model_deadline'] seconds (inside the
+        stage's budget); past that, or while an earlier prediction is still
+        running, the tick is served by the fast forecast, so allocation is
+        never late because of the model. Late model results queued by
+        _late_prediction are published first.
+        """
+        samples = []
+        for item in items:
+            if isinstance(item, LatePrediction):
+                self.degradation_stats['late_results'] += 1
+                self._publish_prediction(item.prediction, 'late_model')
+            else:
+                samples.append(item)
+        if not samples:
+            return
+        
+        df = self._recent_frame()
+        self.model_executor.submit(self._update_baseline_batch, samples)
+        
+        if self.model_future is not None and not self.model_future.done():
+            self._degrade('model_busy', df)
+            return
+        
+        self.model_future = self.model_executor.submit(self.predict_traffic, df)
+        try:
+            predicted = self.model_future.result(timeout=PIPELINE_CONFIG['model_deadline'])
+        except FutureTimeout:
+            self.model_future.add_done_callback(self._late_prediction)
+            self._degrade('deadline_misses', df)
+            return
+        
+        self.degradation_stats['model_on_time'] += 1
+        self._publish_prediction(predicted, 'model')
+    
+    def _optimize_snapshot(self, snapshots):
+        """Optimization stage: allocate for the newest (traffic, prediction) snapshot"""
+        current_traffic, predicted_traffic = snapshots[-1]
+        self.update_optimization(current_traffic, predicted_traffic)
+        
+        # Ensure we always have allocation data for display
+        if not self.current_allocation:
+            self.current_allocation = self.optimizer._initialize_allocation()
+        self.publish_status(current_traffic, predicted_traffic)
+        
+        # State is copied here, between ticks; the write happens off this stage
+        if self.checkpoint and self.checkpoint.due():
+            state = self.checkpoint.capture(self, forecasting=False)
+            if state is not None:
+                self.model_executor.submit(self._capture_forecasting, state)
+        
+        # Log status
+        if current_traffic and predicted_traffic:
+            logger.info(
+                f"Current: {sum(current_traffic.values()):.2f} Mbps, "
+                f"Predicted: {sum(predicted_traffic.values()):.2f} Mbps"
+            )
+    
+    def _capture_forecasting(self, state):
+        """Model worker: add the forecasting state it owns, then queue the write"""
+        self.checkpoint.capture_forecasting(self, state)
+        self.checkpoint_stage.queue.put(state)
+    
+    def _write_checkpoint(self, states):
+        """Checkpoint stage: write the newest captured state"""
+        self.checkpoint.save(states[-1])
+    
     def monitoring_loop(self):
-        """Main monitoring loop"""
+        """Collection clock: sample at fixed-rate deadlines and feed the pipeline stages
+        
+        Downstream latency (disk, inference, optimization) never delays the
+        next sample, and samples are stamped with their scheduled time.
+        """
         logger.info("Starting monitoring loop...")
         
-        while self.is_running:
-            try:
-                # Collect current data
-                sample = self.data_collector.collect_sample()
-                self.data_collector.save_to_file(sample)
-                
-                # Update current traffic
-                self.current_traffic = self.get_current_traffic_by_route()
-                
-                # Make prediction
-                predicted = self.predict_traffic()
-                if predicted:
-                    self.predicted_traffic = predicted
-                    
-                    # Store prediction history
-                    self.prediction_history.append({
-                        'timestamp': datetime.now().isoformat(),
-                        'prediction': predicted.copy()
-                    })
-                    
-                    # Keep only recent history
-                    if len(self.prediction_history) > 100:
-                        self.prediction_history = self.prediction_history[-100:]
-                
-                # Update optimization (always try, even without predictions)
-                self.update_optimization()
-                
-                # Ensure we always have allocation data for display
-                if not self.current_allocation:
-                    self.current_allocation = self.optimizer._initialize_allocation()
-                
-                # Log status
-                if self.current_traffic and self.predicted_traffic:
-                    total_current = sum(self.current_traffic.values())
-                    total_predicted = sum(self.predicted_traffic.values())
-                    logger.info(
-                        f"Current: {total_current:.2f} Mbps, "
-                        f"Predicted: {total_predicted:.2f} Mbps"
-                    )
-                
-                # Sleep
-                time.sleep(DATA_CONFIG['collection_interval'])
-                
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {e}")
-                time.sleep(DATA_CONFIG['collection_interval'])
+        for _, scheduled in self.scheduler.ticks(self._stop_event):
+            self.collect_tick(scheduled)
+    
+    def collect_tick(self, scheduled=None):
+        """Collect one sample and hand it to the pipeline stages"""
+        try:
+            # Collect current data
+            sample = self.data_collector.collect_sample(timestamp=scheduled)
+            self.current_traffic = self._traffic_from_sample(sample)
+            self.persist_stage.queue.put(sample)
+            self.predict_stage.queue.put(sample)
+        except Exception as e:
+            logger.error(f"Error in monitoring loop: {e}")
     
-    def start(self):
-        """Start monitoring service"""
+    def pipeline_status(self):
+        """Collection clock and per-stage queue statistics"""
+        status = {stage.name: stage.status() for stage in self.stages}
+        status['collect'] = self.scheduler.status()
+        return status
+    
+    def start(self, clock=True):
+        """Start monitoring service
+        
+        With `clock=False` no collection loop is started; the caller drives
+        collection through collect_tick() (see MultiNetworkMonitor).
+        """
         if self.is_running:
             logger.warning("Monitoring already running")
             return
         
+        # Prediction works from in-memory state: restore it from the last
+        # checkpoint, or at least seed the history from the data file
+        if not self.data_collector.history:
+            if not (self.checkpoint and self.checkpoint.restore(self)):
+                self.data_collector.load_recent_history()
+        
+        if self.model_executor is None:
+            self.model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='model')
         self.is_running = True
-        self.monitoring_thread = threading.Thread(target=self.monitoring_loop, daemon=True)
-        self.monitoring_thread.start()
+        self._stop_event.clear()
+        self.publish_status()
+        for stage in self.stages:
+            stage.start()
+        if clock:
+            self.monitoring_thread = threading.Thread(target=self.monitoring_loop, daemon=True)
+            self.monitoring_thread.start()
+        
+        # Hosted sites share one model; it is not fine-tuned per site
+        if ONLINE_LEARNING_CONFIG['enabled'] and self.batcher is None:
+            self.online_learner.start()
+        
+        if self.actuator:
+            if not (self.controllers or ACTUATOR_CONFIG['controllers']) and self.local_controller is None:
+                self.local_controller = LocalController().start()
+            self.actuator.start()
+        
         logger.info("Monitoring service started")
     
     def stop(self):
         """Stop monitoring service"""
         self.is_running = False
+        self._stop_event.set()
+        if self.online_learner.is_running:
+            self.online_learner.stop()
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=5)
+        
+        # Upstream first, so queued samples are still persisted
+        for stage in self.stages:
+            stage.stop()
+        if self.actuator:
+            self.actuator.stop()
+        if self.local_controller:
+            self.local_controller.stop()
+            self.local_controller = None
+        if self.checkpoint:
+            state = self.checkpoint.capture(self, forecasting=False)
+            if state is not None:
+                self.model_executor.submit(self.checkpoint.capture_forecasting, self, state).result()
+            self.checkpoint.save(state)
+        
+        # Nothing submits to the model worker any more; a running model call
+        # is left to finish on its own
+        if self.model_executor:
+            self.model_executor.shutdown(wait=False, cancel_futures=True)
+            self.model_executor = None
+            self.model_future = None
+        self.publish_status()
         logger.info("Monitoring service stopped")
     
+    def publish_status(self, current_traffic=None, predicted_traffic=None):
+        """Build the status of the latest tick and publish it as one snapshot
+        
+        The snapshot holds the status dict and its /api/status, /api/metrics
+        and /api/predictions bodies serialized up front. It is swapped in with
+        a single reference assignment, so readers take no lock and always see
+        one tick's traffic, prediction, allocation and metrics together.
+        """
+        with self._publish_lock:
+            metrics = {
+                'metrics': self.metrics,
+                'optimization_metrics': self.optimizer.get_optimization_metrics()
+            }
+            status = {
+                'is_running': self.is_running,
+                'current_traffic': self.current_traffic if current_traffic is None else current_traffic,
+                'predicted_traffic': self.predicted_traffic if predicted_traffic is None else predicted_traffic,
+                'allocation': self.current_allocation or self.optimizer._initialize_allocation(),
+                **metrics,
+                'optimizer_solves': dict(self.optimizer.solve_stats),
+                'forecast_cache': dict(self.forecast_cache.stats),
+                'online_learning': dict(self.online_learner.stats),
+                'actuator': dict(self.actuator.stats) if self.actuator else None,
+                'degradation': dict(self.degradation_stats),
+                'checkpoint': dict(self.checkpoint.stats) if self.checkpoint else None,
+                'pipeline': self.pipeline_status()
+            }
+            previous = self.status_snapshot
+            
+            self.status_snapshot = {
+                'version': previous['version'] + 1 if previous else 1,
+                'published_at': datetime.now().isoformat(),
+                'status': status,
+                'status_json': _to_json(status),
+                'metrics_json': _to_json(metrics),
+                'predictions_json': _to_json(self.get_prediction_history())
+            }
+    
     def get_status(self):
-        """Get current system status"""
-        # Ensure allocation exists for display
-        if not self.current_allocation:
-            self.current_allocation = self.optimizer._initialize_allocation()
+        """Latest published status (shared with other readers; do not modify)"""
+        return self.status_snapshot['status']
+    
+    def list_model_versions(self):
+        """List registered model versions"""
+        return self.predictor.registry.list_versions()
+    
+    def rollback_model(self, version=None):
+        """Serve an earlier model version without retraining"""
+        version = self.predictor.registry.rollback(version)
+        if version is None:
+            return None
         
-        return {
-            'is_running': self.is_running,
-            'current_traffic': self.current_traffic,
-            'predicted_traffic': self.predicted_traffic,
-            'allocation': self.current_allocation,
-            'metrics': self.metrics,
-            'optimization_metrics': self.optimizer.get_optimization_metrics()
-        }
+        if not self.predictor.load_model(version):
+            logger.error(f"Failed to load model version {version}")
+            return None
+        
+        self.forecast_cache.invalidate()
+        logger.info(f"Rolled back to model version {version}")
+        return version
     
     def get_prediction_history(self, limit=50):
         """Get recent prediction history"""
@@ -229,12 +617,15 @@ class NetworkMonitor:
             logger.error("Insufficient historical data for training")
             return False
         
-        success = self.predictor.train(df, model_type='lstm')
+        # Train a separate predictor: the serving one keeps predicting with
+        # its own model and scaler until the trained pair is swapped in
+        trainer = TrafficPredictor(mode=self.predictor.mode)
+        success = trainer.train(df, model_type='lstm')
         
         if success:
             logger.info("Model training completed successfully")
-            # Reload the model
-            self.predictor.load_model()
+            self.predictor.swap_model(trainer.model, trainer.scaler, trainer.model_version)
+            self.forecast_cache.invalidate()
         
         return success
 
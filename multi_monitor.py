@@ -0,0 +1,184 @@
+"""
+Multi-Site Network Monitoring
+Hosts many independent network monitors in one process with one shared
+prediction model, batching every site's model window into a single
+inference call per tick
+"""
+import os
+import time
+import threading
+from concurrent.futures import Future
+import numpy as np
+from ml_models import TrafficPredictor
+from monitor import NetworkMonitor
+from scheduler import TickScheduler
+from config import MULTI_SITE_CONFIG, DATA_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class InferenceBatcher:
+    """Coalesces model windows from many callers into one predict_batch call
+    
+    A batch runs as soon as `expected` windows are waiting (one per site),
+    `max_batch_size` is reached or the oldest window has waited
+    `max_wait` seconds. Callers get a Future for their own prediction.
+    """
+    
+    def __init__(self, predictor, expected=1, max_batch_size=None, max_wait=None):
+        self.predictor = predictor
+        self.expected = expected
+        self.max_batch_size = max_batch_size or MULTI_SITE_CONFIG['max_batch_size']
+        self.max_wait = MULTI_SITE_CONFIG['max_batch_wait'] if max_wait is None else max_wait
+        self.pending = []
+        self.ready = threading.Condition()
+        self.is_running = False
+        self.batcher_thread = None
+        self.stats = {
+            'batches': 0,
+            'windows': 0,
+            'max_batch': 0,
+            'errors': 0,
+            'last_batch_ms': None
+        }
+    
+    def submit(self, window):
+        """Queue one (sequence_length x features) window; returns a Future"""
+        future = Future()
+        with self.ready:
+            self.pending.append((np.asarray(window, dtype=float), future))
+            self.ready.notify()
+        return future
+    
+    def _take_batch(self):
+        """Wait for a full batch (or the deadline) and take it"""
+        with self.ready:
+            while self.is_running and not self.pending:
+                self.ready.wait(1.0)
+            deadline = time.monotonic() + self.max_wait
+            while (self.is_running and len(self.pending) < min(self.expected, self.max_batch_size)
+                   and time.monotonic() < deadline):
+                self.ready.wait(deadline - time.monotonic())
+            batch = self.pending[:self.max_batch_size]
+            self.pending = self.pending[self.max_batch_size:]
+        return batch
+    
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        futures = [future for _, future in batch]
+        try:
+            windows = [window for window, _ in batch]
+            if len({window.shape for window in windows}) > 1:
+                raise ValueError("Model windows of different shapes cannot be batched")
+            predictions = self.predictor.predict_batch(np.stack(windows))
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Batched inference failed: {e}")
+            for future in futures:
+                future.set_exception(e)
+            return
+        
+        for i, future in enumerate(futures):
+            future.set_result(None if predictions is None else predictions[i])
+        
+        self.stats['batches'] += 1
+        self.stats['windows'] += len(batch)
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+        self.stats['last_batch_ms'] = (time.perf_counter() - started) * 1000
+    
+    def batcher_loop(self):
+        while self.is_running:
+            batch = self._take_batch()
+            if batch:
+                self._run_batch(batch)
+        
+        # Never leave a caller waiting
+        with self.ready:
+            batch, self.pending = self.pending, []
+        for _, future in batch:
+            future.set_exception(RuntimeError("Inference batcher stopped"))
+    
+    def start(self):
+        self.is_running = True
+        self.batcher_thread = threading.Thread(target=self.batcher_loop, daemon=True)
+        self.batcher_thread.start()
+    
+    def stop(self):
+        with self.ready:
+            self.is_running = False
+            self.ready.notify_all()
+        if self.batcher_thread:
+            self.batcher_thread.join(timeout=5)
+
+
+class MultiNetworkMonitor:
+    """Many NetworkMonitor sites on one collection clock and one model
+    
+    Each site keeps its own collector (and data file), optimizer, forecasters
+    and histories; the TrafficPredictor is loaded once and every site's
+    model window goes through a shared InferenceBatcher.
+    """
+    
+    def __init__(self, sites=None):
+        sites = sites or MULTI_SITE_CONFIG['sites'] or {'default': {}}
+        self.predictor = TrafficPredictor()
+        self.predictor.load_model()
+        self.batcher = InferenceBatcher(self.predictor, expected=len(sites))
+        
+        self.sites = {}
+        for name, spec in sites.items():
+            data_file = spec.get('data_file') or os.path.join(MULTI_SITE_CONFIG['data_dir'], f"{name}.csv")
+            self.sites[name] = NetworkMonitor(
+                name=name,
+                predictor=self.predictor,
+                batcher=self.batcher,
+                data_file=data_file,
+                controllers=spec.get('controllers')
+            )
+        
+        self.scheduler = TickScheduler(DATA_CONFIG['collection_interval'])
+        self.is_running = False
+        self.clock_thread = None
+        self._stop_event = threading.Event()
+        logger.info(f"Multi-site monitor: {len(self.sites)} site(s), one shared model")
+    
+    def clock_loop(self):
+        """One collection clock for every site, so their windows batch together"""
+        for _, scheduled in self.scheduler.ticks(self._stop_event):
+            for site in self.sites.values():
+                site.collect_tick(scheduled)
+    
+    def start(self):
+        if self.is_running:
+            logger.warning("Multi-site monitoring already running")
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self.batcher.start()
+        for site in self.sites.values():
+            site.start(clock=False)
+        self.clock_thread = threading.Thread(target=self.clock_loop, daemon=True)
+        self.clock_thread.start()
+        logger.info("Multi-site monitoring started")
+    
+    def stop(self):
+        self.is_running = False
+        self._stop_event.set()
+        if self.clock_thread:
+            self.clock_thread.join(timeout=5)
+        for site in self.sites.values():
+            site.stop()
+        self.batcher.stop()
+        logger.info("Multi-site monitoring stopped")
+    
+    def get_status(self):
+        """Per-site status plus shared clock and inference statistics"""
+        return {
+            'is_running': self.is_running,
+            'model_version': self.predictor.model_version,
+            'inference': dict(self.batcher.stats),
+            'clock': self.scheduler.status(),
+            'sites': {name: site.get_status() for name, site in self.sites.items()}
+        }
@@ -0,0 +1,130 @@
+"""
+Background Online Fine-Tuning
+Periodically fine-tunes a copy of the serving model on the newest windows and
+hot-swaps it in when it beats the serving model on held-out data
+"""
+import time
+import threading
+from datetime import datetime
+from config import ONLINE_LEARNING_CONFIG, MODEL_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class OnlineLearner:
+    """Fine-tunes the prediction model in a background thread"""
+    
+    def __init__(self, predictor, data_collector, on_swap=None):
+        self.predictor = predictor
+        self.data_collector = data_collector
+        self.on_swap = on_swap
+        self.interval = ONLINE_LEARNING_CONFIG['interval']
+        self.is_running = False
+        self.learner_thread = None
+        self._stop_event = threading.Event()
+        self.stats = {
+            'rounds': 0,
+            'swaps': 0,
+            'rejected': 0,
+            'last_round': None,
+            'last_serving_loss': None,
+            'last_candidate_loss': None
+        }
+    
+    def fine_tune_once(self):
+        """Run one fine-tuning round; returns True if the model was swapped"""
+        # The candidate is trained in this scaler's space; both are taken together
+        serving, scaler = self.predictor._serving()
+        if serving is None:
+            logger.info("No serving model to fine-tune")
+            return False
+        
+        df = self.data_collector.load_historical_data(hours=ONLINE_LEARNING_CONFIG['window_hours'])
+        X, y = self.predictor.prepare_data(df, fit_scaler=False, scaler=scaler)
+        
+        min_samples = ONLINE_LEARNING_CONFIG['min_samples']
+        if len(X) < min_samples:
+            logger.info(f"Not enough recent windows for fine-tuning ({len(X)} < {min_samples})")
+            return False
+        
+        # Hold out the newest windows for validation
+        split = int(len(X) * (1 - ONLINE_LEARNING_CONFIG['validation_fraction']))
+        X_train, y_train = X[:split], y[:split]
+        X_val, y_val = X[split:], y[split:]
+        
+        candidate = self.predictor.clone_model(ONLINE_LEARNING_CONFIG['learning_rate'], model=serving)
+        
+        candidate.fit(
+            X_train, y_train,
+            batch_size=MODEL_CONFIG['batch_size'],
+            epochs=ONLINE_LEARNING_CONFIG['epochs'],
+            verbose=0
+        )
+        
+        serving_loss = float(serving.evaluate(X_val, y_val, verbose=0)[0])
+        candidate_loss = float(candidate.evaluate(X_val, y_val, verbose=0)[0])
+        
+        self.stats['rounds'] += 1
+        self.stats['last_round'] = datetime.now().isoformat()
+        self.stats['last_serving_loss'] = serving_loss
+        self.stats['last_candidate_loss'] = candidate_loss
+        
+        if candidate_loss >= serving_loss * (1 - ONLINE_LEARNING_CONFIG['min_improvement']):
+            self.stats['rejected'] += 1
+            logger.info(f"Candidate rejected (loss {candidate_loss:.5f} vs serving {serving_loss:.5f})")
+            return False
+        
+        # Only swap if nobody replaced the serving model (and scaler) while we trained
+        if not self.predictor.swap_model(candidate, expected=serving):
+            self.stats['rejected'] += 1
+            logger.info("Serving model changed during fine-tuning; discarding candidate")
+            return False
+        
+        self.stats['swaps'] += 1
+        logger.info(f"Hot-swapped fine-tuned model (loss {serving_loss:.5f} -> {candidate_loss:.5f})")
+        
+        if self.on_swap:
+            self.on_swap()
+        
+        if ONLINE_LEARNING_CONFIG['persist']:
+            self.predictor.save_version(
+                metrics={'val_loss': candidate_loss, 'serving_val_loss': serving_loss},
+                df=df,
+                source='online_fine_tuning'
+            )
+        
+        return True
+    
+    def learning_loop(self):
+        """Background loop running a fine-tuning round every interval"""
+        logger.info("Starting online learning loop...")
+        
+        while not self._stop_event.wait(self.interval):
+            try:
+                started = time.time()
+                self.fine_tune_once()
+                logger.debug(f"Fine-tuning round took {time.time() - started:.1f}s")
+            except Exception as e:
+                logger.error(f"Error in online learning loop: {e}")
+    
+    def start(self):
+        """Start background fine-tuning"""
+        if self.is_running:
+            logger.warning("Online learner already running")
+            return
+        
+        self.is_running = True
+        self._stop_event.clear()
+        self.learner_thread = threading.Thread(target=self.learning_loop, daemon=True)
+        self.learner_thread.start()
+        logger.info("Online learner started")
+    
+    def stop(self):
+        """Stop background fine-tuning"""
+        self.is_running = False
+        self._stop_event.set()
+        if self.learner_thread:
+            self.learner_thread.join(timeout=5)
+        logger.info("Online learner stopped")
@@ -3,7 +3,6 @@ Network Traffic Optimization Module
 Implements bandwidth allocation and routing optimization algorithms
 """
 import numpy as np
-import pandas as pd
 from config import OPTIMIZATION_CONFIG, NETWORK_CONFIG
 import logging
 
@@ -11,199 +10,608 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def water_fill(lower, upper, weights, budget):
+    """Weighted max-min fair fill of `budget` between per-route bounds
+    
+    Returns clip(weights * level, lower, upper) with the single water level
+    at which the allocation sums to `budget`, found in O(n log n) by sorting
+    the levels where each route becomes active or saturated. Budgets outside
+    [sum(lower), sum(upper)] scale `lower` down or return `upper`.
+    """
+    lower_total = lower.sum()
+    if budget <= lower_total:
+        return lower * (budget / lower_total) if lower_total > 0 else np.zeros_like(lower)
+    if budget >= upper.sum():
+        return upper.copy()
+    
+    # Fill level is piecewise linear in the water level: each route adds
+    # slope weights[i] between lower[i]/weights[i] and upper[i]/weights[i]
+    points = np.concatenate([lower / weights, upper / weights])
+    deltas = np.concatenate([weights, -weights])
+    order = np.argsort(points, kind='stable')
+    points, deltas = points[order], deltas[order]
+    
+    slopes = np.cumsum(deltas)
+    filled = lower_total + np.concatenate([[0.0], np.cumsum(slopes[:-1] * np.diff(points))])
+    
+    k = np.searchsorted(filled, budget, side='right') - 1
+    level = points[k] + (budget - filled[k]) / slopes[k] if slopes[k] > 0 else points[k]
+    return np.clip(weights * level, lower, upper)
+
+
+def water_fill_grouped(lower, upper, weights, budgets, groups):
+    """water_fill for many independent groups in one vectorized pass
+    
+    `groups` assigns each element to a group in range(len(budgets)); every
+    group is filled to its own budget with its own water level.
+    """
+    if len(lower) == 0:
+        return np.zeros(0)
+    
+    n_groups = len(budgets)
+    lower_total = np.bincount(groups, lower, minlength=n_groups)
+    upper_total = np.bincount(groups, upper, minlength=n_groups)
+    
+    # Breakpoints sorted within each group
+    points = np.concatenate([lower / weights, upper / weights])
+    deltas = np.concatenate([weights, -weights])
+    owner = np.concatenate([groups, groups])
+    order = np.lexsort((points, owner))
+    points, deltas, owner = points[order], deltas[order], owner[order]
+    starts = np.searchsorted(owner, np.arange(n_groups))
+    
+    # Segmented prefix sums: subtract each group's running total at its start
+    totals = np.cumsum(deltas)
+    slopes = totals - np.concatenate([[0.0], totals])[starts][owner]
+    areas = np.concatenate([[0.0], slopes[:-1] * np.diff(points) * (owner[1:] == owner[:-1])])
+    areas = np.cumsum(areas)
+    filled = lower_total[owner] + areas - areas[starts][owner]
+    
+    # Last breakpoint of each group whose fill does not exceed the budget
+    reached = np.bincount(owner, filled <= budgets[owner], minlength=n_groups).astype(int)
+    k = np.clip(starts + reached - 1, 0, len(points) - 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        level = np.where(slopes[k] > 0, points[k] + (budgets - filled[k]) / slopes[k], points[k])
+    allocation = np.clip(weights * level[groups], lower, upper)
+    
+    # Budgets outside [sum(lower), sum(upper)]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(lower_total > 0, budgets / lower_total, 0.0)
+    starved = (budgets <= lower_total)[groups]
+    allocation[starved] = (lower * scale[groups])[starved]
+    saturated = (budgets >= upper_total)[groups] & ~starved
+    allocation[saturated] = upper[saturated]
+    return allocation
+
+
+class AllocationHistory:
+    """Fixed-size ring buffers of allocations and traffic (entries x routes)
+    
+    Per-entry utilization and allocation change are computed once on append
+    and kept as running sums over the last `window` entries, so metrics()
+    is O(1).
+    """
+    
+    def __init__(self, capacity, num_routes, total_bandwidth, window=10):
+        self.capacity = capacity
+        self.total_bandwidth = total_bandwidth
+        self.window = window
+        self.allocation = np.zeros((capacity, num_routes))
+        self.current_traffic = np.zeros((capacity, num_routes))
+        self.predicted_traffic = np.zeros((capacity, num_routes))
+        self.utilization = np.zeros(capacity)
+        self.change = np.zeros(capacity)
+        self.position = 0  # Next slot to write
+        self.count = 0
+        self.utilization_sum = 0.0
+        self.change_sum = 0.0
+    
+    def __len__(self):
+        return self.count
+    
+    def append(self, allocation, current_traffic, predicted_traffic):
+        """Record one optimization"""
+        i = self.position
+        previous = (i - 1) % self.capacity
+        
+        self.allocation[i] = allocation
+        self.current_traffic[i] = current_traffic
+        self.predicted_traffic[i] = predicted_traffic
+        
+        if self.total_bandwidth > 0:
+            self.utilization[i] = self.current_traffic[i].sum() / self.total_bandwidth * 100
+        else:
+            self.utilization[i] = 0
+        self.change[i] = np.abs(self.allocation[i] - self.allocation[previous]).sum() if self.count else 0.0
+        
+        # Slide the metrics window: add the new entry, drop the one leaving it
+        self.utilization_sum += self.utilization[i]
+        if self.count >= 1:
+            self.change_sum += self.change[i]
+        if self.count >= self.window:
+            leaving = (i - self.window) % self.capacity
+            self.utilization_sum -= self.utilization[leaving]
+            # The oldest in-window entry's change refers to an entry outside it
+            self.change_sum -= self.change[(leaving + 1) % self.capacity]
+        
+        self.position = (i + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+    
+    def recent(self, n=None):
+        """Last n entries (default: all), oldest first"""
+        n = self.count if n is None else min(n, self.count)
+        index = (self.position - n + np.arange(n)) % self.capacity
+        return {
+            'allocation': self.allocation[index],
+            'current_traffic': self.current_traffic[index],
+            'predicted_traffic': self.predicted_traffic[index]
+        }
+    
+    def metrics(self):
+        """Average utilization and allocation change over the window"""
+        if self.count < 2:
+            return None
+        
+        in_window = min(self.count, self.window)
+        return {
+            'average_utilization': float(self.utilization_sum / in_window),
+            'average_change': float(self.change_sum / (in_window - 1))
+        }
+
+
 class NetworkOptimizer:
-    """Optimizes network bandwidth allocation based on predictions"""
+    """Optimizes network bandwidth allocation based on predictions
+    
+    The allocation algorithms work on NumPy vectors indexed by route position
+    (see `route_index`); the dict-based methods are adapters over them.
+    """
     
     def __init__(self):
         self.total_bandwidth = NETWORK_CONFIG['total_bandwidth']
         self.num_routes = NETWORK_CONFIG['num_routes']
         self.route_names = NETWORK_CONFIG['route_names']
+        self.route_index = {route: i for i, route in enumerate(self.route_names)}
         self.algorithm = OPTIMIZATION_CONFIG['optimization_algorithm']
-        self.current_allocation = self._initialize_allocation()
-        self.allocation_history = []
+        
+        # Per-route constraints
+        n = len(self.route_names)
+        self.min_bandwidth = np.full(n, float(OPTIMIZATION_CONFIG['min_bandwidth']))
+        self.max_bandwidth = np.full(n, float(OPTIMIZATION_CONFIG['max_bandwidth']))
+        self.threshold_low = np.full(n, OPTIMIZATION_CONFIG['bandwidth_threshold_low'])
+        self.threshold_high = np.full(n, OPTIMIZATION_CONFIG['bandwidth_threshold_high'])
+        self.weights = self.to_vector(OPTIMIZATION_CONFIG['fairness_weights'] or {}, default=1.0)
+        
+        self.allocation = self._initial_vector()
+        self.allocation_history = AllocationHistory(
+            OPTIMIZATION_CONFIG['history_size'],
+            len(self.route_names),
+            self.total_bandwidth,
+            OPTIMIZATION_CONFIG['metrics_window']
+        )
+        self.flow_allocator = None  # Built on first use of 'multi_commodity'
+        self.allocation_tree = None  # Built on first use of 'hierarchical'
+        self.policy_warning_logged = False
+        
+        # Change detection against the last solve
+        self.change_tolerance = OPTIMIZATION_CONFIG['change_tolerance']
+        self.solved_inputs = None  # (current, predicted, algorithm)
+        self.settled = False  # Last solve left the allocation unchanged
+        self.solve_stats = {'full': 0, 'partial': 0, 'skipped': 0}
+    
+    def _initial_vector(self):
+        """Equal bandwidth allocation as a vector"""
+        return np.full(len(self.route_names), self.total_bandwidth / self.num_routes)
     
     def _initialize_allocation(self):
         """Initialize equal bandwidth allocation"""
-        bandwidth_per_route = self.total_bandwidth / self.num_routes
-        return {route: bandwidth_per_route for route in self.route_names}
+        return self.to_dict(self._initial_vector())
     
-    def optimize_proportional(self, current_traffic, predicted_traffic):
-        """Proportional allocation based on current and predicted traffic"""
-        # Combine current and predicted traffic
-        total_traffic = {}
-        for route in self.route_names:
-            current = current_traffic.get(route, 0)
-            predicted = predicted_traffic.get(route, 0)
-            total_traffic[route] = (current + predicted) / 2
-        
-        # Calculate total demand
-        total_demand = sum(total_traffic.values())
+    def to_vector(self, values, default=0.0):
+        """Route-keyed dict -> vector in route order"""
+        return np.fromiter(
+            (values.get(route, default) for route in self.route_names),
+            dtype=float,
+            count=len(self.route_names)
+        )
+    
+    def to_dict(self, vector):
+        """Vector in route order -> route-keyed dict"""
+        return dict(zip(self.route_names, vector.tolist()))
+    
+    @property
+    def current_allocation(self):
+        return self.to_dict(self.allocation)
+    
+    @current_allocation.setter
+    def current_allocation(self, allocation):
+        self.allocation = self.to_vector(allocation, default=self.total_bandwidth / self.num_routes)
+    
+    def _total(self, total_bandwidth):
+        """Total bandwidth, or per-scenario totals shaped to broadcast over routes"""
+        if total_bandwidth is None:
+            return self.total_bandwidth
+        return np.asarray(total_bandwidth, dtype=float).reshape(-1, 1)
+    
+    def _normalize(self, allocation, total_bandwidth):
+        """Scale down to the available bandwidth if over-allocated"""
+        total_allocated = allocation.sum(axis=-1, keepdims=True)
+        return np.where(
+            total_allocated > total_bandwidth,
+            allocation * (total_bandwidth / np.maximum(total_allocated, 1e-12)),
+            allocation
+        )
+    
+    # The allocate_* methods take (routes,) vectors or (scenarios x routes)
+    # matrices; `total_bandwidth` optionally overrides the total per scenario.
+    
+    def allocate_proportional(self, current_traffic, predicted_traffic, total_bandwidth=None):
+        """Proportional allocation over traffic vectors"""
+        total = self._total(total_bandwidth)
         
-        if total_demand == 0:
-            return self._initialize_allocation()
+        # Combine current and predicted traffic
+        demand = (current_traffic + predicted_traffic) / 2
+        total_demand = demand.sum(axis=-1, keepdims=True)
         
         # Allocate proportionally
-        allocation = {}
-        for route in self.route_names:
-            proportion = total_traffic[route] / total_demand
-            allocation[route] = max(
-                OPTIMIZATION_CONFIG['min_bandwidth'],
-                min(
-                    OPTIMIZATION_CONFIG['max_bandwidth'],
-                    self.total_bandwidth * proportion
-                )
-            )
+        allocation = np.clip(
+            total * demand / np.where(total_demand == 0, 1.0, total_demand),
+            self.min_bandwidth,
+            self.max_bandwidth
+        )
         
-        # Normalize to ensure total doesn't exceed available bandwidth
-        total_allocated = sum(allocation.values())
-        if total_allocated > self.total_bandwidth:
-            scale_factor = self.total_bandwidth / total_allocated
-            allocation = {k: v * scale_factor for k, v in allocation.items()}
-        
-        return allocation
+        # Normalize to ensure total doesn't exceed available bandwidth;
+        # without any demand, split equally
+        return np.where(
+            total_demand == 0,
+            np.broadcast_to(total / self.num_routes, allocation.shape),
+            self._normalize(allocation, total)
+        )
     
-    def optimize_adaptive(self, current_traffic, predicted_traffic, utilization_history=None):
-        """Adaptive allocation with load balancing"""
-        allocation = {}
-        threshold_low = OPTIMIZATION_CONFIG['bandwidth_threshold_low']
-        threshold_high = OPTIMIZATION_CONFIG['bandwidth_threshold_high']
+    def allocate_adaptive(self, current_traffic, predicted_traffic, total_bandwidth=None):
+        """Adaptive allocation with load balancing over traffic vectors"""
+        total = self._total(total_bandwidth)
+        avg_traffic = (current_traffic + predicted_traffic) / 2
+        current_alloc = self.allocation
         
         # Calculate utilization for each route
-        route_utilization = {}
-        for route in self.route_names:
-            current = current_traffic.get(route, 0)
-            predicted = predicted_traffic.get(route, 0)
-            avg_traffic = (current + predicted) / 2
-            current_alloc = self.current_allocation.get(route, self.total_bandwidth / self.num_routes)
-            
-            if current_alloc > 0:
-                utilization = avg_traffic / current_alloc
-            else:
-                utilization = 1.0
-            
-            route_utilization[route] = utilization
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.where(current_alloc > 0, avg_traffic / current_alloc, 1.0)
         
         # Identify overloaded and underloaded routes
-        overloaded = [r for r, u in route_utilization.items() if u > threshold_high]
-        underloaded = [r for r, u in route_utilization.items() if u < threshold_low]
-        
-        # Start with current allocation
-        allocation = self.current_allocation.copy()
+        overloaded = utilization > self.threshold_high
+        underloaded = utilization < self.threshold_low
         
         # Redistribute bandwidth from underloaded to overloaded routes
-        if overloaded and underloaded:
-            total_underutilized = sum(
-                allocation[r] * (threshold_low - route_utilization[r])
-                for r in underloaded
-                if route_utilization[r] < threshold_low
-            )
+        # (masked whole-vector arithmetic is cheaper than boolean indexing)
+        num_overloaded = np.count_nonzero(overloaded, axis=-1)[..., None]
+        slack = np.where(underloaded, current_alloc * (self.threshold_low - utilization), 0.0)
+        total_underutilized = slack.sum(axis=-1, keepdims=True)
+        total_overload = np.where(
+            overloaded, avg_traffic - current_alloc * self.threshold_high, 0.0
+        ).sum(axis=-1, keepdims=True)
+        redistribute = (
+            (num_overloaded > 0) & underloaded.any(axis=-1, keepdims=True)
+            & (total_underutilized > 0) & (total_overload > 0)
+        )
+        redistribution = np.minimum(total_underutilized, total_overload)
+        
+        # Reduce from underloaded
+        allocation = np.where(
+            redistribute & underloaded,
+            np.maximum(self.min_bandwidth, current_alloc - slack * 0.5),
+            current_alloc
+        )
+        
+        # Add to overloaded
+        needed = avg_traffic / self.threshold_high - allocation
+        raised = np.minimum(
+            self.max_bandwidth,
+            allocation + np.minimum(needed, redistribution / np.maximum(num_overloaded, 1))
+        )
+        allocation = np.where(redistribute & overloaded & (needed > 0), raised, allocation)
+        
+        # Ensure constraints
+        allocation = np.clip(allocation, self.min_bandwidth, self.max_bandwidth)
+        
+        # Normalize, distributing any remaining bandwidth equally
+        total_allocated = allocation.sum(axis=-1, keepdims=True)
+        return np.where(
+            total_allocated > total,
+            allocation * (total / total_allocated),
+            allocation + (total - total_allocated) / self.num_routes
+        )
+    
+    def allocate_ml_based(self, current_traffic, predicted_traffic, ml_model=None, total_bandwidth=None):
+        """Allocation by the trained RL policy over traffic vectors
+        
+        `ml_model` overrides the policy trained offline (RL_CONFIG['policy_path']);
+        without a usable policy this falls back to adaptive allocation.
+        """
+        from rl_allocator import AllocationPolicy
+        
+        policy = ml_model or AllocationPolicy.load_cached()
+        if policy is None or policy.num_routes != len(self.route_names):
+            if not self.policy_warning_logged:
+                logger.warning("No RL allocation policy for these routes; using adaptive allocation")
+                self.policy_warning_logged = True
+            return self.allocate_adaptive(current_traffic, predicted_traffic, total_bandwidth)
+        
+        return policy.allocate(
+            current_traffic,
+            predicted_traffic,
+            self.allocation,
+            self._total(total_bandwidth),
+            self.min_bandwidth,
+            self.max_bandwidth
+        )
+    
+    def allocate_max_min_fair(self, current_traffic, predicted_traffic, total_bandwidth=None):
+        """Weighted max-min fair allocation of predicted demand (water-filling)
+        
+        Demand is met fairly up to each route's bounds; bandwidth left once all
+        demand is met is water-filled into the remaining headroom, so the
+        result always uses the full link and is stable for steady demand.
+        """
+        lower = np.minimum(self.min_bandwidth, self.max_bandwidth)
+        demand = np.clip(predicted_traffic, lower, self.max_bandwidth)
+        
+        if demand.ndim == 1 and total_bandwidth is None:
+            if demand.sum() >= self.total_bandwidth:
+                return water_fill(lower, demand, self.weights, self.total_bandwidth)
             
-            total_overload = sum(
-                (current_traffic.get(r, 0) + predicted_traffic.get(r, 0)) / 2 - allocation[r] * threshold_high
-                for r in overloaded
+            headroom = self.max_bandwidth - demand
+            return demand + water_fill(
+                np.zeros_like(headroom), headroom, self.weights, self.total_bandwidth - demand.sum()
             )
-            
-            # Redistribute
-            if total_underutilized > 0 and total_overload > 0:
-                redistribution = min(total_underutilized, total_overload)
-                
-                # Reduce from underloaded
-                for route in underloaded:
-                    if route_utilization[route] < threshold_low:
-                        reduction = allocation[route] * (threshold_low - route_utilization[route]) * 0.5
-                        allocation[route] = max(OPTIMIZATION_CONFIG['min_bandwidth'], allocation[route] - reduction)
-                
-                # Add to overloaded
-                for route in overloaded:
-                    needed = ((current_traffic.get(route, 0) + predicted_traffic.get(route, 0)) / 2) / threshold_high - allocation[route]
-                    if needed > 0:
-                        allocation[route] = min(
-                            OPTIMIZATION_CONFIG['max_bandwidth'],
-                            allocation[route] + min(needed, redistribution / len(overloaded))
-                        )
         
-        # Ensure constraints
-        for route in self.route_names:
-            allocation[route] = max(
-                OPTIMIZATION_CONFIG['min_bandwidth'],
-                min(OPTIMIZATION_CONFIG['max_bandwidth'], allocation[route])
+        # One group per scenario; each fills demand or headroom as above
+        demand = np.atleast_2d(demand)
+        n_scenarios, num_routes = demand.shape
+        budgets = np.broadcast_to(self._total(total_bandwidth), (n_scenarios, 1))[:, 0]
+        demand_total = demand.sum(axis=1)
+        over = np.repeat(demand_total >= budgets, num_routes).reshape(demand.shape)
+        fill = water_fill_grouped(
+            np.where(over, lower, 0.0).ravel(),
+            np.where(over, demand, self.max_bandwidth - demand).ravel(),
+            np.broadcast_to(self.weights, demand.shape).ravel(),
+            np.where(demand_total >= budgets, budgets, budgets - demand_total),
+            np.repeat(np.arange(n_scenarios), num_routes)
+        ).reshape(demand.shape)
+        return np.where(over, fill, demand + fill)
+    
+    def _build_flow_allocator(self, demand_tolerance=None):
+        from topology import NetworkTopology, MultiCommodityAllocator
+        return MultiCommodityAllocator(
+            NetworkTopology.from_config(self.route_names),
+            weights=self.weights,
+            demand_tolerance=demand_tolerance
+        )
+    
+    def _build_allocation_tree(self):
+        from hierarchy import AllocationTree
+        return AllocationTree.from_config(self.route_names, self.total_bandwidth)
+    
+    def allocate_multi_commodity(self, current_traffic, predicted_traffic):
+        """Path-level allocation of predicted demand under shared link capacities"""
+        if self.flow_allocator is None:
+            self.flow_allocator = self._build_flow_allocator()
+        
+        return self.flow_allocator.allocate(predicted_traffic, self.min_bandwidth, self.max_bandwidth)
+    
+    def allocate_hierarchical(self, current_traffic, predicted_traffic):
+        """Allocation down the tree of capacity pools (regions, sites, uplinks)"""
+        if self.allocation_tree is None:
+            self.allocation_tree = self._build_allocation_tree()
+        
+        return self.allocation_tree.allocate(
+            predicted_traffic, self.min_bandwidth, self.max_bandwidth, self.weights
+        )
+    
+    def evaluate_scenarios(self, demand, predicted=None, total_bandwidth=None, algorithm=None):
+        """What-if allocation for a batch of demand scenarios, without side effects
+        
+        `demand` is a (scenarios x routes) traffic matrix; `predicted` defaults
+        to `demand` and `total_bandwidth` (scalar or one per scenario) to the
+        link total. Every algorithm but multi_commodity runs as one vectorized
+        call (from the current allocation where the algorithm uses it);
+        multi_commodity solves scenario by scenario. Topology and hierarchy
+        solves use private allocators, so the live optimizer state is never
+        touched.
+        Returns a dict of (scenarios x routes) and per-scenario arrays.
+        """
+        algorithm = algorithm or self.algorithm
+        demand = np.atleast_2d(np.asarray(demand, dtype=float))
+        predicted = demand if predicted is None else np.atleast_2d(np.asarray(predicted, dtype=float))
+        if demand.shape[1] != self.num_routes or predicted.shape != demand.shape:
+            raise ValueError(f"Expected (scenarios x {self.num_routes}) demand and predictions")
+        totals = np.broadcast_to(
+            self._total(self.total_bandwidth if total_bandwidth is None else total_bandwidth),
+            (len(demand), 1)
+        )
+        
+        if algorithm in ('proportional', 'adaptive', 'ml_based', 'max_min_fair'):
+            allocation = getattr(self, f'allocate_{algorithm}')(demand, predicted, total_bandwidth=totals)
+        elif algorithm == 'multi_commodity':
+            if total_bandwidth is not None:
+                raise ValueError("multi_commodity capacities come from TOPOLOGY_CONFIG; "
+                                 "total_bandwidth cannot be overridden")
+            # Zero tolerance: only components whose demand differs are re-solved
+            allocator = self._build_flow_allocator(demand_tolerance=0)
+            allocation = np.stack([
+                allocator.allocate(row, self.min_bandwidth, self.max_bandwidth) for row in predicted
+            ])
+        elif algorithm == 'hierarchical':
+            allocation = self._build_allocation_tree().allocate_batch(
+                predicted, self.min_bandwidth, self.max_bandwidth, self.weights, totals
             )
+        else:
+            raise ValueError(f"Unknown optimization algorithm: {algorithm}")
         
-        # Normalize
-        total_allocated = sum(allocation.values())
-        if total_allocated > self.total_bandwidth:
-            scale_factor = self.total_bandwidth / total_allocated
-            allocation = {k: v * scale_factor for k, v in allocation.items()}
-        elif total_allocated < self.total_bandwidth:
-            # Distribute remaining bandwidth
-            remaining = self.total_bandwidth - total_allocated
-            per_route = remaining / self.num_routes
-            allocation = {k: v + per_route for k, v in allocation.items()}
+        allocation = np.broadcast_to(allocation, demand.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.where(allocation > 0, demand / allocation * 100, 0.0)
+        total_traffic = demand.sum(axis=1)
+        total = totals[:, 0]
         
-        return allocation
+        return {
+            'algorithm': algorithm,
+            'allocation': allocation,
+            'utilization': utilization,
+            'available': np.maximum(0, allocation - demand),
+            'total_traffic': total_traffic,
+            'total_utilization': np.where(total > 0, total_traffic / np.where(total > 0, total, 1) * 100, 0.0),
+            'overloaded_routes': (demand > allocation).sum(axis=1),
+            'unserved': np.maximum(0, demand - allocation).sum(axis=1)
+        }
+    
+    def optimize_proportional(self, current_traffic, predicted_traffic):
+        """Proportional allocation based on current and predicted traffic"""
+        return self.to_dict(self.allocate_proportional(
+            self.to_vector(current_traffic), self.to_vector(predicted_traffic)
+        ))
+    
+    def optimize_adaptive(self, current_traffic, predicted_traffic, utilization_history=None):
+        """Adaptive allocation with load balancing"""
+        return self.to_dict(self.allocate_adaptive(
+            self.to_vector(current_traffic), self.to_vector(predicted_traffic)
+        ))
     
     def optimize_ml_based(self, current_traffic, predicted_traffic, ml_model=None):
-        """ML-based optimization (placeholder for reinforcement learning)"""
-        # For now, use adaptive with ML predictions
-        # In full implementation, this would use RL to learn optimal allocations
-        return self.optimize_adaptive(current_traffic, predicted_traffic)
+        """ML-based optimization with the trained RL allocation policy"""
+        return self.to_dict(self.allocate_ml_based(
+            self.to_vector(current_traffic), self.to_vector(predicted_traffic), ml_model
+        ))
     
-    def optimize(self, current_traffic, predicted_traffic, **kwargs):
-        """Main optimization function"""
-        if self.algorithm == 'proportional':
-            allocation = self.optimize_proportional(current_traffic, predicted_traffic)
-        elif self.algorithm == 'ml_based':
-            allocation = self.optimize_ml_based(
-                current_traffic, 
-                predicted_traffic, 
-                kwargs.get('ml_model')
-            )
-        else:  # adaptive
-            allocation = self.optimize_adaptive(
-                current_traffic, 
-                predicted_traffic,
-                kwargs.get('utilization_history')
-            )
+    def optimize_max_min_fair(self, current_traffic, predicted_traffic):
+        """Weighted max-min fair allocation based on predicted traffic"""
+        return self.to_dict(self.allocate_max_min_fair(
+            self.to_vector(current_traffic), self.to_vector(predicted_traffic)
+        ))
+    
+    def optimize_multi_commodity(self, current_traffic, predicted_traffic):
+        """Topology-aware allocation based on predicted traffic"""
+        return self.to_dict(self.allocate_multi_commodity(
+            self.to_vector(current_traffic), self.to_vector(predicted_traffic)
+        ))
+    
+    def optimize_hierarchical(self, current_traffic, predicted_traffic):
+        """Hierarchical pool allocation based on predicted traffic"""
+        return self.to_dict(self.allocate_hierarchical(
+            self.to_vector(current_traffic), self.to_vector(predicted_traffic)
+        ))
+    
+    def _within_tolerance(self, values, reference):
+        """Every element within change_tolerance (relative) of the reference"""
+        bound = self.change_tolerance * np.maximum(np.abs(reference), 1.0)
+        return bool(np.all(np.abs(values - reference) <= bound))
+    
+    def _can_skip(self, current_traffic, predicted_traffic):
+        """Inputs unchanged since a solve that had already converged"""
+        if self.solved_inputs is None or not self.settled:
+            return False
+        
+        solved_current, solved_predicted, solved_algorithm = self.solved_inputs
+        return (
+            solved_algorithm == self.algorithm
+            and self._within_tolerance(current_traffic, solved_current)
+            and self._within_tolerance(predicted_traffic, solved_predicted)
+        )
+    
+    def _reused_work(self):
+        """Components / pool groups the incremental allocators have skipped so far"""
+        reused = 0
+        if self.flow_allocator is not None:
+            reused += self.flow_allocator.stats['components_reused']
+        if self.allocation_tree is not None:
+            reused += self.allocation_tree.stats['groups_skipped']
+        return reused
+    
+    def optimize_vector(self, current_traffic, predicted_traffic, **kwargs):
+        """Main optimization function over traffic vectors in route order
+        
+        Returns the cached allocation while every route's traffic stays within
+        `change_tolerance` of the last solve.
+        """
+        current_traffic = np.asarray(current_traffic, dtype=float)
+        predicted_traffic = np.asarray(predicted_traffic, dtype=float)
+        
+        if self._can_skip(current_traffic, predicted_traffic):
+            self.solve_stats['skipped'] += 1
+            allocation = self.allocation.copy()
+        else:
+            previous = self.allocation
+            reused = self._reused_work()
+            allocation = self._solve(current_traffic, predicted_traffic, **kwargs)
+            
+            self.solve_stats['partial' if self._reused_work() > reused else 'full'] += 1
+            self.solved_inputs = (current_traffic.copy(), predicted_traffic.copy(), self.algorithm)
+            self.settled = self._within_tolerance(allocation, previous)
         
         # Update current allocation
-        self.current_allocation = allocation
+        self.allocation = allocation
         
         # Record history
-        self.allocation_history.append({
-            'allocation': allocation.copy(),
-            'current_traffic': current_traffic.copy(),
-            'predicted_traffic': predicted_traffic.copy()
-        })
+        self.allocation_history.append(allocation, current_traffic, predicted_traffic)
         
-        # Keep only recent history
-        if len(self.allocation_history) > 1000:
-            self.allocation_history = self.allocation_history[-1000:]
+        return allocation
+    
+    def _solve(self, current_traffic, predicted_traffic, **kwargs):
+        """Run the configured algorithm"""
+        if self.algorithm == 'proportional':
+            allocation = self.allocate_proportional(current_traffic, predicted_traffic)
+        elif self.algorithm == 'max_min_fair':
+            allocation = self.allocate_max_min_fair(current_traffic, predicted_traffic)
+        elif self.algorithm == 'multi_commodity':
+            allocation = self.allocate_multi_commodity(current_traffic, predicted_traffic)
+        elif self.algorithm == 'hierarchical':
+            allocation = self.allocate_hierarchical(current_traffic, predicted_traffic)
+        elif self.algorithm == 'ml_based':
+            allocation = self.allocate_ml_based(
+                current_traffic,
+                predicted_traffic,
+                kwargs.get('ml_model')
+            )
+        else:  # adaptive
+            allocation = self.allocate_adaptive(current_traffic, predicted_traffic)
         
         return allocation
     
+    def optimize(self, current_traffic, predicted_traffic, **kwargs):
+        """Main optimization function"""
+        return self.to_dict(self.optimize_vector(
+            self.to_vector(current_traffic),
+            self.to_vector(predicted_traffic),
+            **kwargs
+        ))
+    
+    def utilization_vector(self, traffic):
+        """Per-route utilization (%) of the current allocation"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.allocation > 0, traffic / self.allocation * 100, 0.0)
+    
     def get_utilization_stats(self, current_traffic):
         """Calculate utilization statistics"""
-        stats = {}
-        total_utilized = 0
+        traffic = self.to_vector(current_traffic)
+        utilization = self.utilization_vector(traffic)
+        available = np.maximum(0, self.allocation - traffic)
         
-        for route in self.route_names:
-            traffic = current_traffic.get(route, 0)
-            allocated = self.current_allocation.get(route, 0)
-            
-            if allocated > 0:
-                utilization = (traffic / allocated) * 100
-            else:
-                utilization = 0
-            
-            stats[route] = {
-                'traffic': traffic,
-                'allocated': allocated,
-                'utilization': utilization,
-                'available': max(0, allocated - traffic)
+        stats = {
+            route: {
+                'traffic': t,
+                'allocated': a,
+                'utilization': u,
+                'available': v
             }
-            
-            total_utilized += traffic
+            for route, t, a, u, v in zip(
+                self.route_names,
+                traffic.tolist(),
+                self.allocation.tolist(),
+                utilization.tolist(),
+                available.tolist()
+            )
+        }
         
+        total_utilized = float(traffic.sum())
         stats['total'] = {
             'traffic': total_utilized,
             'allocated': self.total_bandwidth,
@@ -215,32 +623,15 @@ class NetworkOptimizer:
     
     def get_optimization_metrics(self):
         """Calculate optimization performance metrics"""
-        if len(self.allocation_history) < 2:
+        metrics = self.allocation_history.metrics()
+        if metrics is None:
             return None
         
-        recent = self.allocation_history[-10:]  # Last 10 optimizations
-        
-        # Calculate average utilization
-        avg_utilizations = []
-        for entry in recent:
-            stats = self.get_utilization_stats(entry['current_traffic'])
-            avg_utilizations.append(stats['total']['utilization'])
-        
-        avg_utilization = np.mean(avg_utilizations) if avg_utilizations else 0
-        
-        # Calculate allocation changes (stability)
-        allocation_changes = []
-        for i in range(1, len(recent)):
-            prev = recent[i-1]['allocation']
-            curr = recent[i]['allocation']
-            change = sum(abs(curr.get(r, 0) - prev.get(r, 0)) for r in self.route_names)
-            allocation_changes.append(change)
-        
-        avg_change = np.mean(allocation_changes) if allocation_changes else 0
+        avg_utilization = metrics['average_utilization']
         
         return {
             'average_utilization': avg_utilization,
-            'allocation_stability': 1 / (1 + avg_change),  # Higher is more stable
-            'total_bandwidth_used': avg_utilization * self.total_bandwidth / 100
+            'allocation_stability': 1 / (1 + metrics['average_change']),  # Higher is more stable
+            'total_bandwidth_used': avg_utilization * self.total_bandwidth / 100,
+            'solves': dict(self.solve_stats)
         }
-
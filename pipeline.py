@@ -0,0 +1,129 @@
+"""
+Monitoring Pipeline
+Bounded queues and worker stages that let collection, persistence,
+prediction and optimization run concurrently, each at its own pace
+"""
+import time
+import threading
+from collections import deque
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StageQueue:
+    """Bounded FIFO between stages
+    
+    put() never blocks the producer: when the queue is full the oldest item
+    is dropped (and counted), so a queue of size 1 always holds the latest.
+    """
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.ready = threading.Condition()
+        self.enqueued = 0
+        self.dropped = 0
+    
+    def put(self, item):
+        with self.ready:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.enqueued += 1
+            self.ready.notify()
+    
+    def get_all(self, timeout=None):
+        """Wait up to `timeout` for items, then take all of them (oldest first)"""
+        with self.ready:
+            if not self.items:
+                self.ready.wait(timeout)
+            items = list(self.items)
+            self.items.clear()
+        return items
+    
+    def wake(self):
+        with self.ready:
+            self.ready.notify_all()
+    
+    def __len__(self):
+        return len(self.items)
+
+
+class PipelineStage:
+    """Worker thread handing everything queued to `handler` as one list
+    
+    Handlers see items oldest first and may use only the newest. With
+    `drain_on_stop`, items still queued at shutdown are processed before
+    the worker exits. Batches taking longer than `budget` seconds are
+    counted as budget misses.
+    """
+    
+    def __init__(self, name, handler, maxsize, drain_on_stop=False, budget=None):
+        self.name = name
+        self.handler = handler
+        self.queue = StageQueue(maxsize)
+        self.drain_on_stop = drain_on_stop
+        self.budget = budget
+        self.is_running = False
+        self.worker_thread = None
+        self.stats = {
+            'batches': 0,
+            'items': 0,
+            'errors': 0,
+            'budget_misses': 0,
+            'last_latency_ms': None,
+            'max_latency_ms': 0.0
+        }
+    
+    def _process(self, items):
+        started = time.perf_counter()
+        try:
+            self.handler(items)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Error in {self.name} stage: {e}")
+        
+        latency = (time.perf_counter() - started) * 1000
+        self.stats['batches'] += 1
+        self.stats['items'] += len(items)
+        self.stats['last_latency_ms'] = latency
+        self.stats['max_latency_ms'] = max(self.stats['max_latency_ms'], latency)
+        if self.budget is not None and latency > self.budget * 1000:
+            self.stats['budget_misses'] += 1
+            logger.warning(f"{self.name} stage took {latency:.0f} ms (budget {self.budget * 1000:.0f} ms)")
+    
+    def run(self):
+        while self.is_running:
+            items = self.queue.get_all(timeout=1.0)
+            if items:
+                self._process(items)
+        
+        if self.drain_on_stop:
+            items = self.queue.get_all(timeout=0)
+            if items:
+                self._process(items)
+    
+    def start(self):
+        self.is_running = True
+        self.worker_thread = threading.Thread(target=self.run, name=f"{self.name}-stage", daemon=True)
+        self.worker_thread.start()
+    
+    def stop(self, timeout=5):
+        self.is_running = False
+        self.queue.wake()
+        if self.worker_thread:
+            self.worker_thread.join(timeout=timeout)
+    
+    def status(self):
+        """Queue depth, drops and handler latency"""
+        return {
+            'budget_ms': None if self.budget is None else self.budget * 1000,
+            'queue_depth': len(self.queue),
+            'queue_size': self.queue.maxsize,
+            'enqueued': self.queue.enqueued,
+            'dropped': self.queue.dropped,
+            **self.stats
+        }
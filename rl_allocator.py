@@ -0,0 +1,244 @@
+"""
+Reinforcement-Learning Bandwidth Allocator
+Batched NumPy traffic environment built on the collector's simulation model,
+a linear-softmax allocation policy, and an evolution-strategies trainer that
+evaluates the whole perturbed population across all environments at once
+"""
+import os
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from data_collector import NetworkDataCollector
+from model_registry import load_cached
+from config import RL_CONFIG, NETWORK_CONFIG, OPTIMIZATION_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def shares_to_allocation(shares, total_bandwidth, lower, upper):
+    """Bandwidth shares -> allocation within bounds (same rule as 'proportional')"""
+    allocation = np.clip(shares * total_bandwidth, lower, upper)
+    total = allocation.sum(axis=-1, keepdims=True)
+    return np.where(total > total_bandwidth, allocation * (total_bandwidth / total), allocation)
+
+
+class AllocationPolicy:
+    """Linear-softmax policy: bandwidth shares from current traffic,
+    predicted traffic and the previous allocation (all relative to the total)
+    """
+    
+    def __init__(self, weights):
+        self.weights = np.asarray(weights, dtype=float)
+    
+    @property
+    def num_routes(self):
+        return self.weights.shape[1]
+    
+    @staticmethod
+    def num_features(num_routes):
+        return 4 * num_routes + 1
+    
+    @staticmethod
+    def features(current_traffic, predicted_traffic, previous_allocation, total_bandwidth):
+        """(..., routes) inputs -> (..., features) observation
+        
+        Traffic and allocation relative to the total bandwidth, plus the log of
+        each route's predicted share (so shares proportional to the prediction
+        are a linear policy) and a bias.
+        """
+        current, predicted, previous = np.broadcast_arrays(
+            current_traffic, predicted_traffic, previous_allocation
+        )
+        predicted_share = predicted / np.maximum(predicted.sum(axis=-1, keepdims=True), 1e-9)
+        return np.concatenate([
+            current / total_bandwidth,
+            predicted / total_bandwidth,
+            previous / total_bandwidth,
+            np.log(predicted_share + 1e-3),
+            np.ones(current.shape[:-1] + (1,))
+        ], axis=-1)
+    
+    @staticmethod
+    def shares(features, weights):
+        """Softmax shares; `weights` may carry a leading population axis"""
+        if weights.ndim == 3:
+            logits = np.einsum('p...f,pfr->p...r', features, weights)
+        else:
+            logits = features @ weights
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+    
+    def allocate(self, current_traffic, predicted_traffic, previous_allocation,
+                 total_bandwidth, lower, upper):
+        """Allocation for one tick (or a batch of ticks)"""
+        features = self.features(current_traffic, predicted_traffic, previous_allocation, total_bandwidth)
+        return shares_to_allocation(self.shares(features, self.weights), total_bandwidth, lower, upper)
+    
+    def save(self, path):
+        """Save atomically"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, weights=self.weights)
+        os.replace(tmp_path, path)
+        logger.info(f"Policy saved to {path}")
+    
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['weights'])
+    
+    @classmethod
+    def load_cached(cls, path=None):
+        """Policy at `path` (default: RL_CONFIG), memoized per file mtime; None if absent"""
+        path = path or RL_CONFIG['policy_path']
+        if not os.path.exists(path):
+            return None
+        return load_cached(path, cls.load)
+
+
+class BatchedTrafficEnv:
+    """Many independent allocation episodes stepped together
+    
+    Each environment replays its own slice of the collector's simulated
+    traffic, starting at a random time of day and rescaled to a random
+    offered load (RL_CONFIG['load_range'], relative to the total). The agent sees current and
+    (noisy) predicted traffic; the allocation chosen at tick t serves the
+    traffic at t+1. Allocations may carry extra leading axes (e.g. a policy
+    population), which broadcast against the environments.
+    """
+    
+    def __init__(self, n_envs, episode_length, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.n_envs = n_envs
+        self.episode_length = episode_length
+        self.total_bandwidth = NETWORK_CONFIG['total_bandwidth']
+        self.lower = np.full(NETWORK_CONFIG['num_routes'], float(OPTIMIZATION_CONFIG['min_bandwidth']))
+        self.upper = np.full(NETWORK_CONFIG['num_routes'], float(OPTIMIZATION_CONFIG['max_bandwidth']))
+        
+        collector = NetworkDataCollector()
+        day = datetime(2026, 1, 1)
+        self.traffic = np.stack([
+            collector.generate_trace(
+                episode_length + 1,
+                start=day + timedelta(seconds=int(self.rng.integers(86400))),
+                seed=int(self.rng.integers(2 ** 31))
+            )[1]
+            for _ in range(n_envs)
+        ])
+        
+        # Randomize offered load so the policy also sees congested links
+        load = self.rng.uniform(*RL_CONFIG['load_range'], size=n_envs)
+        mean_total = self.traffic.sum(axis=2).mean(axis=1)
+        self.traffic *= (load * self.total_bandwidth / np.maximum(mean_total, 1e-9))[:, None, None]
+        
+        noise = self.rng.normal(0, RL_CONFIG['prediction_noise'], self.traffic[:, 1:].shape)
+        self.predicted = np.maximum(self.traffic[:, 1:] * (1 + noise), 0)
+        
+        self.t = 0
+        self.previous = None
+    
+    def reset(self):
+        """Start all episodes from an equal split; returns the observation"""
+        self.t = 0
+        num_routes = self.traffic.shape[2]
+        self.previous = np.full((self.n_envs, num_routes), self.total_bandwidth / num_routes)
+        return self.observe()
+    
+    def observe(self):
+        return AllocationPolicy.features(
+            self.traffic[:, self.t], self.predicted[:, self.t], self.previous, self.total_bandwidth
+        )
+    
+    def step(self, allocation):
+        """Apply allocations; returns (observation, reward, done)"""
+        demand = self.traffic[:, self.t + 1]
+        served = np.minimum(demand, allocation).sum(axis=-1) / np.maximum(demand.sum(axis=-1), 1e-9)
+        overload = (demand > allocation).mean(axis=-1)
+        churn = np.abs(allocation - self.previous).sum(axis=-1) / self.total_bandwidth
+        
+        reward = served - RL_CONFIG['overload_penalty'] * overload - RL_CONFIG['churn_penalty'] * churn
+        
+        self.previous = allocation
+        self.t += 1
+        done = self.t >= self.episode_length
+        return (None if done else self.observe()), reward, done
+
+
+class PolicyTrainer:
+    """Offline evolution-strategies training of an AllocationPolicy"""
+    
+    def __init__(self, iterations=None, seed=None):
+        self.iterations = iterations or RL_CONFIG['iterations']
+        self.seed = RL_CONFIG['seed'] if seed is None else seed
+        self.rng = np.random.default_rng(self.seed)
+    
+    @staticmethod
+    def episode_return(env, weights):
+        """Mean per-tick reward of each policy in `weights` (population x F x R)"""
+        observation = env.reset()
+        total = np.zeros(weights.shape[0])
+        done = False
+        while not done:
+            observation = np.broadcast_to(observation, (weights.shape[0],) + observation.shape[-2:])
+            shares = AllocationPolicy.shares(observation, weights)
+            allocation = shares_to_allocation(shares, env.total_bandwidth, env.lower, env.upper)
+            observation, reward, done = env.step(allocation)
+            total += reward.mean(axis=-1)
+        return total / env.episode_length
+    
+    def train(self):
+        """Train, save and return the policy with training statistics"""
+        started = time.time()
+        n_envs = RL_CONFIG['n_envs']
+        population = RL_CONFIG['population'] // 2 * 2
+        sigma = RL_CONFIG['sigma']
+        num_routes = NETWORK_CONFIG['num_routes']
+        shape = (AllocationPolicy.num_features(num_routes), num_routes)
+        
+        train_env = BatchedTrafficEnv(n_envs, RL_CONFIG['episode_length'], seed=self.seed)
+        validation_env = BatchedTrafficEnv(n_envs, RL_CONFIG['episode_length'], seed=self.seed + 1)
+        
+        weights = np.zeros(shape)  # Equal split
+        baseline = float(self.episode_return(validation_env, weights[None])[0])
+        best_weights, best_score = weights.copy(), baseline
+        moment, second_moment = np.zeros(shape), np.zeros(shape)
+        logger.info(f"Training allocation policy: {population} x {n_envs} environments, "
+                    f"equal-split validation reward {baseline:.4f}")
+        
+        for iteration in range(1, self.iterations + 1):
+            # Antithetic perturbations, evaluated as one batched population
+            noise = self.rng.normal(size=(population // 2,) + shape)
+            noise = np.concatenate([noise, -noise])
+            returns = self.episode_return(train_env, weights + sigma * noise)
+            
+            # Rank-based fitness shaping
+            ranks = np.argsort(np.argsort(returns))
+            fitness = ranks / (population - 1) - 0.5
+            gradient = np.einsum('p,pfr->fr', fitness, noise) / (population * sigma)
+            
+            # Adam ascent step
+            moment = 0.9 * moment + 0.1 * gradient
+            second_moment = 0.999 * second_moment + 0.001 * gradient ** 2
+            step_size = RL_CONFIG['learning_rate'] * np.sqrt(1 - 0.999 ** iteration) / (1 - 0.9 ** iteration)
+            weights = weights + step_size * moment / (np.sqrt(second_moment) + 1e-8)
+            
+            if iteration % 10 == 0 or iteration == self.iterations:
+                score = float(self.episode_return(validation_env, weights[None])[0])
+                if score > best_score:
+                    best_weights, best_score = weights.copy(), score
+                logger.info(f"Iteration {iteration}: train reward {returns.mean():.4f}, "
+                            f"validation reward {score:.4f} (best {best_score:.4f})")
+        
+        policy = AllocationPolicy(best_weights)
+        policy.save(RL_CONFIG['policy_path'])
+        
+        return policy, {
+            'iterations': self.iterations,
+            'environments': population * n_envs,
+            'baseline_reward': baseline,
+            'validation_reward': best_score,
+            'duration': time.time() - started
+        }
@@ -0,0 +1,170 @@
+"""
+Parallel Per-Route Model Training
+Fans per-route (or per-shard) training jobs out to a process pool and records
+the resulting versioned artifacts in a route-to-model manifest
+"""
+import os
+import json
+import time
+import multiprocessing as mp
+from datetime import datetime
+from data_collector import NetworkDataCollector
+from tuner import limit_worker_threads
+from config import ROUTE_TRAINING_CONFIG, NETWORK_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def _train_shard(job):
+    """Train one shard's model inside a worker process"""
+    from ml_models import TrafficPredictor
+    
+    started = time.time()
+    result = {
+        'shard': job['shard'],
+        'routes': job['routes'],
+        'feature_columns': job['columns'],
+        'model_path': job['model_path'],
+        'scaler_path': job['scaler_path'],
+        'version': job['version'],
+        'success': False
+    }
+    
+    try:
+        # Read only this shard's route columns from the store
+        df = NetworkDataCollector().load_historical_data(hours=job['hours'], columns=job['columns'])
+        
+        predictor = TrafficPredictor(mode='multivariate')
+        predictor.model_path = job['model_path']
+        predictor.scaler_path = job['scaler_path']
+        os.makedirs(os.path.dirname(predictor.model_path), exist_ok=True)
+        
+        if len(df) < predictor.sequence_length * 2:
+            result['error'] = f"insufficient data ({len(df)} samples)"
+            return result
+        
+        if predictor.train(df, model_type=job['model_type'], feature_columns=job['columns'],
+                           register=False):
+            val_losses = predictor.history.get('val_loss', [])
+            result.update({
+                'success': True,
+                'samples': len(df),
+                'val_loss': float(min(val_losses)) if val_losses else None,
+                'data_start': str(df['timestamp'].iloc[0]),
+                'data_end': str(df['timestamp'].iloc[-1])
+            })
+        else:
+            result['error'] = 'training failed'
+    except Exception as e:
+        result['error'] = str(e)
+    finally:
+        result['duration'] = time.time() - started
+    
+    return result
+
+
+class RouteTrainingOrchestrator:
+    """Trains one model per route (or route group) in parallel"""
+    
+    def __init__(self, workers=None):
+        self.workers = workers or ROUTE_TRAINING_CONFIG['workers'] or os.cpu_count() or 1
+        self.threads_per_worker = ROUTE_TRAINING_CONFIG['threads_per_worker']
+        self.models_dir = ROUTE_TRAINING_CONFIG['models_dir']
+        self.manifest_path = ROUTE_TRAINING_CONFIG['manifest_path']
+        os.makedirs(self.models_dir, exist_ok=True)
+    
+    def build_jobs(self, hours=24, route_names=None, model_type=None):
+        """Split routes into shards of `routes_per_model` routes each"""
+        route_names = route_names or NETWORK_CONFIG['route_names']
+        per_model = max(1, ROUTE_TRAINING_CONFIG['routes_per_model'])
+        model_type = model_type or ROUTE_TRAINING_CONFIG['model_type']
+        version = datetime.now().strftime('%Y%m%d%H%M%S')
+        
+        jobs = []
+        for start in range(0, len(route_names), per_model):
+            routes = route_names[start:start + per_model]
+            columns = [route.lower() for route in routes]
+            shard = '__'.join(columns)
+            shard_dir = os.path.join(self.models_dir, shard, version)
+            jobs.append({
+                'shard': shard,
+                'routes': routes,
+                'columns': columns,
+                'hours': hours,
+                'model_type': model_type,
+                'version': version,
+                'model_path': os.path.join(shard_dir, 'model.h5'),
+                'scaler_path': os.path.join(shard_dir, 'scaler.pkl')
+            })
+        
+        return jobs
+    
+    def train_all(self, hours=24, route_names=None, model_type=None):
+        """Train every shard in the process pool and update the manifest"""
+        jobs = self.build_jobs(hours, route_names, model_type)
+        workers = min(self.workers, len(jobs))
+        logger.info(f"Training {len(jobs)} route model(s) on {workers} workers")
+        
+        ctx = mp.get_context('spawn')
+        with ctx.Pool(
+            processes=workers,
+            initializer=limit_worker_threads,
+            initargs=(self.threads_per_worker,)
+        ) as pool:
+            results = []
+            for result in pool.imap_unordered(_train_shard, jobs):
+                if result['success']:
+                    logger.info(f"Trained {result['shard']} in {result['duration']:.1f}s "
+                                f"(val_loss={result['val_loss']})")
+                else:
+                    logger.error(f"Training {result['shard']} failed: {result.get('error')}")
+                results.append(result)
+        
+        manifest = self.load_manifest()
+        for result in results:
+            if not result['success']:
+                continue  # Keep serving the previous version for this shard
+            entry = {k: v for k, v in result.items() if k not in ('success', 'routes')}
+            for route in result['routes']:
+                manifest['routes'][route] = entry
+        
+        manifest['updated_at'] = datetime.now().isoformat()
+        self._write_manifest(manifest)
+        
+        return results
+    
+    def load_manifest(self):
+        """Load the route-to-model manifest"""
+        if not os.path.exists(self.manifest_path):
+            return {'routes': {}, 'updated_at': None}
+        
+        with open(self.manifest_path) as f:
+            return json.load(f)
+    
+    def _write_manifest(self, manifest):
+        """Write the manifest atomically"""
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        logger.info(f"Manifest saved to {self.manifest_path}")
+    
+    def load_predictor(self, route):
+        """Load the predictor serving a route according to the manifest"""
+        from ml_models import TrafficPredictor
+        
+        entry = self.load_manifest()['routes'].get(route)
+        if entry is None:
+            logger.warning(f"No model in manifest for {route}")
+            return None
+        
+        predictor = TrafficPredictor(mode='multivariate')
+        predictor.model_path = entry['model_path']
+        predictor.scaler_path = entry['scaler_path']
+        # The route's own artifacts, never the shared registry's current model
+        if not predictor.load_model(model_path=entry['model_path'], scaler_path=entry['scaler_path']):
+            return None
+        
+        return predictor
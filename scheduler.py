@@ -0,0 +1,108 @@
+"""
+Fixed-Rate Tick Scheduler
+Fires ticks at absolute deadlines on the monotonic clock, so the period does
+not stretch by the work done per tick, and accounts for overruns and lateness
+"""
+import math
+import time
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+from config import DATA_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Upper edges (ms) of the lateness histogram buckets; the last bucket is open
+LATENESS_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000]
+
+
+class TickScheduler:
+    """Ticks at start + k * interval (monotonic clock)
+    
+    A tick whose work runs past the next deadline is an overrun; the next
+    tick then fires immediately (late). If more deadlines were missed,
+    `overrun_policy` decides what happens to them: 'skip' drops all but the
+    latest, and 'catch_up' fires them back to back, at most `max_catch_up`
+    in a row before skipping the rest.
+    Every tick carries its scheduled wall-clock time, so timestamps stay
+    evenly spaced however late the tick actually ran.
+    """
+    
+    def __init__(self, interval, overrun_policy=None, max_catch_up=None):
+        if interval <= 0:
+            raise ValueError("Tick interval must be positive")
+        self.interval = float(interval)
+        self.overrun_policy = overrun_policy or DATA_CONFIG['tick_overrun_policy']
+        if self.overrun_policy not in ('skip', 'catch_up'):
+            raise ValueError(f"Unknown tick overrun policy: {self.overrun_policy}")
+        self.max_catch_up = DATA_CONFIG['max_catch_up_ticks'] if max_catch_up is None else max_catch_up
+        
+        self.lateness_counts = np.zeros(len(LATENESS_BUCKETS_MS) + 1, dtype=int)
+        self.stats = {
+            'ticks': 0,
+            'overruns': 0,
+            'skipped_ticks': 0,
+            'caught_up_ticks': 0,
+            'last_lateness_ms': None,
+            'max_lateness_ms': 0.0
+        }
+    
+    def _record(self, lateness_ms):
+        self.stats['ticks'] += 1
+        self.stats['last_lateness_ms'] = lateness_ms
+        self.stats['max_lateness_ms'] = max(self.stats['max_lateness_ms'], lateness_ms)
+        self.lateness_counts[np.searchsorted(LATENESS_BUCKETS_MS, lateness_ms)] += 1
+    
+    def ticks(self, stop_event=None):
+        """Yield (tick index, scheduled wall-clock datetime) until `stop_event` is set
+        
+        The caller's work runs between yields; waiting is interruptible.
+        """
+        stop_event = stop_event or threading.Event()
+        start = time.monotonic()
+        start_wall = datetime.now()
+        k = 0
+        caught_up = 0
+        
+        while not stop_event.is_set():
+            deadline = start + k * self.interval
+            delay = deadline - time.monotonic()
+            if delay > 0 and stop_event.wait(delay):
+                return
+            
+            self._record(max(0.0, time.monotonic() - deadline) * 1000)
+            yield k, start_wall + timedelta(seconds=k * self.interval)
+            
+            # Next deadline, or handle the ones already missed
+            k += 1
+            behind = math.floor((time.monotonic() - start) / self.interval) - k + 1
+            if behind <= 0:
+                caught_up = 0
+                continue
+            
+            self.stats['overruns'] += 1
+            if behind == 1:
+                # Only the next deadline has passed: it fires late, nothing is missed
+                caught_up = 0
+                continue
+            
+            if self.overrun_policy == 'catch_up' and caught_up < self.max_catch_up:
+                # Replay the oldest missed deadline now
+                caught_up += 1
+                self.stats['caught_up_ticks'] += 1
+                continue
+            
+            # Fire only the latest missed deadline
+            logger.warning(f"Tick overrun: skipping {behind - 1} missed tick(s)")
+            self.stats['skipped_ticks'] += behind - 1
+            k += behind - 1
+    
+    def lateness_histogram(self):
+        """Tick counts per lateness bucket, keyed by the bucket's upper edge (ms)"""
+        labels = [f"<={edge}ms" for edge in LATENESS_BUCKETS_MS] + [f">{LATENESS_BUCKETS_MS[-1]}ms"]
+        return dict(zip(labels, self.lateness_counts.tolist()))
+    
+    def status(self):
+        return {**self.stats, 'lateness_histogram': self.lateness_histogram()}
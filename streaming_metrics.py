@@ -0,0 +1,223 @@
+"""
+Streaming Metric Accumulators
+Constant-memory, mergeable accumulators for evaluating long histories chunk
+by chunk and combining partial results computed in parallel
+"""
+import math
+import numpy as np
+
+
+class RunningStats:
+    """Welford/Chan running count, mean, variance, min and max
+    
+    Tracks arrays of a fixed `shape`; update() takes a batch whose first
+    axis is the sample axis.
+    """
+    
+    def __init__(self, shape=()):
+        self.count = 0
+        self.mean = np.zeros(shape)
+        self.m2 = np.zeros(shape)
+        self.min = np.full(shape, np.inf)
+        self.max = np.full(shape, -np.inf)
+    
+    def _combine(self, count, mean, m2):
+        """Chan et al. parallel combination of two partial aggregates"""
+        total = self.count + count
+        if total == 0:
+            return
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / total)
+        self.m2 = self.m2 + m2 + delta ** 2 * (self.count * count / total)
+        self.count = total
+    
+    def update(self, values):
+        """Fold in a batch of samples"""
+        values = np.asarray(values, dtype=float)
+        if len(values) == 0:
+            return
+        batch_mean = values.mean(axis=0)
+        self._combine(len(values), batch_mean, ((values - batch_mean) ** 2).sum(axis=0))
+        self.min = np.minimum(self.min, values.min(axis=0))
+        self.max = np.maximum(self.max, values.max(axis=0))
+    
+    def merge(self, other):
+        """Fold in another RunningStats"""
+        self._combine(other.count, other.mean, other.m2)
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+    
+    @property
+    def variance(self):
+        """Population variance"""
+        return self.m2 / self.count if self.count else np.zeros_like(self.m2)
+    
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+
+class ErrorAccumulator:
+    """Running MAE, RMSE, MAPE and R² for predictions vs actual values
+    
+    Like RunningStats, accumulates element-wise over a fixed `shape`
+    (e.g. one entry per horizon step).
+    """
+    
+    def __init__(self, shape=()):
+        self.count = 0
+        self.abs_sum = np.zeros(shape)
+        self.sq_sum = np.zeros(shape)
+        self.ape_sum = np.zeros(shape)
+        self.actual_stats = RunningStats(shape)
+    
+    def update(self, predictions, actual):
+        """Fold in a batch of (samples, *shape) predictions and actual values"""
+        predictions = np.asarray(predictions, dtype=float)
+        actual = np.asarray(actual, dtype=float)
+        if len(actual) == 0:
+            return
+        errors = predictions - actual
+        self.count += len(actual)
+        self.abs_sum += np.abs(errors).sum(axis=0)
+        self.sq_sum += (errors ** 2).sum(axis=0)
+        self.ape_sum += (np.abs(errors) / (np.abs(actual) + 1e-10)).sum(axis=0)
+        self.actual_stats.update(actual)
+    
+    def merge(self, other):
+        """Fold in another ErrorAccumulator"""
+        self.count += other.count
+        self.abs_sum += other.abs_sum
+        self.sq_sum += other.sq_sum
+        self.ape_sum += other.ape_sum
+        self.actual_stats.merge(other.actual_stats)
+        return self
+    
+    def mae(self):
+        return self.abs_sum / max(self.count, 1)
+    
+    def rmse(self):
+        return np.sqrt(self.sq_sum / max(self.count, 1))
+    
+    def mape(self):
+        return self.ape_sum / max(self.count, 1) * 100
+    
+    def r2(self):
+        total = self.actual_stats.m2
+        return 1 - self.sq_sum / np.where(total > 0, total, np.nan)
+    
+    def overall(self):
+        """Scalar metrics pooled over every element of `shape`"""
+        n = max(self.count, 1) * max(self.abs_sum.size, 1)
+        return {
+            'mae': float(self.abs_sum.sum() / n),
+            'rmse': float(math.sqrt(self.sq_sum.sum() / n)),
+            'mape': float(self.ape_sum.sum() / n * 100),
+            'num_samples': int(self.count)
+        }
+
+
+class QuantileSketch:
+    """DDSketch quantile estimator with bounded relative error
+    
+    Positive values are binned on a logarithmic grid; values <= 0 share a
+    single zero bin. Sketches with the same accuracy merge exactly.
+    """
+    
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+    
+    def update(self, values):
+        """Fold in a batch of values"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        
+        keys, counts = np.unique(np.ceil(np.log(positive) / self.log_gamma).astype(int), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            self.bins[key] = self.bins.get(key, 0) + count
+    
+    def merge(self, other):
+        """Fold in another sketch with the same relative accuracy"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+    
+    def quantile(self, q):
+        """Estimate the q-quantile (0 <= q <= 1)"""
+        if self.count == 0:
+            return None
+        
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        
+        seen = self.zero_count
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if seen > rank:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return float(min(max(value, self.min), self.max))
+        
+        return self.max
+
+
+class ColumnAccumulator:
+    """Running statistics (and optional quantile sketches) per table column
+    
+    Consumes DataFrame chunks; missing values are skipped.
+    """
+    
+    def __init__(self, columns, quantile_columns=(), relative_accuracy=0.01):
+        self.columns = list(columns)
+        self.stats = {column: RunningStats() for column in self.columns}
+        self.sketches = {column: QuantileSketch(relative_accuracy) for column in quantile_columns}
+    
+    def update(self, chunk):
+        """Fold in a DataFrame chunk"""
+        for column in self.columns:
+            if column not in chunk:
+                continue
+            values = chunk[column].dropna().values.astype(float)
+            self.stats[column].update(values)
+            if column in self.sketches:
+                self.sketches[column].update(values)
+    
+    def merge(self, other):
+        """Fold in another ColumnAccumulator over the same columns"""
+        for column in self.columns:
+            self.stats[column].merge(other.stats[column])
+        for column, sketch in self.sketches.items():
+            sketch.merge(other.sketches[column])
+        return self
+    
+    def count(self, column):
+        return self.stats[column].count
+    
+    def mean(self, column):
+        return float(self.stats[column].mean) if self.stats[column].count else 0
+    
+    def quantile(self, column, q):
+        return self.sketches[column].quantile(q)
@@ -0,0 +1,110 @@
+"""
+Tests for the allocation actuator's retry and re-queue paths
+"""
+import time
+import numpy as np
+import pytest
+from actuator import AllocationActuator, LocalController
+from config import ACTUATOR_CONFIG
+
+ROUTES = ['Route_A', 'Route_B', 'Route_C']
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    monkeypatch.setitem(ACTUATOR_CONFIG, 'backoff', 0.001)
+    monkeypatch.setitem(ACTUATOR_CONFIG, 'max_backoff', 0.01)
+    monkeypatch.setitem(ACTUATOR_CONFIG, 'max_retries', 2)
+    controller = LocalController('127.0.0.1', 0).start()
+    yield controller
+    controller.stop()
+
+
+def _actuator(controller):
+    return AllocationActuator(ROUTES, {'local': {'url': controller.url}}, change_threshold=0.05)
+
+
+def test_transient_failures_are_retried(controller):
+    actuator = _actuator(controller)
+    controller.fail_requests = 2
+    
+    actuator.submit([100.0, 200.0, 300.0])
+    assert actuator.flush() == 3
+    
+    assert controller.allocations == dict(zip(ROUTES, [100.0, 200.0, 300.0]))
+    assert actuator.stats['retries'] == 2
+    assert actuator.stats['failures'] == 0
+    np.testing.assert_array_equal(actuator.applied, [100.0, 200.0, 300.0])
+    assert np.isnan(actuator.pending).all()
+
+
+def test_failed_push_is_requeued(controller):
+    actuator = _actuator(controller)
+    controller.fail_requests = ACTUATOR_CONFIG['max_retries'] + 1
+    
+    actuator.submit([100.0, 200.0, 300.0])
+    assert actuator.flush() == 0
+    
+    assert controller.allocations == {}
+    assert actuator.stats['failures'] == 1
+    np.testing.assert_array_equal(actuator.pending, [100.0, 200.0, 300.0])
+    assert np.isnan(actuator.sent).all()
+    
+    # The controller recovers: the re-queued values go out on the next flush
+    assert actuator.flush() == 3
+    assert controller.allocations == dict(zip(ROUTES, [100.0, 200.0, 300.0]))
+
+
+def test_newer_value_wins_over_requeue(controller, monkeypatch):
+    actuator = _actuator(controller)
+    post = actuator._post
+    
+    def fail_after_newer_submit(client, routes, values):
+        actuator.submit([150.0, 200.0, 300.0])
+        raise RuntimeError("controller down")
+    
+    monkeypatch.setattr(actuator, '_post', fail_after_newer_submit)
+    actuator.submit([100.0, 200.0, 300.0])
+    assert actuator.flush() == 0
+    
+    # Route_A keeps the newer value; the others re-queue what failed
+    np.testing.assert_array_equal(actuator.pending, [150.0, 200.0, 300.0])
+    
+    monkeypatch.setattr(actuator, '_post', post)
+    assert actuator.flush() == 3
+    assert controller.allocations == dict(zip(ROUTES, [150.0, 200.0, 300.0]))
+
+
+def test_only_changed_routes_are_sent(controller):
+    actuator = _actuator(controller)
+    actuator.submit([100.0, 200.0, 300.0])
+    actuator.flush()
+    
+    actuator.submit([102.0, 260.0, 300.0])
+    assert actuator.flush() == 1
+    assert controller.allocations['Route_A'] == 100.0
+    assert controller.allocations['Route_B'] == 260.0
+
+
+def test_stop_flushes_after_a_running_push(controller, monkeypatch):
+    actuator = _actuator(controller)
+    post = actuator._post
+    attempts = []
+    
+    def slow_first_push(client, routes, values):
+        attempts.append(routes)
+        if len(attempts) == 1:
+            time.sleep(0.3)
+            raise RuntimeError("controller down")
+        return post(client, routes, values)
+    
+    monkeypatch.setattr(actuator, '_post', slow_first_push)
+    monkeypatch.setitem(ACTUATOR_CONFIG, 'timeout', 0.05)
+    actuator.start()
+    actuator.submit([100.0, 200.0, 300.0])
+    time.sleep(0.1)
+    
+    # The sender is still pushing when stop() gives up waiting for it
+    actuator.stop()
+    assert controller.allocations == dict(zip(ROUTES, [100.0, 200.0, 300.0]))
+    assert actuator.stats['failures'] == 1
@@ -0,0 +1,40 @@
+"""
+Tests for walk-forward backtest fold construction
+"""
+import numpy as np
+import pandas as pd
+from backtester import Backtester
+from config import MODEL_CONFIG
+
+COLUMNS = ['route_a', 'route_b']
+
+
+def _history(n=2000):
+    values = np.random.default_rng(0).uniform(0, 100, (n, len(COLUMNS)))
+    df = pd.DataFrame(values, columns=COLUMNS)
+    df.insert(0, 'timestamp', pd.date_range('2026-01-01', periods=n, freq='5s'))
+    return df
+
+
+def test_model_folds_start_after_training_range():
+    df = _history()
+    trained_until = str(df['timestamp'].iloc[1199])
+    
+    jobs = Backtester(folds=4, engine='model').build_jobs(df, COLUMNS, COLUMNS, trained_until=trained_until)
+    
+    assert jobs
+    assert pd.Timestamp(jobs[0]['start']) == df['timestamp'].iloc[1200]
+    assert all(pd.Timestamp(job['start']) > pd.Timestamp(trained_until) for job in jobs)
+    # Inputs of the first fold end right before its first scored row
+    np.testing.assert_array_equal(
+        jobs[0]['values'][:MODEL_CONFIG['sequence_length']],
+        df[COLUMNS].values[1200 - MODEL_CONFIG['sequence_length']:1200]
+    )
+
+
+def test_model_backtest_refuses_in_sample_data():
+    df = _history()
+    backtester = Backtester(folds=4, engine='model')
+    
+    assert backtester.run(df, COLUMNS, COLUMNS) is None
+    assert backtester.run(df, COLUMNS, COLUMNS, trained_until=str(df['timestamp'].iloc[-1])) is None
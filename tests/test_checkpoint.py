@@ -0,0 +1,142 @@
+"""
+Tests for the monitor checkpoint file format and warm-restart round trip
+"""
+import os
+import time
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from checkpoint import MonitorCheckpoint, write_arrays, read_arrays, ALIGNMENT
+from data_collector import NetworkDataCollector
+from forecasters import create_forecaster, ForecastCache
+from optimizer import NetworkOptimizer
+
+
+def test_arrays_round_trip_memory_mapped(tmp_path):
+    path = str(tmp_path / 'state.ckpt')
+    arrays = {
+        'matrix': np.arange(12, dtype=float).reshape(3, 4),
+        'ints': np.array([1, 2, 3], dtype=np.int64),
+        'empty': np.zeros((0, 5))
+    }
+    size = write_arrays(path, arrays, {'answer': 42, 'value': np.float64(1.5)})
+    
+    meta, loaded = read_arrays(path)
+    assert meta == {'answer': 42, 'value': 1.5}
+    assert size == os.path.getsize(path)
+    assert not os.path.exists(path + '.tmp')
+    for name, value in arrays.items():
+        np.testing.assert_array_equal(loaded[name], value)
+        assert loaded[name].dtype == value.dtype
+    assert isinstance(loaded['matrix'], np.memmap)
+    assert loaded['matrix'].offset % ALIGNMENT == 0
+    assert not loaded['matrix'].flags.writeable
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / 'other.ckpt'
+    path.write_bytes(b'not a checkpoint')
+    
+    with pytest.raises(ValueError):
+        read_arrays(str(path))
+
+
+def _monitor(data_file):
+    """The parts of a NetworkMonitor a checkpoint reads and writes"""
+    return SimpleNamespace(
+        data_collector=NetworkDataCollector(data_file),
+        optimizer=NetworkOptimizer(),
+        baseline_forecaster=create_forecaster(),
+        forecast_cache=ForecastCache(),
+        current_traffic={},
+        predicted_traffic={},
+        current_allocation={},
+        metrics={},
+        prediction_history=[],
+        degradation_stats={'model_on_time': 0, 'deadline_misses': 0}
+    )
+
+
+def _run_ticks(monitor, ticks):
+    collector, optimizer = monitor.data_collector, monitor.optimizer
+    for _ in range(ticks):
+        sample = collector.collect_sample()
+        traffic = {route: sample[route.lower()] for route in optimizer.route_names}
+        predicted = {route: value * 1.1 for route, value in traffic.items()}
+        monitor.current_traffic = traffic
+        monitor.predicted_traffic = predicted
+        monitor.current_allocation = optimizer.optimize(traffic, predicted)
+        monitor.metrics = optimizer.get_utilization_stats(traffic)
+        monitor.prediction_history = monitor.prediction_history + [
+            {'timestamp': sample['timestamp'], 'prediction': predicted, 'source': 'model'}
+        ]
+        monitor.degradation_stats['model_on_time'] += 1
+    
+    values = np.array([[sample[route.lower()] for route in optimizer.route_names]
+                       for sample in collector.history])
+    monitor.baseline_forecaster.fit(values, [sample['timestamp'] for sample in collector.history])
+    monitor.forecast_cache.store(np.ones((3, len(optimizer.route_names))), collector.history[-1]['timestamp'])
+
+
+def test_monitor_state_round_trip(tmp_path):
+    path = str(tmp_path / 'monitor.ckpt')
+    before = _monitor(str(tmp_path / 'traffic.csv'))
+    _run_ticks(before, 20)
+    
+    checkpoint = MonitorCheckpoint(path)
+    assert checkpoint.save(checkpoint.capture(before))
+    
+    after = _monitor(str(tmp_path / 'traffic.csv'))
+    assert MonitorCheckpoint(path).restore(after)
+    
+    assert after.data_collector.history == before.data_collector.history
+    np.testing.assert_array_equal(after.optimizer.allocation, before.optimizer.allocation)
+    assert after.optimizer.allocation_history.count == before.optimizer.allocation_history.count
+    assert after.optimizer.get_optimization_metrics() == before.optimizer.get_optimization_metrics()
+    assert after.current_allocation == before.current_allocation
+    assert after.metrics == before.metrics
+    assert after.prediction_history == before.prediction_history
+    assert after.degradation_stats == before.degradation_stats
+    assert after.baseline_forecaster.is_fitted
+    np.testing.assert_allclose(after.baseline_forecaster.forecast(1), before.baseline_forecaster.forecast(1))
+    np.testing.assert_array_equal(after.forecast_cache.forecast, before.forecast_cache.forecast)
+
+
+def test_stale_or_mismatched_checkpoints_are_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / 'monitor.ckpt')
+    monitor = _monitor(str(tmp_path / 'traffic.csv'))
+    _run_ticks(monitor, 5)
+    checkpoint = MonitorCheckpoint(path, max_age=60)
+    checkpoint.save(checkpoint.capture(monitor))
+    
+    monkeypatch.setattr(time, 'time', lambda: checkpoint.stats['last_saved'] + 120)
+    assert not checkpoint.restore(_monitor(str(tmp_path / 'traffic.csv')))
+    monkeypatch.undo()
+    
+    other = _monitor(str(tmp_path / 'traffic.csv'))
+    other.optimizer.route_names = other.optimizer.route_names[:-1]
+    assert not checkpoint.restore(other)
+    assert other.data_collector.history == []
+
+
+def test_nothing_to_capture_without_history(tmp_path):
+    checkpoint = MonitorCheckpoint(str(tmp_path / 'monitor.ckpt'))
+    
+    assert not checkpoint.save(checkpoint.capture(_monitor(str(tmp_path / 'traffic.csv'))))
+    assert not os.path.exists(checkpoint.path)
+
+
+def test_forecasting_state_can_be_added_separately(tmp_path):
+    path = str(tmp_path / 'monitor.ckpt')
+    before = _monitor(str(tmp_path / 'traffic.csv'))
+    _run_ticks(before, 20)
+    
+    checkpoint = MonitorCheckpoint(path)
+    state = checkpoint.capture(before, forecasting=False)
+    assert not any(name.startswith(('baseline.', 'forecast_cache.')) for name in state[0])
+    checkpoint.save(checkpoint.capture_forecasting(before, state))
+    
+    after = _monitor(str(tmp_path / 'traffic.csv'))
+    assert MonitorCheckpoint(path).restore(after)
+    np.testing.assert_allclose(after.baseline_forecaster.forecast(1), before.baseline_forecaster.forecast(1))
+    np.testing.assert_array_equal(after.forecast_cache.forecast, before.forecast_cache.forecast)
@@ -0,0 +1,33 @@
+"""
+Tests for the statistical forecasting engines and the forecast cache
+"""
+import numpy as np
+import pytest
+from forecasters import BaseForecaster, ForecastCache, create_forecaster
+
+
+def test_incomplete_engines_fail_at_construction():
+    class NoForecast(BaseForecaster):
+        name = 'incomplete'
+        
+        def fit(self, values, timestamps=None):
+            return True
+        
+        def update(self, value, timestamp=None):
+            pass
+    
+    with pytest.raises(TypeError):
+        NoForecast()
+    for engine in ('ewma', 'holt_winters', 'ar'):
+        assert isinstance(create_forecaster(engine), BaseForecaster)
+
+
+def test_cache_invalidates_on_per_route_drift():
+    cache = ForecastCache(interval=5, error_bound=0.25)
+    cache.store(np.array([[100.0, 100.0], [100.0, 100.0], [100.0, 100.0]]), 0.0)
+    
+    assert cache.lookup(5.0, observed=np.array([110.0, 95.0])) is not None
+    # The total matches the forecast, but each route is 50% off
+    assert cache.lookup(10.0, observed=np.array([150.0, 50.0])) is None
+    assert cache.stats['drift_invalidations'] == 1
+    assert cache.forecast is None
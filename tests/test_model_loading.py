@@ -0,0 +1,108 @@
+"""
+Tests for model loading: registry versions vs explicit artifact paths
+"""
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+pytest.importorskip('tensorflow')
+
+import ml_models
+import model_registry
+from config import MODEL_CONFIG, ROUTE_TRAINING_CONFIG
+
+
+class FakeModel:
+    """Stands in for a Keras model; identified by the name saved with it"""
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def save(self, path):
+        with open(path, 'w') as f:
+            f.write(self.name)
+
+
+def _load_fake(path):
+    with open(path) as f:
+        return FakeModel(f.read())
+
+
+def _scaler(n_features):
+    return MinMaxScaler().fit(np.array([[0.0] * n_features, [1.0] * n_features]))
+
+
+@pytest.fixture
+def models_dir(tmp_path, monkeypatch):
+    monkeypatch.setitem(MODEL_CONFIG, 'registry_dir', str(tmp_path / 'registry'))
+    monkeypatch.setitem(MODEL_CONFIG, 'multivariate_model_path', str(tmp_path / 'legacy.h5'))
+    monkeypatch.setitem(MODEL_CONFIG, 'multivariate_scaler_path', str(tmp_path / 'legacy.pkl'))
+    monkeypatch.setitem(ROUTE_TRAINING_CONFIG, 'models_dir', str(tmp_path / 'routes'))
+    monkeypatch.setitem(ROUTE_TRAINING_CONFIG, 'manifest_path', str(tmp_path / 'routes' / 'manifest.json'))
+    monkeypatch.setattr(ml_models, 'load_model', _load_fake)
+    model_registry.clear_cache()
+    yield tmp_path
+    model_registry.clear_cache()
+
+
+def _register_shared_model():
+    predictor = ml_models.TrafficPredictor(mode='multivariate')
+    return predictor.registry.register(FakeModel('shared'), _scaler(5), {'mode': 'multivariate'})
+
+
+def _write_artifacts(directory, name, n_features):
+    os.makedirs(directory, exist_ok=True)
+    model_path = os.path.join(directory, 'model.h5')
+    scaler_path = os.path.join(directory, 'scaler.pkl')
+    FakeModel(name).save(model_path)
+    joblib.dump(_scaler(n_features), scaler_path)
+    return model_path, scaler_path
+
+
+def test_load_model_prefers_registry_by_default(models_dir):
+    version = _register_shared_model()
+    _write_artifacts(str(models_dir), 'legacy', 5)
+    
+    predictor = ml_models.TrafficPredictor(mode='multivariate')
+    assert predictor.load_model()
+    assert predictor.model.name == 'shared'
+    assert predictor.model_version == version
+
+
+def test_explicit_paths_bypass_registry(models_dir):
+    _register_shared_model()
+    model_path, scaler_path = _write_artifacts(str(models_dir / 'route_1'), 'route_1', 1)
+    
+    predictor = ml_models.TrafficPredictor(mode='multivariate')
+    assert predictor.load_model(model_path=model_path, scaler_path=scaler_path)
+    assert predictor.model.name == 'route_1'
+    assert predictor.scaler.n_features_in_ == 1
+    assert predictor.model_version is None
+
+
+def test_route_predictor_loads_route_artifacts(models_dir):
+    from route_trainer import RouteTrainingOrchestrator
+    
+    _register_shared_model()
+    orchestrator = RouteTrainingOrchestrator(workers=1)
+    model_path, scaler_path = _write_artifacts(str(models_dir / 'routes' / 'route_1' / 'v1'), 'route_1', 1)
+    orchestrator._write_manifest({
+        'routes': {'Route_1': {'shard': 'route_1', 'model_path': model_path, 'scaler_path': scaler_path}},
+        'updated_at': None
+    })
+    
+    predictor = orchestrator.load_predictor('Route_1')
+    assert predictor is not None
+    assert predictor.model.name == 'route_1'
+    assert predictor.scaler.n_features_in_ == 1
+
+
+def test_missing_explicit_artifacts_do_not_fall_back(models_dir):
+    _register_shared_model()
+    
+    predictor = ml_models.TrafficPredictor(mode='multivariate')
+    assert not predictor.load_model(model_path=str(models_dir / 'missing.h5'),
+                                    scaler_path=str(models_dir / 'missing.pkl'))
+    assert predictor.model is None
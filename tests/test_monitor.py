@@ -0,0 +1,32 @@
+"""
+Tests for the monitoring service lifecycle
+"""
+import threading
+import pytest
+
+pytest.importorskip('tensorflow')
+
+from config import MODEL_CONFIG
+from monitor import NetworkMonitor
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.setitem(MODEL_CONFIG, 'registry_dir', str(tmp_path / 'registry'))
+    return NetworkMonitor(data_file=str(tmp_path / 'traffic.csv'))
+
+
+def _model_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith('model')]
+
+
+def test_restarts_do_not_leak_model_workers(monitor):
+    for _ in range(3):
+        monitor.start(clock=False)
+        monitor.collect_tick()
+        monitor.stop()
+    
+    for thread in _model_threads():
+        thread.join(timeout=5)
+    assert not _model_threads()
+    assert monitor.model_executor is None
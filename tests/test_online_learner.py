@@ -0,0 +1,64 @@
+"""
+Tests for online fine-tuning hot-swaps
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import MinMaxScaler
+
+pytest.importorskip('tensorflow')
+
+import ml_models
+from config import MODEL_CONFIG, ONLINE_LEARNING_CONFIG
+from online_learner import OnlineLearner
+
+
+class FakeModel:
+    """Stands in for a Keras model with a fixed validation loss"""
+    
+    def __init__(self, loss, on_fit=None):
+        self.loss = loss
+        self.on_fit = on_fit
+    
+    def fit(self, *args, **kwargs):
+        if self.on_fit:
+            self.on_fit()
+    
+    def evaluate(self, *args, **kwargs):
+        return [self.loss, self.loss]
+
+
+class FakeCollector:
+    def load_historical_data(self, hours=None):
+        values = np.random.default_rng(0).uniform(0, 100, (400, 5))
+        df = pd.DataFrame(values, columns=[route.lower() for route in ml_models.NETWORK_CONFIG['route_names']])
+        df.insert(0, 'timestamp', pd.date_range('2026-01-01', periods=len(df), freq='s'))
+        return df
+
+
+@pytest.fixture
+def predictor(tmp_path, monkeypatch):
+    monkeypatch.setitem(MODEL_CONFIG, 'registry_dir', str(tmp_path / 'registry'))
+    monkeypatch.setitem(ONLINE_LEARNING_CONFIG, 'persist', False)
+    predictor = ml_models.TrafficPredictor(mode='multivariate')
+    predictor.swap_model(FakeModel(1.0), MinMaxScaler().fit(np.array([[0.0] * 5, [100.0] * 5])), 'v1')
+    return predictor
+
+
+def test_better_candidate_is_swapped_in(predictor, monkeypatch):
+    candidate = FakeModel(0.5)
+    monkeypatch.setattr(predictor, 'clone_model', lambda *args, **kwargs: candidate)
+    
+    assert OnlineLearner(predictor, FakeCollector()).fine_tune_once()
+    assert predictor.model is candidate
+
+
+def test_candidate_discarded_when_serving_pair_changes(predictor, monkeypatch):
+    retrained, retrained_scaler = FakeModel(1.0), MinMaxScaler().fit(np.array([[0.0] * 5, [1.0] * 5]))
+    candidate = FakeModel(0.5, on_fit=lambda: predictor.swap_model(retrained, retrained_scaler, 'v2'))
+    monkeypatch.setattr(predictor, 'clone_model', lambda *args, **kwargs: candidate)
+    
+    learner = OnlineLearner(predictor, FakeCollector())
+    assert not learner.fine_tune_once()
+    assert predictor._serving() == (retrained, retrained_scaler)
+    assert learner.stats['swaps'] == 0
@@ -0,0 +1,33 @@
+"""
+Tests for trace-replay predictions
+"""
+import numpy as np
+from replay import _predictions_for
+
+WARMUP = 200
+
+
+def _replay_mae(values, predictor):
+    predictions = _predictions_for(values, predictor, WARMUP, interval=5)
+    return np.abs(predictions - values[WARMUP + 1:]).mean()
+
+
+def test_holt_winters_replay_error_comparable_to_ewma():
+    rng = np.random.default_rng(0)
+    values = 1000 + rng.normal(0, 50, size=(1500, 5))  # Stationary trace
+    
+    ewma = _replay_mae(values, 'ewma')
+    holt_winters = _replay_mae(values, 'holt_winters')
+    
+    assert holt_winters < 1.5 * ewma
+
+
+def test_replay_predictions_do_not_depend_on_wall_clock(monkeypatch):
+    rng = np.random.default_rng(1)
+    values = 1000 + rng.normal(0, 50, size=(400, 3))
+    first = _predictions_for(values, 'holt_winters', WARMUP, interval=5)
+    
+    monkeypatch.setattr('time.time', lambda: 4e9)
+    second = _predictions_for(values, 'holt_winters', WARMUP, interval=5)
+    
+    np.testing.assert_allclose(first, second)
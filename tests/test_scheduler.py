@@ -0,0 +1,51 @@
+"""
+Tests for fixed-rate tick scheduling and overrun accounting
+"""
+import time
+import threading
+from scheduler import TickScheduler
+
+INTERVAL = 0.1
+
+
+def _run(scheduler, work, ticks):
+    """Run `work(k)` on each tick until `ticks` ticks fired; returns tick indices"""
+    stop = threading.Event()
+    fired = []
+    for k, _ in scheduler.ticks(stop):
+        fired.append(k)
+        if len(fired) >= ticks:
+            stop.set()
+        else:
+            work(k)
+    return fired
+
+
+def test_single_late_tick_is_not_a_catch_up():
+    scheduler = TickScheduler(INTERVAL, overrun_policy='catch_up', max_catch_up=3)
+    # Tick 0 runs 1.5 intervals: tick 1 fires late, no deadline is missed
+    fired = _run(scheduler, lambda k: time.sleep(1.5 * INTERVAL) if k == 0 else None, 3)
+    
+    assert fired == [0, 1, 2]
+    assert scheduler.stats['overruns'] == 1
+    assert scheduler.stats['caught_up_ticks'] == 0
+    assert scheduler.stats['skipped_ticks'] == 0
+
+
+def test_missed_deadline_is_caught_up():
+    scheduler = TickScheduler(INTERVAL, overrun_policy='catch_up', max_catch_up=3)
+    # Tick 0 runs 2.5 intervals: tick 1 was missed and is replayed
+    fired = _run(scheduler, lambda k: time.sleep(2.5 * INTERVAL) if k == 0 else None, 4)
+    
+    assert fired == [0, 1, 2, 3]
+    assert scheduler.stats['caught_up_ticks'] == 1
+    assert scheduler.stats['skipped_ticks'] == 0
+
+
+def test_missed_deadline_is_skipped():
+    scheduler = TickScheduler(INTERVAL, overrun_policy='skip')
+    fired = _run(scheduler, lambda k: time.sleep(2.5 * INTERVAL) if k == 0 else None, 3)
+    
+    assert fired == [0, 2, 3]
+    assert scheduler.stats['skipped_ticks'] == 1
+    assert scheduler.stats['caught_up_ticks'] == 0
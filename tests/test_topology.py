@@ -0,0 +1,48 @@
+"""
+Tests for the multi-commodity flow allocator
+"""
+import numpy as np
+import pytest
+from topology import NetworkTopology, MultiCommodityAllocator, progressive_fill
+
+
+def _topology():
+    return NetworkTopology(
+        {'core': 1000, 'a_access': 800, 'b_access': 800},
+        {'a': ['a_access', 'core'], 'b': ['b_access', 'core']}
+    )
+
+
+def test_weighted_fill_respects_links_and_weights():
+    incidence = _topology().incidence
+    rates = progressive_fill(incidence, np.array([1000.0, 800.0, 800.0]), np.array([900.0, 900.0]),
+                             np.array([1.0, 3.0]))
+    
+    np.testing.assert_allclose(rates, [250.0, 750.0])
+
+
+def test_non_positive_weights_are_rejected():
+    with pytest.raises(ValueError):
+        MultiCommodityAllocator(_topology(), weights=[1.0, 0.0])
+    with pytest.raises(ValueError):
+        MultiCommodityAllocator(_topology(), weights=[1.0, -1.0])
+
+
+def test_incremental_solves_match_full_solves():
+    rng = np.random.default_rng(0)
+    links = {f"link_{i}": rng.uniform(200, 2000) for i in range(12)}
+    paths = {f"route_{j}": list(rng.choice(list(links), rng.integers(1, 4), replace=False)) for j in range(40)}
+    topology = NetworkTopology(links, paths)
+    weights = rng.uniform(0.5, 2.0, 40)
+    lower, upper = np.full(40, 5.0), np.full(40, 600.0)
+    
+    allocator = MultiCommodityAllocator(topology, weights=weights, demand_tolerance=0.0)
+    demand = rng.uniform(0, 600, 40)
+    for _ in range(30):
+        demand = demand.copy()
+        moved = rng.choice(40, 3, replace=False)
+        demand[moved] = rng.uniform(0, 600, 3)
+        
+        incremental = allocator.allocate(demand, lower, upper)
+        full = MultiCommodityAllocator(topology, weights=weights).allocate(demand, lower, upper)
+        np.testing.assert_allclose(incremental, full, atol=1e-6)
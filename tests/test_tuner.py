@@ -0,0 +1,110 @@
+"""
+Tests for hyperparameter search ranking, pruning and scaling
+"""
+import json
+import pytest
+from tuner import HyperparameterTuner, should_prune, training_rows
+from config import TUNING_CONFIG
+
+
+def _trial(trial_id, horizon, val_loss, pruned=False, sequence_length=30):
+    return {
+        'trial_id': trial_id,
+        'model_type': 'lstm',
+        'lstm_units': 32,
+        'sequence_length': sequence_length,
+        'prediction_horizon': horizon,
+        'batch_size': 32,
+        'val_loss': val_loss,
+        'epochs': 10,
+        'pruned': pruned,
+        'duration': 1.0,
+        'error': None
+    }
+
+
+@pytest.fixture
+def tuner(tmp_path, monkeypatch):
+    monkeypatch.setitem(TUNING_CONFIG, 'results_dir', str(tmp_path))
+    return HyperparameterTuner(workers=1)
+
+
+def test_best_config_is_chosen_per_horizon(tuner, tmp_path):
+    # Long horizons have larger losses; they must not lose to short horizons
+    results = [
+        _trial(0, 5, 0.010),
+        _trial(1, 5, 0.008),
+        _trial(2, 10, 0.050),
+        _trial(3, 10, 0.040, pruned=True),
+        _trial(4, 10, 0.060)
+    ]
+    best = tuner.write_results(results)
+    
+    assert set(best) == {'5', '10'}
+    assert best['5']['val_loss'] == 0.008
+    assert best['10']['val_loss'] == 0.050  # The pruned trial is not eligible
+    with open(tmp_path / 'best_config.json') as f:
+        assert json.load(f) == best
+
+
+def test_leaderboard_ranks_within_horizon(tuner, tmp_path):
+    import pandas as pd
+    
+    tuner.write_results([_trial(0, 5, 0.01), _trial(1, 10, 0.05), _trial(2, 10, 0.04)])
+    leaderboard = pd.read_csv(tmp_path / 'leaderboard.csv')
+    ranks = dict(zip(leaderboard['trial_id'], leaderboard['horizon_rank']))
+    
+    assert ranks == {0: 1, 2: 1, 1: 2}
+
+
+def test_pruning_compares_only_same_horizon(monkeypatch):
+    monkeypatch.setitem(TUNING_CONFIG, 'prune_after_epochs', 1)
+    monkeypatch.setitem(TUNING_CONFIG, 'prune_factor', 1.5)
+    curve = {}
+    
+    assert not should_prune(curve, 5, 0, 0.01)
+    # Ten times worse, but a different target: starts its own curve
+    assert not should_prune(curve, 10, 0, 0.10)
+    assert should_prune(curve, 10, 0, 0.20)
+    assert should_prune(curve, 5, 0, 0.02)
+
+
+def test_pruning_waits_for_prune_after_epochs(monkeypatch):
+    monkeypatch.setitem(TUNING_CONFIG, 'prune_after_epochs', 3)
+    curve = {}
+    should_prune(curve, 5, 0, 0.01)
+    
+    assert not should_prune(curve, 5, 0, 1.0)
+
+
+def test_scaler_rows_exclude_every_validation_window():
+    trials = [_trial(0, 5, None, sequence_length=30), _trial(1, 10, None, sequence_length=120)]
+    n_rows, validation_split = 1000, 0.2
+    rows = training_rows(n_rows, trials, validation_split)
+    
+    for trial in trials:
+        n_windows = n_rows - trial['sequence_length'] - trial['prediction_horizon'] + 1
+        first_validation_window = int(n_windows * (1 - validation_split))
+        assert rows <= first_validation_window
+
+
+def test_shared_curve_keeps_the_best_loss_under_concurrency():
+    import multiprocessing as mp
+    import random
+    import threading
+    
+    losses = [random.Random(seed).uniform(0.01, 1.0) for seed in range(400)]
+    with mp.get_context('spawn').Manager() as manager:
+        curve, lock = manager.dict(), manager.Lock()
+        
+        def record(chunk):
+            for loss in chunk:
+                should_prune(curve, 5, 0, loss, lock)
+        
+        threads = [threading.Thread(target=record, args=(losses[i::8],)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert curve[(5, 0)] == min(losses)
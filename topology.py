@@ -0,0 +1,225 @@
+"""
+Network Topology and Multi-Commodity Flow Allocation
+Models routes as paths over shared physical links and allocates path
+bandwidth under per-link capacity constraints (weighted max-min fairness by
+progressive filling), re-solving only the parts of the network whose demand
+changed, warm-started from the previous rates
+"""
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+from config import TOPOLOGY_CONFIG, NETWORK_CONFIG, OPTIMIZATION_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EPSILON = 1e-9
+
+
+class NetworkTopology:
+    """Links with capacities and paths (routes) as lists of links
+    
+    `incidence` is the sparse (links x paths) 0/1 matrix; paths are kept in
+    the order given by `path_names`.
+    """
+    
+    def __init__(self, links, paths, path_names=None):
+        self.link_names = list(links)
+        self.path_names = list(path_names or paths)
+        self.capacity = np.array([float(links[link]) for link in self.link_names])
+        
+        link_index = {link: i for i, link in enumerate(self.link_names)}
+        rows, cols = [], []
+        for j, path in enumerate(self.path_names):
+            if path not in paths:
+                raise ValueError(f"No path defined for route {path}")
+            for link in paths[path]:
+                if link not in link_index:
+                    raise ValueError(f"Path {path} uses unknown link {link}")
+                rows.append(link_index[link])
+                cols.append(j)
+        
+        self.incidence = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)),
+            shape=(len(self.link_names), len(self.path_names))
+        )
+    
+    @classmethod
+    def from_config(cls, route_names=None):
+        """Build the topology in TOPOLOGY_CONFIG
+        
+        Without configured links/paths, every route gets a private access link
+        (max_bandwidth) and all routes share one core link (total_bandwidth),
+        which reproduces the single shared pool.
+        """
+        route_names = route_names or NETWORK_CONFIG['route_names']
+        links = TOPOLOGY_CONFIG['links']
+        paths = TOPOLOGY_CONFIG['paths']
+        
+        if not links or not paths:
+            links = {'core': NETWORK_CONFIG['total_bandwidth']}
+            paths = {}
+            for route in route_names:
+                links[f"{route}_access"] = OPTIMIZATION_CONFIG['max_bandwidth']
+                paths[route] = [f"{route}_access", 'core']
+        
+        return cls(links, paths, route_names)
+    
+    def components(self):
+        """Label paths by connected component of the path-link graph"""
+        n_links, n_paths = self.incidence.shape
+        if n_links == 0:
+            return n_paths, np.arange(n_paths)
+        
+        # Nodes are links first, then paths
+        graph = sparse.bmat([[None, self.incidence], [self.incidence.T, None]], format='csr')
+        _, labels = connected_components(graph, directed=False)
+        values, path_labels = np.unique(labels[n_links:], return_inverse=True)
+        return len(values), path_labels
+    
+    def link_load(self, allocation):
+        """Bandwidth carried by each link for a path allocation"""
+        return self.incidence @ allocation
+
+
+def progressive_fill(incidence, capacity, caps, weights, start=None):
+    """Weighted max-min fair path rates under link capacities
+    
+    All unfrozen paths grow at rate `weights` (which must be positive) until
+    a link saturates or a path reaches its cap; those paths freeze and the
+    rest keep growing. Each round freezes at least one path, so it takes at
+    most len(caps) rounds.
+    
+    `start` resumes the filling from an intermediate state of a previous run,
+    i.e. rates of the form min(final_rates, weights * level): paths still
+    below their cap and on no saturated link keep growing from there.
+    """
+    rates = np.zeros(len(caps)) if start is None else start.astype(float).copy()
+    residual = capacity - incidence @ rates
+    tolerance = EPSILON * np.maximum(capacity, 1)
+    saturated = residual <= tolerance
+    active = (caps - rates > EPSILON) & ~(incidence.T @ saturated.astype(float) > 0)
+    
+    while active.any():
+        growth = np.where(active, weights, 0.0)
+        link_growth = incidence @ growth
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            link_step = np.where(link_growth > EPSILON, residual / link_growth, np.inf)
+            path_step = np.where(active, (caps - rates) / weights, np.inf)
+        step = max(min(link_step.min(), path_step.min()), 0.0)
+        
+        rates += growth * step
+        residual -= link_growth * step
+        
+        saturated = (link_growth > EPSILON) & (residual <= tolerance)
+        blocked = incidence.T @ saturated.astype(float) > 0
+        active &= ~blocked & (caps - rates > EPSILON)
+    
+    return rates
+
+
+class MultiCommodityAllocator:
+    """Path-level bandwidth allocation over a NetworkTopology
+    
+    Paths that share no links (directly or transitively) are independent, so
+    the topology is split into connected components and only components with
+    a path whose demand moved by more than `demand_tolerance` are re-solved.
+    Within a re-solved component, paths that moved less keep the demand they
+    were last solved for, and the demand fill is warm-started from the
+    previous rates (see _solve_component).
+    """
+    
+    def __init__(self, topology, weights=None, demand_tolerance=None):
+        self.topology = topology
+        n_paths = len(topology.path_names)
+        self.weights = np.ones(n_paths) if weights is None else np.asarray(weights, dtype=float)
+        if self.weights.shape != (n_paths,) or not (self.weights > 0).all():
+            raise ValueError(f"Path weights must be {n_paths} positive values, got {weights}")
+        self.demand_tolerance = (
+            TOPOLOGY_CONFIG['demand_tolerance'] if demand_tolerance is None else demand_tolerance
+        )
+        
+        count, self.path_component = topology.components()
+        self.components = []
+        for c in range(count):
+            paths = np.flatnonzero(self.path_component == c)
+            links = np.unique(topology.incidence[:, paths].nonzero()[0])
+            self.components.append({
+                'paths': paths,
+                'links': links,
+                'incidence': topology.incidence[links][:, paths].tocsr()
+            })
+        
+        self.solved_demand = None
+        self.allocation = np.zeros(n_paths)
+        self.stats = {'solves': 0, 'components_solved': 0, 'components_reused': 0}
+        logger.info(f"Topology: {len(topology.link_names)} links, {n_paths} paths, {count} components")
+    
+    def _changed_paths(self, demand):
+        """Paths whose demand moved beyond tolerance since they were last solved"""
+        if self.solved_demand is None:
+            return np.ones(len(demand), dtype=bool)
+        
+        drift = np.abs(demand - self.solved_demand)
+        return drift > self.demand_tolerance * np.maximum(np.abs(self.solved_demand), 1.0)
+    
+    def _solve_component(self, component, demand, lower, upper, changed):
+        """Reserve floors, fill demand fairly, then fill remaining headroom
+        
+        The demand fill starts every path at zero and raises all of them at
+        one level, so a path's previous rate / weight is the level it froze
+        at, and the fill is unchanged up to the lowest level at which a
+        changed path's cap differs. With the bounds of the previous solve,
+        filling resumes from that level instead of from zero; only the
+        headroom fill, whose inputs all moved, runs in full.
+        """
+        incidence = component['incidence']
+        capacity = self.topology.capacity[component['links']]
+        weights = self.weights[component['paths']]
+        
+        # Floors, scaled down uniformly if they do not fit every link
+        floor_load = incidence @ lower
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fit = np.where(floor_load > capacity, capacity / floor_load, 1.0)
+        floors = lower * (fit.min() if len(fit) else 1.0)
+        residual = capacity - incidence @ floors
+        
+        demand_caps = np.clip(demand, floors, upper) - floors
+        start = None
+        previous = component.get('solved')
+        if (previous is not None and np.array_equal(previous['lower'], lower)
+                and np.array_equal(previous['upper'], upper)):
+            level = np.min(np.minimum(previous['caps'], demand_caps)[changed] / weights[changed])
+            start = np.minimum(previous['fill'], weights * level)
+        fill = progressive_fill(incidence, residual, demand_caps, weights, start)
+        component['solved'] = {'lower': lower.copy(), 'upper': upper.copy(), 'caps': demand_caps, 'fill': fill}
+        
+        rates = floors + fill
+        residual = capacity - incidence @ rates
+        return rates + progressive_fill(incidence, residual, upper - rates, weights)
+    
+    def allocate(self, demand, lower, upper):
+        """Allocation vector (path order) for a demand vector"""
+        demand = np.asarray(demand, dtype=float)
+        lower = np.minimum(lower, upper)
+        changed = self._changed_paths(demand)
+        components = np.unique(self.path_component[changed])
+        
+        if self.solved_demand is None:
+            self.solved_demand = demand.copy()
+        # Paths within tolerance keep the demand they were solved for
+        self.solved_demand[changed] = demand[changed]
+        
+        for c in components:
+            component = self.components[c]
+            paths = component['paths']
+            self.allocation[paths] = self._solve_component(
+                component, self.solved_demand[paths], lower[paths], upper[paths], changed[paths]
+            )
+        
+        self.stats['solves'] += 1
+        self.stats['components_solved'] += len(components)
+        self.stats['components_reused'] += len(self.components) - len(components)
+        return self.allocation.copy()
@@ -0,0 +1,279 @@
+"""
+Parallel Hyperparameter and Architecture Search
+Runs MODEL_CONFIG search trials in a process pool over windows shared through
+shared memory, with early-stop pruning of bad trials
+"""
+import os
+import json
+import time
+import itertools
+import random
+import contextlib
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+from threadpoolctl import threadpool_limits
+from config import MODEL_CONFIG, TUNING_CONFIG
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-worker state set up by _init_worker
+_worker_data = None
+_worker_shm = None
+_worker_curve = None
+_worker_curve_lock = None
+
+
+def limit_worker_threads(threads, tensorflow=True):
+    """Pin math library and TensorFlow thread pools for a worker process
+    
+    Must run before TensorFlow is imported in the worker. Workers that never
+    run a model pass tensorflow=False to avoid importing it. NumPy's BLAS is
+    already loaded (importing this module imports it) and has read its
+    thread count, so it is limited at runtime with threadpoolctl; the
+    environment variables cover libraries loaded later.
+    """
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    threadpool_limits(limits=threads)
+    
+    if not tensorflow:
+        return
+    
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def _init_worker(shm_name, shape, dtype, curve, curve_lock, threads):
+    """Attach to the shared scaled data and limit thread pools"""
+    global _worker_data, _worker_shm, _worker_curve, _worker_curve_lock
+    limit_worker_threads(threads)
+    
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_data = np.ndarray(shape, dtype=dtype, buffer=_worker_shm.buf)
+    _worker_curve = curve
+    _worker_curve_lock = curve_lock
+
+
+def should_prune(curve, horizon, epoch, val_loss, lock=None):
+    """Record val_loss on the shared learning curve; True if the trial should stop
+    
+    Losses are only comparable between trials predicting the same horizon,
+    so the curve keeps the best val_loss per (prediction_horizon, epoch).
+    `lock` makes the read-modify-write atomic across worker processes.
+    """
+    key = (horizon, epoch)
+    with lock or contextlib.nullcontext():
+        best = curve.get(key)
+        if best is None or val_loss < best:
+            curve[key] = val_loss
+            return False
+    return (epoch + 1 >= TUNING_CONFIG['prune_after_epochs']
+            and val_loss > best * TUNING_CONFIG['prune_factor'])
+
+
+def training_rows(n_rows, trials, validation_split=None):
+    """Leading rows that fall in every trial's training windows
+    
+    Keras' validation_split holds out the last windows, so the scaler is fit
+    on the rows before the earliest validation window of any trial.
+    """
+    validation_split = MODEL_CONFIG['validation_split'] if validation_split is None else validation_split
+    return min(
+        int((n_rows - trial['sequence_length'] - trial['prediction_horizon'] + 1) * (1 - validation_split))
+        for trial in trials
+    )
+
+
+def _pruning_callback(keras, trial):
+    """Stop a trial whose val_loss trails the best seen at the same epoch and horizon"""
+    
+    class PruningCallback(keras.callbacks.Callback):
+        def __init__(self):
+            super().__init__()
+            self.pruned = False
+        
+        def on_epoch_end(self, epoch, logs=None):
+            val_loss = (logs or {}).get('val_loss')
+            if val_loss is None:
+                return
+            
+            if should_prune(_worker_curve, trial['prediction_horizon'], epoch, val_loss, _worker_curve_lock):
+                logger.info(f"Pruning trial {trial['trial_id']} at epoch {epoch + 1}")
+                self.pruned = True
+                self.model.stop_training = True
+    
+    return PruningCallback()
+
+
+def _run_trial(trial):
+    """Train and score one configuration inside a worker process"""
+    from ml_models import TrafficPredictor, keras, EarlyStopping
+    
+    started = time.time()
+    
+    predictor = TrafficPredictor()
+    predictor.sequence_length = trial['sequence_length']
+    predictor.prediction_horizon = trial['prediction_horizon']
+    
+    if len(_worker_data) < predictor.sequence_length + predictor.prediction_horizon:
+        return {**trial, 'val_loss': None, 'epochs': 0, 'pruned': False,
+                'duration': 0.0, 'error': 'insufficient data'}
+    
+    X, y = predictor.make_sequences(_worker_data)
+    input_shape = (X.shape[1], X.shape[2])
+    n_outputs = X.shape[2] if predictor.is_multivariate else 1
+    if trial['model_type'] == 'gru':
+        model = predictor.build_gru_model(input_shape, n_outputs, units=trial['lstm_units'])
+    else:
+        model = predictor.build_lstm_model(input_shape, n_outputs, units=trial['lstm_units'])
+    
+    pruning = _pruning_callback(keras, trial)
+    history = model.fit(
+        X, y,
+        batch_size=trial['batch_size'],
+        epochs=TUNING_CONFIG['epochs'],
+        validation_split=MODEL_CONFIG['validation_split'],
+        callbacks=[
+            EarlyStopping(monitor='val_loss', patience=TUNING_CONFIG['patience'], restore_best_weights=True),
+            pruning
+        ],
+        verbose=0
+    )
+    
+    val_losses = history.history.get('val_loss', [])
+    return {
+        **trial,
+        'val_loss': float(min(val_losses)) if val_losses else None,
+        'epochs': len(val_losses),
+        'pruned': pruning.pruned,
+        'duration': time.time() - started,
+        'error': None
+    }
+
+
+class HyperparameterTuner:
+    """Searches model architecture and training parameters in parallel"""
+    
+    def __init__(self, workers=None):
+        self.workers = workers or TUNING_CONFIG['workers'] or os.cpu_count() or 1
+        self.threads_per_worker = TUNING_CONFIG['threads_per_worker']
+        self.results_dir = TUNING_CONFIG['results_dir']
+        os.makedirs(self.results_dir, exist_ok=True)
+    
+    def build_trials(self):
+        """Expand the search space into trial configurations"""
+        space = TUNING_CONFIG['search_space']
+        grid = list(itertools.product(
+            space['model_type'],
+            space['lstm_units'],
+            space['sequence_length'],
+            space['prediction_horizon'],
+            space['batch_size']
+        ))
+        
+        max_trials = TUNING_CONFIG['max_trials']
+        if max_trials and len(grid) > max_trials:
+            grid = random.Random(TUNING_CONFIG['seed']).sample(grid, max_trials)
+        
+        return [
+            {
+                'trial_id': i,
+                'model_type': model_type,
+                'lstm_units': units,
+                'sequence_length': sequence_length,
+                'prediction_horizon': horizon,
+                'batch_size': batch_size
+            }
+            for i, (model_type, units, sequence_length, horizon, batch_size) in enumerate(grid)
+        ]
+    
+    def tune(self, df, feature_columns=None):
+        """Run the search and write the leaderboard and best config"""
+        from ml_models import TrafficPredictor
+        
+        if feature_columns is None:
+            feature_columns = TrafficPredictor().default_feature_columns()
+        
+        trials = self.build_trials()
+        values = df[feature_columns].values
+        
+        # Fit the scaler on training rows only; validation min/max must not leak in
+        fit_rows = training_rows(len(values), trials)
+        if fit_rows < 2:
+            logger.error(f"Not enough data to tune ({len(values)} samples)")
+            return None
+        scaled = MinMaxScaler().fit(values[:fit_rows]).transform(values).astype(np.float32)
+        workers = min(self.workers, len(trials))
+        logger.info(f"Running {len(trials)} trials on {workers} workers "
+                    f"({self.threads_per_worker} thread(s) each)")
+        
+        # Share the preprocessed series with every worker without copying
+        shm = shared_memory.SharedMemory(create=True, size=scaled.nbytes)
+        try:
+            shared = np.ndarray(scaled.shape, dtype=scaled.dtype, buffer=shm.buf)
+            shared[:] = scaled
+            
+            ctx = mp.get_context('spawn')
+            with ctx.Manager() as manager:
+                curve = manager.dict()
+                with ctx.Pool(
+                    processes=workers,
+                    initializer=_init_worker,
+                    initargs=(shm.name, scaled.shape, scaled.dtype, curve, manager.Lock(), self.threads_per_worker)
+                ) as pool:
+                    results = []
+                    for result in pool.imap_unordered(_run_trial, trials):
+                        logger.info(f"Trial {result['trial_id']} finished: val_loss={result['val_loss']}, "
+                                    f"pruned={result['pruned']}, {result['duration']:.1f}s")
+                        results.append(result)
+        finally:
+            shm.close()
+            shm.unlink()
+        
+        return self.write_results(results)
+    
+    def write_results(self, results):
+        """Write leaderboard CSV and the best config per prediction horizon as JSON
+        
+        val_loss measures a different target for each horizon, so trials are
+        ranked only against trials with the same prediction_horizon.
+        """
+        leaderboard = pd.DataFrame(results).sort_values(
+            ['prediction_horizon', 'val_loss'], na_position='last'
+        )
+        leaderboard['horizon_rank'] = leaderboard.groupby('prediction_horizon').cumcount() + 1
+        leaderboard_path = os.path.join(self.results_dir, 'leaderboard.csv')
+        leaderboard.to_csv(leaderboard_path, index=False)
+        logger.info(f"Leaderboard saved to {leaderboard_path}")
+        
+        completed = leaderboard[leaderboard['val_loss'].notna() & ~leaderboard['pruned'].astype(bool)]
+        if len(completed) == 0:
+            logger.error("No trial completed successfully")
+            return None
+        
+        best_configs = {}
+        for horizon, group in completed.groupby('prediction_horizon'):
+            best = group.iloc[0]
+            best_configs[str(horizon)] = {
+                'model_type': best['model_type'],
+                'lstm_units': int(best['lstm_units']),
+                'sequence_length': int(best['sequence_length']),
+                'prediction_horizon': int(best['prediction_horizon']),
+                'batch_size': int(best['batch_size']),
+                'val_loss': float(best['val_loss'])
+            }
+        
+        best_path = os.path.join(self.results_dir, 'best_config.json')
+        with open(best_path, 'w') as f:
+            json.dump(best_configs, f, indent=2)
+        logger.info(f"Best configs saved to {best_path}")
+        
+        return best_configs